@@ -0,0 +1,15 @@
+from ._base import ICacheBackend
+from .memory import InMemoryCacheBackend
+from .report import ReportCache, cached_report
+from .repository import CacheStats, RepositoryCache, cached, invalidates
+
+__all__ = [
+    "CacheStats",
+    "ICacheBackend",
+    "InMemoryCacheBackend",
+    "ReportCache",
+    "RepositoryCache",
+    "cached",
+    "cached_report",
+    "invalidates",
+]
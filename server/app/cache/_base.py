@@ -0,0 +1,17 @@
+from typing import Optional, Protocol
+
+
+class ICacheBackend(Protocol):
+    """
+    Storage of a read-through cache: expiring byte values plus counters that
+    never expire, used as generations to invalidate groups of values at once.
+    """
+
+    def get(self, key: str) -> Optional[bytes]: ...
+    def set(self, key: str, value: bytes, ttl: Optional[float]) -> None: ...
+
+    def get_counters(self, keys: list[str]) -> list[int]: ...
+    def incr(self, key: str) -> int: ...
+
+    def clear(self) -> None: ...
+    def stats(self) -> dict[str, int]: ...
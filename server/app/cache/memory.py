@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Literal, Optional
+
+from ..decorators import implements
+from ._base import ICacheBackend
+
+
+class InMemoryCacheBackend(ICacheBackend):
+    """
+    Per-process backend holding at most `max_entries` values, evicting the least
+    recently used one first, or with the "fifo" `eviction` policy the oldest
+    one. Expired values are dropped when read or evicted.
+    """
+
+    def __init__(
+        self, max_entries: int = 10_000, eviction: Literal["lru", "fifo"] = "lru"
+    ):
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self._values: OrderedDict[str, tuple[Optional[float], bytes]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._evictions = 0
+        self._expirations = 0
+
+    @implements
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._values[key]
+                self._expirations += 1
+                return None
+            if self.eviction == "lru":
+                self._values.move_to_end(key)
+            return value
+
+    @implements
+    def set(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._values[key] = (expires_at, value)
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+                self._evictions += 1
+
+    @implements
+    def get_counters(self, keys: list[str]) -> list[int]:
+        with self._lock:
+            return [self._counters.get(key, 0) for key in keys]
+
+    @implements
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    @implements
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    @implements
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._values),
+                "max_entries": self.max_entries,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
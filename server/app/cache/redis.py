@@ -0,0 +1,59 @@
+from typing import Any, Optional
+
+from ..decorators import implements
+from ._base import ICacheBackend
+
+
+class RedisCacheBackend(ICacheBackend):
+    """
+    Backend on a Redis-protocol server shared by every worker process, so that
+    a write in one worker invalidates the values cached by all of them.
+
+    Size is bounded by the server: run it with `maxmemory` and the
+    `volatile-lru` policy, which evicts cached values (they all expire) but
+    never the generation counters. Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, *, prefix: str = "zlagoda:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "The redis cache backend requires the `redis` package"
+            ) from e
+
+        self.prefix = prefix
+        self._client: Any = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    @implements
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.prefix + key)
+
+    @implements
+    def set(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        self._client.set(
+            self.prefix + key, value, px=int(ttl * 1000) if ttl is not None else None
+        )
+
+    @implements
+    def get_counters(self, keys: list[str]) -> list[int]:
+        values = self._client.mget([self.prefix + key for key in keys])
+        return [int(value) if value is not None else 0 for value in values]
+
+    @implements
+    def incr(self, key: str) -> int:
+        return self._client.incr(self.prefix + key)
+
+    @implements
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=f"{self.prefix}v:*"))
+        if keys:
+            self._client.delete(*keys)
+
+    @implements
+    def stats(self) -> dict[str, int]:
+        info = self._client.info("stats")
+        return {
+            "evictions": info.get("evicted_keys", 0),
+            "expirations": info.get("expired_keys", 0),
+        }
@@ -0,0 +1,157 @@
+import inspect
+import pickle
+import threading
+from dataclasses import asdict
+from datetime import date, timedelta
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable, Collection, Optional, TypeVar
+
+import structlog
+
+from ._base import ICacheBackend
+from .repository import CacheStats, _digest
+
+if TYPE_CHECKING:
+    from ..dal.repositories._base import PydanticDBRepository
+
+logger = structlog.get_logger(__name__)
+
+_T = TypeVar("_T")
+_Method = TypeVar("_Method", bound=Callable[..., Any])
+
+# * Versions of the checks behind reports over all time, or over ended periods
+SALES = "check"
+CLOSED_SALES = "check_closed_days"
+
+
+class ReportCache:
+    """
+    Cache of sales report results, see `cached_report`.
+
+    Values are keyed by report, arguments and the versions the database keeps
+    for the tables the report reads (migrations 009 and 010), so any write to
+    them, by whatever path, makes the cached results unreachable. Reports still
+    open are kept for `ttl`, reports over periods that have ended until the
+    backend evicts them.
+    """
+
+    def __init__(self, backend: ICacheBackend, *, ttl: Optional[float] = 600):
+        self.backend = backend
+        self.ttl = ttl
+        self._stats: dict[str, CacheStats] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(
+        self,
+        name: str,
+        versions: dict[str, int],
+        arguments: tuple[Any, ...],
+        load: Callable[[], _T],
+        closed: bool,
+    ) -> _T:
+        version = ":".join(f"{table}={versions[table]}" for table in sorted(versions))
+        key = f"v:{name}:{_digest((version,))}:{_digest(arguments)}"
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning("report_cache.get_failed", name=name, error=str(e))
+            self._record(name, "errors")
+            return load()
+
+        if value is not None:
+            self._record(name, "hits")
+            return pickle.loads(value)
+
+        self._record(name, "misses")
+        result = load()
+        try:
+            self.backend.set(key, pickle.dumps(result), None if closed else self.ttl)
+        except Exception as e:
+            logger.warning("report_cache.set_failed", name=name, error=str(e))
+            self._record(name, "errors")
+        return result
+
+    def bypass(self, name: str) -> None:
+        self._record(name, "bypasses")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            names = {name: asdict(stats) for name, stats in self._stats.items()}
+        try:
+            backend = self.backend.stats()
+        except Exception as e:
+            logger.warning("report_cache.stats_failed", error=str(e))
+            backend = {}
+        return {"names": names, "backend": backend}
+
+    def _record(self, name: str, counter: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, CacheStats())
+            setattr(stats, counter, getattr(stats, counter) + 1)
+
+
+def _is_closed(period_end: Any) -> bool:
+    if isinstance(period_end, date):
+        # * A day of slack for the clocks of the server and the database, which
+        # * decides when checks count as printed on a past day
+        return period_end < date.today() - timedelta(days=1)
+    return False
+
+
+def cached_report(
+    *, depends_on: Collection[str] = (), period_end: Optional[str] = None
+) -> Callable[[_Method], _Method]:
+    """
+    Caches the results of a repository method aggregating sales by its
+    arguments, until a check is created or deleted or a table in `depends_on`
+    changes.
+
+    When the argument named by `period_end` is a date before yesterday, only
+    checks printed before today can change the report, and it is kept until
+    evicted rather than for the cache ttl.
+
+    Reads inside a unit of work and without the version counters are never
+    cached.
+    """
+
+    def decorator(method: _Method) -> _Method:
+        signature = inspect.signature(method)
+
+        @wraps(method)
+        def wrapper(self: "PydanticDBRepository", *args: Any, **kwargs: Any) -> Any:
+            cache = self._report_cache
+            if cache is None:
+                return method(self, *args, **kwargs)
+
+            name = f"{type(self).__name__}.{method.__name__}"
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            closed = period_end is not None and _is_closed(bound.arguments[period_end])
+            tables = (CLOSED_SALES if closed else SALES, *depends_on)
+
+            if self._unit_of_work.active:
+                cache.bypass(name)
+                return method(self, *args, **kwargs)
+
+            # * Imported here: repositories import this module
+            from ..dal.repositories.table_version import TableVersionRepository
+
+            versions = TableVersionRepository(self._db).get_versions(tables)
+            if len(versions) < len(tables):
+                cache.bypass(name)
+                return method(self, *args, **kwargs)
+
+            return cache.get_or_load(
+                name,
+                versions,
+                tuple(bound.arguments.values())[1:],
+                lambda: method(self, *args, **kwargs),
+                closed,
+            )
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,189 @@
+import hashlib
+import pickle
+import threading
+from dataclasses import asdict, dataclass
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable, Collection, Optional, TypeVar
+
+import structlog
+from pydantic import BaseModel
+
+from ._base import ICacheBackend
+
+if TYPE_CHECKING:
+    from ..dal.repositories._base import PydanticDBRepository
+
+logger = structlog.get_logger(__name__)
+
+_T = TypeVar("_T")
+_Method = TypeVar("_Method", bound=Callable[..., Any])
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    bypasses: int = 0
+    invalidations: int = 0
+    errors: int = 0
+
+
+class RepositoryCache:
+    """
+    Read-through cache for repository methods, see `cached` and `invalidates`.
+
+    Values are grouped by table. Every table has a generation counter that is
+    part of the keys of the values read from it, so bumping the counter on a
+    write makes all of them unreachable at once; they then expire or get
+    evicted by the backend. A failing backend only costs the cache, never the
+    read.
+    """
+
+    def __init__(self, backend: ICacheBackend, *, default_ttl: Optional[float] = 300):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._stats: dict[str, CacheStats] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(
+        self,
+        name: str,
+        tables: Collection[str],
+        arguments: tuple[Any, ...],
+        load: Callable[[], _T],
+        ttl: Optional[float] = None,
+    ) -> _T:
+        try:
+            generations = self.backend.get_counters([f"g:{table}" for table in tables])
+            key = f"v:{name}:{':'.join(map(str, generations))}:{_digest(arguments)}"
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning("cache.get_failed", name=name, error=str(e))
+            self._record(name, "errors")
+            return load()
+
+        if value is not None:
+            self._record(name, "hits")
+            return pickle.loads(value)
+
+        self._record(name, "misses")
+        result = load()
+        try:
+            self.backend.set(
+                key,
+                pickle.dumps(result),
+                ttl if ttl is not None else self.default_ttl,
+            )
+        except (pickle.PicklingError, AttributeError, TypeError):
+            # * E.g. partial models, created on the fly, cannot be pickled
+            pass
+        except Exception as e:
+            logger.warning("cache.set_failed", name=name, error=str(e))
+            self._record(name, "errors")
+        return result
+
+    def invalidate(self, *tables: str) -> None:
+        for table in tables:
+            try:
+                self.backend.incr(f"g:{table}")
+            except Exception as e:
+                logger.warning("cache.invalidate_failed", table=table, error=str(e))
+                self._record(table, "errors")
+            else:
+                self._record(table, "invalidations")
+
+    def bypass(self, name: str) -> None:
+        self._record(name, "bypasses")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            names = {name: asdict(stats) for name, stats in self._stats.items()}
+        try:
+            backend = self.backend.stats()
+        except Exception as e:
+            logger.warning("cache.stats_failed", error=str(e))
+            backend = {}
+        return {"names": names, "backend": backend}
+
+    def _record(self, name: str, counter: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, CacheStats())
+            setattr(stats, counter, getattr(stats, counter) + 1)
+
+
+def _key_part(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return (type(value).__name__, value.model_dump(mode="json"))
+    if isinstance(value, (set, frozenset)):
+        return sorted(map(repr, value))
+    if isinstance(value, (list, tuple)):
+        return [_key_part(item) for item in value]
+    if isinstance(value, dict):
+        return sorted((key, _key_part(item)) for key, item in value.items())
+    return value
+
+
+def _digest(arguments: tuple[Any, ...]) -> str:
+    return hashlib.sha1(repr(_key_part(arguments)).encode()).hexdigest()
+
+
+def cached(
+    *, depends_on: Collection[str] = (), ttl: Optional[float] = None
+) -> Callable[[_Method], _Method]:
+    """
+    Caches the results of a repository read method by its arguments, until a
+    write to the repository's table or to one of `depends_on` invalidates them
+    or `ttl` (the cache default when None) runs out.
+
+    Reads inside a unit of work are never cached: they may see writes of their
+    own transaction.
+    """
+
+    def decorator(method: _Method) -> _Method:
+        @wraps(method)
+        def wrapper(self: "PydanticDBRepository", *args: Any, **kwargs: Any) -> Any:
+            cache = self._cache
+            if cache is None:
+                return method(self, *args, **kwargs)
+
+            name = f"{type(self).__name__}.{method.__name__}"
+            if self._unit_of_work.active:
+                cache.bypass(name)
+                return method(self, *args, **kwargs)
+
+            return cache.get_or_load(
+                name,
+                (self.table_name, *depends_on),
+                (args, kwargs),
+                lambda: method(self, *args, **kwargs),
+                ttl,
+            )
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def invalidates(method: _Method) -> _Method:
+    """
+    Invalidates the values cached from the repository's table after a write
+    method runs, and again when the unit of work it ran in commits, so that a
+    read between the two cannot keep the old rows cached.
+    """
+
+    @wraps(method)
+    def wrapper(self: "PydanticDBRepository", *args: Any, **kwargs: Any) -> Any:
+        result = method(self, *args, **kwargs)
+        cache = self._cache
+        if cache is not None:
+            cache.invalidate(self.table_name)
+            if self._unit_of_work.active:
+                self._unit_of_work.after_commit(
+                    lambda: cache.invalidate(self.table_name)
+                )
+        return result
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,339 @@
+import struct
+import time
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterable, Optional
+
+import structlog
+
+from ..dal.schemas.store_product import ScannedProduct
+
+logger = structlog.get_logger(__name__)
+
+# * Segment layout: header, hash slots (row index or -1), fixed-width records,
+# * then the UTF-8 product names the records point into. Each record starts
+# * with a sequence number that is odd while the writer updates the record
+_HEADER = struct.Struct("<4sHxxIII")
+_SLOT = struct.Struct("<i")
+_SEQUENCE = struct.Struct("<I")
+_FIELDS = struct.Struct("<12s12sdi?IH")
+_RECORD_SIZE = _SEQUENCE.size + _FIELDS.size
+_MAGIC = b"ZLUC"
+_LAYOUT_VERSION = 2
+
+# * Reads of a record that an update keeps overlapping for this many seconds
+# * give up: the writer died in the middle of the update
+_READ_TIMEOUT = 0.1
+
+# * The pointer segment names the current data segment: its generation and
+# * whether the loader still keeps it current
+_POINTER = struct.Struct("<Q?")
+
+# * Segments created by this process, which stay registered for cleanup on exit
+_created: set[str] = set()
+
+
+def _slot_of(upc: bytes, capacity: int) -> int:
+    return zlib.crc32(upc) & (capacity - 1)
+
+
+def _create_segment(name: str, size: int) -> shared_memory.SharedMemory:
+    try:
+        segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        # * Left behind by a loader that did not exit cleanly
+        stale = shared_memory.SharedMemory(name=name)
+        stale.close()
+        stale.unlink()
+        segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+    _created.add(name)
+    return segment
+
+
+def _unlink_segment(segment: shared_memory.SharedMemory) -> None:
+    segment.close()
+    segment.unlink()
+    _created.discard(segment.name)
+
+
+def _read_record(buf: memoryview, offset: int) -> Optional[tuple]:
+    """
+    Reads the fields of a record, retrying until no update overlapped; None
+    after `_READ_TIMEOUT`.
+    """
+    deadline = None
+    while True:
+        (before,) = _SEQUENCE.unpack_from(buf, offset)
+        fields = _FIELDS.unpack_from(buf, offset + _SEQUENCE.size)
+        (after,) = _SEQUENCE.unpack_from(buf, offset)
+        if before == after and not before & 1:
+            return fields
+
+        if deadline is None:
+            deadline = time.monotonic() + _READ_TIMEOUT
+        elif time.monotonic() > deadline:
+            return None
+        # * Let a writer that was preempted mid-update finish it
+        time.sleep(0)
+
+
+class SharedCatalogWriter:
+    """
+    Publishes the UPC catalog as an array-backed snapshot in shared memory, for
+    `SharedCatalogReader`s in any process on the host to look up without
+    copying it.
+
+    Every publish writes a new data segment and then switches the pointer
+    segment to it, so readers never see a half-written table. Numeric fields of
+    existing entries are updated in place, under the record's sequence number.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._pointer = _create_segment(name, _POINTER.size)
+        _POINTER.pack_into(self._pointer.buf, 0, 0, False)
+        self._segment: Optional[shared_memory.SharedMemory] = None
+        self._generation = 0
+        self._rows: dict[str, tuple[int, ScannedProduct]] = {}
+        self._records_offset = 0
+
+    def publish(self, entries: Iterable[ScannedProduct]) -> None:
+        entries = list(entries)
+        capacity = 1
+        while capacity < 2 * len(entries):
+            capacity *= 2
+
+        names = bytearray()
+        records = []
+        for entry in entries:
+            name = entry.product_name.encode()
+            records.append((entry, len(names), len(name)))
+            names += name
+
+        records_offset = _HEADER.size + capacity * _SLOT.size
+        names_offset = records_offset + len(records) * _RECORD_SIZE
+        generation = self._generation + 1
+        segment = _create_segment(
+            f"{self.name}.{generation}", max(names_offset + len(names), 1)
+        )
+
+        try:
+            buf = segment.buf
+            _HEADER.pack_into(
+                buf, 0, _MAGIC, _LAYOUT_VERSION, len(records), capacity, names_offset
+            )
+            for slot in range(capacity):
+                _SLOT.pack_into(buf, _HEADER.size + slot * _SLOT.size, -1)
+
+            rows: dict[str, tuple[int, ScannedProduct]] = {}
+            for row, (entry, name_offset, name_length) in enumerate(records):
+                upc = entry.UPC.encode()
+                slot = _slot_of(upc, capacity)
+                while _SLOT.unpack_from(buf, _HEADER.size + slot * _SLOT.size)[0] != -1:
+                    slot = (slot + 1) & (capacity - 1)
+                _SLOT.pack_into(buf, _HEADER.size + slot * _SLOT.size, row)
+                offset = records_offset + row * _RECORD_SIZE
+                _SEQUENCE.pack_into(buf, offset, 0)
+                _FIELDS.pack_into(
+                    buf,
+                    offset + _SEQUENCE.size,
+                    upc,
+                    (entry.UPC_prom or "").encode(),
+                    entry.selling_price,
+                    entry.products_number,
+                    entry.promotional_product,
+                    name_offset,
+                    name_length,
+                )
+                rows[entry.UPC] = (row, entry)
+            buf[names_offset : names_offset + len(names)] = names
+        except BaseException:
+            # * Readers never saw it; do not leave it behind
+            _unlink_segment(segment)
+            raise
+
+        _POINTER.pack_into(self._pointer.buf, 0, generation, True)
+
+        # * Readers keep their mapping of the old segment after it is unlinked
+        previous = self._segment
+        self._segment, self._generation = segment, generation
+        self._rows, self._records_offset = rows, records_offset
+        if previous is not None:
+            _unlink_segment(previous)
+
+    def update(self, entry: ScannedProduct) -> bool:
+        """
+        Updates the price, promotion flag and stock of a published entry in
+        place.
+
+        Returns:
+            bool: False when the entry is new or its name or promotional UPC
+                changed, and the catalog has to be published again.
+        """
+        if self._segment is None or entry.UPC not in self._rows:
+            return False
+        row, published = self._rows[entry.UPC]
+        if (
+            published.product_name != entry.product_name
+            or published.UPC_prom != entry.UPC_prom
+        ):
+            return False
+
+        buf = self._segment.buf
+        offset = self._records_offset + row * _RECORD_SIZE
+        (sequence,) = _SEQUENCE.unpack_from(buf, offset)
+        _, _, _, _, _, name_offset, name_length = _FIELDS.unpack_from(
+            buf, offset + _SEQUENCE.size
+        )
+        # * Readers retry while the sequence number is odd or has moved on
+        _SEQUENCE.pack_into(buf, offset, (sequence + 1) & 0xFFFFFFFF)
+        _FIELDS.pack_into(
+            buf,
+            offset + _SEQUENCE.size,
+            entry.UPC.encode(),
+            (entry.UPC_prom or "").encode(),
+            entry.selling_price,
+            entry.products_number,
+            entry.promotional_product,
+            name_offset,
+            name_length,
+        )
+        _SEQUENCE.pack_into(buf, offset, (sequence + 2) & 0xFFFFFFFF)
+        self._rows[entry.UPC] = (row, entry)
+        return True
+
+    def retract(self) -> None:
+        """Tells readers the snapshot is no longer kept current."""
+        _POINTER.pack_into(self._pointer.buf, 0, self._generation, False)
+
+    def close(self) -> None:
+        self.retract()
+        for segment in (self._segment, self._pointer):
+            if segment is not None:
+                _unlink_segment(segment)
+        self._segment = None
+
+
+class SharedCatalogReader:
+    """
+    Looks up UPCs in the snapshot published by a `SharedCatalogWriter`,
+    following it to every new generation.
+
+    A generation the reader cannot use, because its layout is unknown or one
+    of its records stays mid-update, leaves the reader not ready until the
+    next one is published.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._pointer: Optional[shared_memory.SharedMemory] = None
+        self._segment: Optional[shared_memory.SharedMemory] = None
+        self._generation = 0
+        self._capacity = 0
+        self._records_offset = 0
+        self._names_offset = 0
+        self._unusable_generation: Optional[int] = None
+
+    @property
+    def is_ready(self) -> bool:
+        pointer = self._attach_pointer()
+        if pointer is None:
+            return False
+        generation, ready = _POINTER.unpack_from(pointer.buf, 0)
+        return ready and generation != self._unusable_generation
+
+    def get(self, upc: str) -> Optional[ScannedProduct]:
+        segment = self._attach_segment()
+        if segment is None:
+            return None
+
+        buf = segment.buf
+        key = upc.encode()
+        slot = _slot_of(key, self._capacity)
+        while True:
+            (row,) = _SLOT.unpack_from(buf, _HEADER.size + slot * _SLOT.size)
+            if row == -1:
+                return None
+            record = _read_record(buf, self._records_offset + row * _RECORD_SIZE)
+            if record is None:
+                logger.warning(
+                    "shared_catalog.record_stuck", generation=self._generation, row=row
+                )
+                self._unusable_generation = self._generation
+                return None
+            if record[0] == key:
+                break
+            slot = (slot + 1) & (self._capacity - 1)
+
+        _, upc_prom, price, stock, promotional, name_offset, name_length = record
+        start = self._names_offset + name_offset
+        return ScannedProduct.model_construct(
+            UPC=upc,
+            # * Fixed-width fields come back padded with NULs
+            UPC_prom=upc_prom.rstrip(b"\0").decode() or None,
+            product_name=bytes(buf[start : start + name_length]).decode(),
+            selling_price=price,
+            promotional_product=promotional,
+            products_number=stock,
+        )
+
+    def close(self) -> None:
+        for segment in (self._segment, self._pointer):
+            if segment is not None:
+                segment.close()
+        self._segment = self._pointer = None
+
+    def _attach_pointer(self) -> Optional[shared_memory.SharedMemory]:
+        if self._pointer is None:
+            self._pointer = self._open(self.name)
+        return self._pointer
+
+    def _attach_segment(self) -> Optional[shared_memory.SharedMemory]:
+        pointer = self._attach_pointer()
+        if pointer is None:
+            return None
+
+        generation, _ = _POINTER.unpack_from(pointer.buf, 0)
+        if generation == self._unusable_generation:
+            return None
+        if generation == self._generation:
+            return self._segment
+
+        segment = self._open(f"{self.name}.{generation}")
+        if segment is None:
+            # * Already replaced, or the writer closed; keep what we have
+            return self._segment
+
+        magic, layout_version, _, capacity, names_offset = _HEADER.unpack_from(
+            segment.buf, 0
+        )
+        if magic != _MAGIC or layout_version != _LAYOUT_VERSION:
+            # * E.g. published by another release during a rolling deploy
+            logger.warning(
+                "shared_catalog.unknown_layout",
+                segment=segment.name,
+                layout_version=layout_version,
+            )
+            segment.close()
+            self._unusable_generation = generation
+            return None
+
+        if self._segment is not None:
+            self._segment.close()
+        self._segment, self._generation = segment, generation
+        self._capacity = capacity
+        self._records_offset = _HEADER.size + capacity * _SLOT.size
+        self._names_offset = names_offset
+        return segment
+
+    @staticmethod
+    def _open(name: str) -> Optional[shared_memory.SharedMemory]:
+        try:
+            segment = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return None
+        # * Only the writer may unlink, but attaching registers the segment to be
+        # * unlinked when this process exits
+        if name not in _created:
+            resource_tracker.unregister(segment._name, "shared_memory")  # type: ignore[attr-defined]
+        return segment
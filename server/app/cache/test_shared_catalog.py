@@ -0,0 +1,167 @@
+import threading
+import uuid
+
+import pytest
+
+from ..dal.schemas.store_product import ScannedProduct
+from . import shared_catalog
+from .shared_catalog import SharedCatalogReader, SharedCatalogWriter
+
+UPC = "000000000001"
+
+
+def _product(upc: str = UPC, *, price: float = 10.0, stock: int = 10):
+    return ScannedProduct(
+        UPC=upc,
+        UPC_prom=None,
+        product_name=f"Product {upc}",
+        selling_price=price,
+        promotional_product=False,
+        products_number=stock,
+    )
+
+
+@pytest.fixture
+def writer():
+    writer = SharedCatalogWriter(f"zl_test_{uuid.uuid4().hex[:12]}")
+    yield writer
+    writer.close()
+
+
+@pytest.fixture
+def reader(writer):
+    reader = SharedCatalogReader(writer.name)
+    yield reader
+    reader.close()
+
+
+def test_reads_published_entries(writer, reader):
+    assert not reader.is_ready
+
+    writer.publish([_product(), _product("000000000002", price=2.5)])
+
+    assert reader.is_ready
+    assert reader.get(UPC).model_dump() == _product().model_dump()
+    assert reader.get("000000000002").selling_price == 2.5
+    assert reader.get("000000000003") is None
+
+
+def test_follows_updates_and_new_generations(writer, reader):
+    writer.publish([_product()])
+    assert reader.get(UPC).products_number == 10
+
+    assert writer.update(_product(stock=7))
+    assert reader.get(UPC).products_number == 7
+
+    assert not writer.update(_product("000000000002"))
+    writer.publish([_product(stock=7), _product("000000000002")])
+    assert reader.get("000000000002") is not None
+
+
+def test_concurrent_update_and_read_never_tears(writer, reader):
+    # * Every update keeps stock equal to the price, so a read mixing two
+    # * updates shows up as a mismatch
+    writer.publish([_product(price=0, stock=0)])
+    stop = threading.Event()
+
+    def update():
+        value = 0
+        while not stop.is_set():
+            value += 1
+            writer.update(_product(price=value, stock=value))
+
+    updater = threading.Thread(target=update)
+    updater.start()
+    try:
+        for _ in range(20_000):
+            product = reader.get(UPC)
+            assert product is not None
+            assert product.selling_price == product.products_number
+    finally:
+        stop.set()
+        updater.join()
+
+
+def test_stuck_record_marks_the_generation_unusable(writer, reader, monkeypatch):
+    monkeypatch.setattr(shared_catalog, "_READ_TIMEOUT", 0.01)
+    writer.publish([_product()])
+    assert reader.get(UPC) is not None
+
+    # * A writer that died between the two halves of an update
+    buf = writer._segment.buf
+    offset = writer._records_offset
+    (sequence,) = shared_catalog._SEQUENCE.unpack_from(buf, offset)
+    shared_catalog._SEQUENCE.pack_into(buf, offset, sequence + 1)
+
+    assert reader.get(UPC) is None
+    assert not reader.is_ready
+
+    writer.publish([_product(stock=3)])
+    assert reader.is_ready
+    assert reader.get(UPC).products_number == 3
+
+
+def test_unknown_layout_leaves_the_reader_not_ready(writer, reader, monkeypatch):
+    monkeypatch.setattr(shared_catalog, "_LAYOUT_VERSION", 99)
+    writer.publish([_product()])
+    monkeypatch.undo()
+
+    assert reader.get(UPC) is None
+    assert not reader.is_ready
+
+    writer.publish([_product()])
+    assert reader.is_ready
+    assert reader.get(UPC).model_dump() == _product().model_dump()
+
+
+class _FailingFields:
+    """Stands in for the record struct and fails after `after` writes."""
+
+    def __init__(self, fields, after: int):
+        self._fields = fields
+        self._after = after
+        self.size = fields.size
+
+    def pack_into(self, *args):
+        if self._after == 0:
+            raise RuntimeError("writer died")
+        self._after -= 1
+        self._fields.pack_into(*args)
+
+    def unpack_from(self, *args):
+        return self._fields.unpack_from(*args)
+
+
+def test_writer_closing_mid_publish(monkeypatch):
+    writer = SharedCatalogWriter(f"zl_test_{uuid.uuid4().hex[:12]}")
+    reader = SharedCatalogReader(writer.name)
+    writer.publish([_product()])
+    assert reader.get(UPC) is not None
+
+    monkeypatch.setattr(
+        shared_catalog, "_FIELDS", _FailingFields(shared_catalog._FIELDS, after=1)
+    )
+    with pytest.raises(RuntimeError):
+        writer.publish([_product(stock=1), _product("000000000002")])
+    monkeypatch.undo()
+
+    # * The half-written generation is gone and readers stay on the last one
+    assert f"{writer.name}.2" not in shared_catalog._created
+    assert reader.is_ready
+    assert reader.get(UPC).products_number == 10
+    assert reader.get("000000000002") is None
+
+    writer.close()
+
+    # * The mapping outlives the writer, but it is no longer kept current
+    assert not reader.is_ready
+    assert reader.get(UPC).products_number == 10
+    reader.close()
+
+
+def test_reader_without_writer():
+    reader = SharedCatalogReader(f"zl_test_{uuid.uuid4().hex[:12]}")
+
+    assert not reader.is_ready
+    assert reader.get(UPC) is None
+    reader.close()
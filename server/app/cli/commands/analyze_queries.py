@@ -0,0 +1,84 @@
+import json
+from typing import Literal
+
+import click
+from tabulate import tabulate
+
+from ...dal.query_shapes import repository_query_shapes
+from ...db.analysis import QueryPlanAnalyzer, QueryPlanReport
+from ...decorators import implements
+from ._base import ICommand
+
+
+class Command(ICommand):
+    QUERY_PREVIEW_LENGTH = 80
+
+    def __init__(self, analyzer: QueryPlanAnalyzer):
+        self.analyzer = analyzer
+
+    @implements
+    def execute(
+        self,
+        *,
+        output_format: Literal["table", "json"] = "table",
+        output: str | None = None,
+        only_flagged: bool = False,
+    ):
+        shapes = repository_query_shapes()
+        click.echo(f"Explaining {len(shapes)} repository calls...", err=True)
+
+        reports = self.analyzer.analyze(shapes)
+        if only_flagged:
+            reports = [r for r in reports if r.findings or r.error]
+
+        if output_format == "json":
+            text = json.dumps([r.model_dump() for r in reports], indent=2)
+        else:
+            text = self._render_table(reports)
+
+        if output:
+            with open(output, "w") as f:
+                f.write(text + "\n")
+            click.echo(click.style(f"Report written to {output}", fg="green"), err=True)
+        else:
+            click.echo(text)
+
+        flagged = sum(1 for r in reports if r.findings)
+        failed = sum(1 for r in reports if r.error)
+        click.echo(
+            click.style(
+                f"{len(reports)} distinct queries, {flagged} flagged, {failed} failed.",
+                fg="yellow" if flagged or failed else "green",
+            ),
+            err=True,
+        )
+
+    def _render_table(self, reports: list[QueryPlanReport]) -> str:
+        rows = []
+        for report in reports:
+            query = report.query
+            if len(query) > self.QUERY_PREVIEW_LENGTH:
+                query = query[: self.QUERY_PREVIEW_LENGTH - 3] + "..."
+
+            if report.error:
+                findings = f"error: {report.error}"
+            else:
+                findings = "\n".join(f"[{f.kind}] {f.detail}" for f in report.findings)
+
+            rows.append(
+                [
+                    f"{report.total_cost:.2f}",
+                    report.labels[0]
+                    + (
+                        f"\n(+{len(report.labels) - 1} more)"
+                        if len(report.labels) > 1
+                        else ""
+                    ),
+                    query,
+                    findings or "-",
+                ]
+            )
+
+        return tabulate(
+            rows, headers=["cost", "call", "query", "findings"], tablefmt="grid"
+        )
@@ -1,3 +1,6 @@
+from datetime import date
+from typing import Literal, Optional
+
 import click
 
 from ...controllers.check import CheckCleanupController
@@ -8,11 +11,51 @@ class ClearAllChecksCommand(ICommand):
     def __init__(self, cleanup_controller: CheckCleanupController):
         self.cleanup_controller = cleanup_controller
 
-    def execute(self) -> None:
-        if click.confirm(
+    def execute(
+        self,
+        mode: Literal["batched", "truncate"] = "batched",
+        batch_size: int = 10_000,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> None:
+        if mode == "truncate":
+            if date_from or date_to:
+                raise click.UsageError("Date bounds cannot be used with truncate mode")
+            self._truncate()
+        else:
+            self._delete_in_batches(batch_size, date_from, date_to)
+
+    def _truncate(self) -> None:
+        if not click.confirm(
             "Are you sure you want to delete ALL checks? This cannot be undone."
         ):
-            self.cleanup_controller.delete_all_checks()
-            click.echo("Deleted all checks")
-        else:
             click.echo("Operation cancelled")
+            return
+
+        self.cleanup_controller.truncate_checks()
+        click.echo("Deleted all checks")
+
+    def _delete_in_batches(
+        self, batch_size: int, date_from: Optional[date], date_to: Optional[date]
+    ) -> None:
+        total = self.cleanup_controller.count_checks(date_from, date_to)
+        if not total:
+            click.echo("No checks to delete")
+            return
+
+        scope = "ALL" if not (date_from or date_to) else "the selected"
+        if not click.confirm(
+            f"Are you sure you want to delete {scope} {total} checks? "
+            "This cannot be undone."
+        ):
+            click.echo("Operation cancelled")
+            return
+
+        with click.progressbar(length=total, label="Deleting checks") as progress:
+            deleted = self.cleanup_controller.delete_checks(
+                batch_size=batch_size,
+                date_from=date_from,
+                date_to=date_to,
+                on_progress=progress.update,
+            )
+        click.echo(f"Deleted {deleted} checks")
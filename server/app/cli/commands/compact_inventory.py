@@ -0,0 +1,13 @@
+import click
+
+from ...controllers.inventory import InventoryController
+from ._base import ICommand
+
+
+class CompactInventoryCommand(ICommand):
+    def __init__(self, inventory_controller: InventoryController):
+        self.inventory_controller = inventory_controller
+
+    def execute(self, chunk_size: int = 500) -> None:
+        compacted = self.inventory_controller.compact(chunk_size)
+        click.echo(f"Compacted stock of {compacted} store products")
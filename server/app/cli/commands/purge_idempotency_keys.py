@@ -0,0 +1,13 @@
+import click
+
+from ...controllers.idempotency import IdempotencyController
+from ._base import ICommand
+
+
+class PurgeIdempotencyKeysCommand(ICommand):
+    def __init__(self, idempotency_controller: IdempotencyController):
+        self.idempotency_controller = idempotency_controller
+
+    def execute(self) -> None:
+        purged = self.idempotency_controller.purge()
+        click.echo(f"Purged {purged} expired idempotency keys")
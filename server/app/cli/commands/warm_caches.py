@@ -0,0 +1,28 @@
+import click
+
+from ...controllers.warmup import CacheWarmer, WarmupResult
+from ._base import ICommand
+
+
+def echo_warmup_result(result: WarmupResult) -> None:
+    click.echo(
+        click.style(
+            f"  {result.describe()}", fg="yellow" if result.error is not None else None
+        )
+    )
+
+
+class WarmCachesCommand(ICommand):
+    def __init__(self, warmer: CacheWarmer):
+        self.warmer = warmer
+
+    def execute(self, notify: bool = True) -> None:
+        click.echo("Warming caches...")
+        results = self.warmer.run(progress=echo_warmup_result)
+        click.echo(
+            f"Caches warmed in {sum(result.duration for result in results):.2f}s"
+        )
+
+        if notify:
+            self.warmer.request()
+            click.echo("Asked running servers to warm their caches")
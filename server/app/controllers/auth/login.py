@@ -1,12 +1,13 @@
-from typing import Literal
+from typing import Literal, Optional
 
 from pydantic import BaseModel
 
-from ...dal.repositories.auth import UserRepository
-from ...dal.schemas.auth import User, UserUpdate
+from ...dal.repositories.auth import PermissionRepository, UserRepository
+from ...dal.schemas.auth import TokenUser, User, UserUpdate
 from .exceptions import InvalidCredentialsError, UserNotFoundError
 from .hasher import IHasher
-from .token_generator import ITokenGenerator
+from .token_generator import ITokenGenerator, TokenClaims
+from .versions import AuthVersionTable
 
 
 class LoginResponse(BaseModel):
@@ -16,15 +17,26 @@ class LoginResponse(BaseModel):
 
 
 class LoginController:
+    """
+    With `auth_versions`, tokens also carry the user's identity, permissions
+    and auth version, and are trusted without a lookup while that version is
+    current.
+    """
+
     def __init__(
         self,
         user_repo: UserRepository,
         password_hasher: IHasher,
         token_generator: ITokenGenerator,
+        *,
+        permission_repo: Optional[PermissionRepository] = None,
+        auth_versions: Optional[AuthVersionTable] = None,
     ):
         self.user_repo = user_repo
         self.password_hasher = password_hasher
         self.token_generator = token_generator
+        self.permission_repo = permission_repo
+        self.auth_versions = auth_versions
 
     def login(self, username: str, password: str) -> LoginResponse:
         users = self.user_repo.search(UserUpdate(username=username))
@@ -38,11 +50,26 @@ class LoginController:
 
         return LoginResponse(
             user=user,
-            access_token=self.token_generator.create_token(username),
+            access_token=self.token_generator.create_token(
+                username, self._get_claims(user)
+            ),
             token_type="bearer",
         )
 
     def get_user(self, access_token: str) -> User:
+        if self.auth_versions is not None:
+            claims = self.token_generator.retrieve_claims(access_token)
+            if claims is not None and self.auth_versions.is_current(
+                claims.user_id, claims.auth_version
+            ):
+                return TokenUser(
+                    id=claims.user_id,
+                    username=claims.username,
+                    is_superuser=claims.is_superuser,
+                    id_employee=claims.id_employee,
+                    permissions=claims.permissions,
+                )
+
         username = self.token_generator.retrieve_username(access_token)
         users = self.user_repo.search(UserUpdate(username=username))
         if not users:
@@ -51,3 +78,27 @@ class LoginController:
         user = users[0]
 
         return user
+
+    def _get_claims(self, user: User) -> Optional[TokenClaims]:
+        if self.auth_versions is None or self.permission_repo is None:
+            return None
+
+        # * Read the version first: a change after it makes the claims stale
+        # * rather than wrong
+        version = self.user_repo.get_auth_version(user.id)
+        if version is None:
+            return None
+
+        permissions = None
+        if not user.is_superuser:
+            permissions = frozenset(
+                perm.codename for perm in self.permission_repo.get_by_user(user.id)
+            )
+        return TokenClaims(
+            username=user.username,
+            user_id=user.id,
+            is_superuser=user.is_superuser,
+            id_employee=user.id_employee,
+            auth_version=version,
+            permissions=permissions,
+        )
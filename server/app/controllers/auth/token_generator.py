@@ -1,23 +1,49 @@
 from datetime import datetime, timedelta, timezone
-from typing import Protocol
+from typing import Any, Optional, Protocol
 from typing import cast as typecast
 
 import jwt
 from jwt.exceptions import InvalidTokenError as JWTInvalidTokenError
+from pydantic import BaseModel, ConfigDict
 
 from ...decorators import implements
 from .exceptions import InvalidTokenError
 
 
+class TokenClaims(BaseModel):
+    """
+    What a token says about its user, valid while `auth_version` is the user's
+    current one.
+    """
+
+    username: str
+    user_id: int
+    is_superuser: bool
+    id_employee: str | None
+    auth_version: int
+    permissions: frozenset[str] | None = None
+
+    model_config = ConfigDict(frozen=True)
+
+
 class ITokenGenerator(Protocol):
-    def create_token(self, username: str) -> str: ...
+    def create_token(
+        self, username: str, claims: Optional[TokenClaims] = None
+    ) -> str: ...
 
     def retrieve_username(self, token: str | None) -> str: ...
 
+    def retrieve_claims(self, token: str | None) -> Optional[TokenClaims]: ...
+
 
 class JWTTokenGenerator(ITokenGenerator):
     SUBJECT_KEY = "sub"
     EXPIRATION_KEY = "exp"
+    USER_ID_KEY = "uid"
+    SUPERUSER_KEY = "su"
+    EMPLOYEE_KEY = "emp"
+    AUTH_VERSION_KEY = "ver"
+    PERMISSIONS_KEY = "perms"
 
     def __init__(self, secret_key: str, algorithm: str, expires_delta: timedelta):
         self.secret_key = secret_key
@@ -25,11 +51,18 @@ class JWTTokenGenerator(ITokenGenerator):
         self.expires_delta = expires_delta
 
     @implements
-    def create_token(self, username: str) -> str:
-        payload = {
+    def create_token(self, username: str, claims: Optional[TokenClaims] = None) -> str:
+        payload: dict[str, Any] = {
             self.SUBJECT_KEY: username,
             self.EXPIRATION_KEY: datetime.now(timezone.utc) + self.expires_delta,
         }
+        if claims is not None:
+            payload[self.USER_ID_KEY] = claims.user_id
+            payload[self.SUPERUSER_KEY] = claims.is_superuser
+            payload[self.EMPLOYEE_KEY] = claims.id_employee
+            payload[self.AUTH_VERSION_KEY] = claims.auth_version
+            if claims.permissions is not None:
+                payload[self.PERMISSIONS_KEY] = sorted(claims.permissions)
         try:
             return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
         except Exception as e:
@@ -37,16 +70,36 @@ class JWTTokenGenerator(ITokenGenerator):
 
     @implements
     def retrieve_username(self, token: str | None) -> str:
+        return self._decode(token).get(self.SUBJECT_KEY)
+
+    @implements
+    def retrieve_claims(self, token: str | None) -> Optional[TokenClaims]:
+        """Returns None for tokens issued without claims."""
+        payload = self._decode(token)
+        if self.AUTH_VERSION_KEY not in payload:
+            return None
+
+        permissions = payload.get(self.PERMISSIONS_KEY)
+        return TokenClaims(
+            username=payload[self.SUBJECT_KEY],
+            user_id=payload[self.USER_ID_KEY],
+            is_superuser=payload[self.SUPERUSER_KEY],
+            id_employee=payload[self.EMPLOYEE_KEY],
+            auth_version=payload[self.AUTH_VERSION_KEY],
+            permissions=frozenset(permissions) if permissions is not None else None,
+        )
+
+    def _decode(self, token: str | None) -> dict[str, Any]:
         if token is None:
             raise InvalidTokenError("Token is None")
 
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
         except JWTInvalidTokenError as e:
-            raise InvalidTokenError(f"Failed to retrieve username: {e}")
+            raise InvalidTokenError(f"Failed to decode token: {e}")
 
         now = datetime.now(timezone.utc)
         if typecast(int, payload.get(self.EXPIRATION_KEY)) < int(now.timestamp()):
             raise InvalidTokenError("Token expired")
 
-        return payload.get(self.SUBJECT_KEY)
+        return payload
@@ -0,0 +1,63 @@
+from datetime import timedelta
+from typing import Callable, Optional
+
+import structlog
+
+from ...dal.repositories.auth import UserRepository
+from ...db.connection._base import IDatabase
+from ..notification_listener import NotificationListener
+
+logger = structlog.get_logger(__name__)
+
+
+class AuthVersionTable(NotificationListener):
+    """
+    Process-local copy of the users' auth versions, telling whether the claims
+    of a token are still current.
+
+    A worker thread, holding its own database connection, loads all versions
+    and then applies the `auth_version` notifications of the database
+    triggers; every `check_interval` it reloads them all, in case a
+    notification was lost. While the worker is disconnected no claims are
+    current and callers have to read the database instead.
+    """
+
+    CHANNEL = "auth_version"
+    THREAD_NAME = "auth-versions"
+
+    def __init__(
+        self,
+        db_factory: Callable[[], IDatabase],
+        repo_factory: Callable[[IDatabase], UserRepository],
+        *,
+        check_interval: timedelta = timedelta(seconds=30),
+        retry_delay: timedelta = timedelta(seconds=5),
+    ):
+        super().__init__(
+            db_factory, check_interval=check_interval, retry_delay=retry_delay
+        )
+        self._repo_factory = repo_factory
+        self._versions: dict[int, int] = {}
+
+    def is_current(self, user_id: int, version: int) -> bool:
+        return self._ready.is_set() and self._versions.get(user_id) == version
+
+    def get(self, user_id: int) -> Optional[int]:
+        """The user's version, or None while not loaded or for an unknown user."""
+        return self._versions.get(user_id) if self._ready.is_set() else None
+
+    def _load(self, db: IDatabase) -> None:
+        self._versions = self._repo_factory(db).get_auth_versions()
+        logger.debug("auth_versions.loaded", size=len(self._versions))
+
+    def _apply(self, db: IDatabase, payloads: list[str]) -> None:
+        for payload in payloads:
+            user_id, version = payload.split(":", 1)
+            if version:
+                # * Versions only grow; a late notification must not undo what
+                # * a reload already saw
+                self._versions[int(user_id)] = max(
+                    int(version), self._versions.get(int(user_id), 0)
+                )
+            else:
+                self._versions.pop(int(user_id), None)
@@ -4,6 +4,7 @@ from typing import Literal, Optional
 
 from ..dal.repositories.category import CategoryRepository
 from ..dal.schemas.category import Category
+from .single_flight import SingleFlight, coalesce
 
 
 class BaseCategoryController(ABC):
@@ -12,6 +13,12 @@ class BaseCategoryController(ABC):
 
 
 class CategoryQueryController(BaseCategoryController):
+    def __init__(
+        self, repo: CategoryRepository, single_flight: Optional[SingleFlight] = None
+    ):
+        super().__init__(repo)
+        self.single_flight = single_flight
+
     def get_category(self, category_number: int) -> Category | None:
         return self.repo.get_by_number(category_number)
 
@@ -22,6 +29,7 @@ class CategoryQueryController(BaseCategoryController):
         search: Optional[str] = None,
         sort_by: Literal["category_number", "category_name"] = "category_number",
         sort_order: Literal["asc", "desc"] = "asc",
+        category_numbers: Optional[list[int]] = None,
     ) -> tuple[list[Category], int]:
         categories = self.repo.get_all(
             skip=skip,
@@ -29,19 +37,30 @@ class CategoryQueryController(BaseCategoryController):
             search=search,
             sort_by=sort_by,
             sort_order=sort_order,
+            category_numbers=category_numbers,
+        )
+        total = self.repo.get_total_count(
+            search=search, category_numbers=category_numbers
         )
-        total = self.repo.get_total_count(search=search)
         return categories, total
 
     def get_category_revenue_report(
         self, date_from: Optional[date] = None, date_to: Optional[date] = None
     ) -> list[dict]:
         """Get revenue report for categories within a date range. If no dates provided, shows all time."""
-        return self.repo.get_category_revenue_report(date_from, date_to)
+        return coalesce(
+            self.single_flight,
+            ("category_revenue_report", date_from, date_to),
+            lambda: self.repo.get_category_revenue_report(date_from, date_to),
+        )
 
     def get_categories_with_all_products_sold(self) -> list[dict]:
         """Get categories where all products have been sold at least once."""
-        return self.repo.get_categories_with_all_products_sold()
+        return coalesce(
+            self.single_flight,
+            ("categories_with_all_products_sold",),
+            self.repo.get_categories_with_all_products_sold,
+        )
 
 
 class CategoryModificationController(BaseCategoryController):
@@ -1,16 +1,38 @@
 from abc import ABC
 from datetime import date
-from typing import Literal, Optional, TypedDict
+from typing import Any, Callable, Collection, Literal, Optional, TypedDict
+from uuid import UUID
 
-from pydantic import BaseModel
+import structlog
+from pydantic import BaseModel, ValidationError
 
 from ..dal.repositories.check import CheckRepository
 from ..dal.repositories.customer_card import CustomerCardRepository
+from ..dal.repositories.inventory_movement import InventoryMovementRepository
 from ..dal.repositories.sale import SaleRepository
+from ..dal.repositories.stock_reservation import StockReservationRepository
 from ..dal.repositories.store_product import StoreProductRepository
-from ..dal.schemas.check import Check, CreateCheck, RelationalCheck
-from ..dal.schemas.sale import Sale, SaleWithPrice
-from ..db.connection import transaction
+from ..dal.schemas.check import (
+    Check,
+    CheckBatchItemResult,
+    CheckBatchResult,
+    CheckExpand,
+    CheckFilters,
+    CheckNumberBlock,
+    CreateCheck,
+    ExpandedCheck,
+    RelationalCheck,
+    StockShortage,
+)
+from ..dal.schemas.customer_card import CustomerCard
+from ..dal.schemas.inventory_movement import CreateInventoryMovement
+from ..dal.schemas.sale import Sale
+from ..dal.schemas.store_product import StoreProduct
+from ..dal.unit_of_work import unit_of_work
+from ..db.connection import DatabaseError, IntegrityError
+from .single_flight import SingleFlight, coalesce
+
+logger = structlog.get_logger(__name__)
 
 
 class ChecksMetadata(BaseModel):
@@ -45,13 +67,27 @@ class CheckQueryController(BaseCheckController):
         "sort_order": "desc",
     }
 
-    def get_check(self, check_number: str) -> Check:
+    def __init__(
+        self,
+        repo: CheckRepository,
+        customer_card_repo: CustomerCardRepository,
+        store_product_repo: StoreProductRepository,
+        sale_repo: SaleRepository,
+        single_flight: Optional[SingleFlight] = None,
+    ):
+        super().__init__(repo, customer_card_repo, store_product_repo, sale_repo)
+        self.single_flight = single_flight
+
+    def get_check(
+        self, check_number: str, expand: Collection[CheckExpand] = ()
+    ) -> Check | ExpandedCheck:
         relational_check = self.repo.get_by_check_number(check_number)
         if not relational_check:
             raise ValueError(f"Check with number {check_number} not found")
 
-        sales = self.sale_repo.get_by_check(check_number)
-        return Check(**relational_check.model_dump(), sales=sales)
+        sales = self.sale_repo.get_by_check(check_number, expand)
+        check_model = ExpandedCheck if expand else Check
+        return check_model(**relational_check.model_dump(), sales=sales)
 
     def get_all(
         self,
@@ -64,30 +100,41 @@ class CheckQueryController(BaseCheckController):
         product_upc: Optional[str] = None,
         sort_by: Optional[Literal["check_number", "print_date", "sum_total"]] = None,
         sort_order: Optional[Literal["asc", "desc"]] = None,
-    ) -> tuple[list[Check], ChecksMetadata]:
-        relational_checks = self.repo.get_all(
-            skip=skip,
-            limit=limit,
+        expand: Collection[CheckExpand] = (),
+    ) -> tuple[list[Check | ExpandedCheck], ChecksMetadata]:
+        filters = CheckFilters(
             date_from=date_from,
             date_to=date_to,
             employee_id=employee_id,
             product_upc=product_upc,
+        )
+        relational_checks = self.repo.get_all(
+            skip=skip,
+            limit=limit,
             sort_by=sort_by or self.DEFAULT_ORDERING["sort_by"],
             sort_order=sort_order or self.DEFAULT_ORDERING["sort_order"],
+            **filters.model_dump(),
         )
 
-        metadata_stats = self.repo.get_metadata_stats(
-            date_from=date_from,
-            date_to=date_to,
-            employee_id=employee_id,
-            product_upc=product_upc,
+        # * Pages of the same filters share these totals
+        metadata_stats = coalesce(
+            self.single_flight,
+            ("checks_metadata_stats", *filters.model_dump().values()),
+            lambda: self.repo.get_metadata_stats(**filters.model_dump()),
         )
 
-        checks = []
-        for relational_check in relational_checks:
-            sales = self.sale_repo.get_by_check(relational_check.check_number)
-            check = Check(**relational_check.model_dump(), sales=sales)
-            checks.append(check)
+        sales = self.sale_repo.get_by_checks(
+            [relational_check.check_number for relational_check in relational_checks],
+            expand,
+        )
+        check_model = ExpandedCheck if expand else Check
+        checks: list[Check | ExpandedCheck] = [
+            check_model(
+                **relational_check.model_dump(),
+                sales=sales.get(relational_check.check_number, []),
+            )
+            for relational_check in relational_checks
+        ]
 
         metadata = ChecksMetadata(
             total_sum=metadata_stats["total_sum"],
@@ -100,120 +147,459 @@ class CheckQueryController(BaseCheckController):
         return checks, metadata
 
 
-class CheckModificationController(BaseCheckController):
-    def create(self, data: CreateCheck, employee_id: str) -> Check:
-        sales_with_prices, final_total, vat = self._prepare_sales_and_calculate_totals(
-            data
+class InsufficientStockError(ValueError):
+    def __init__(self, shortages: list[StockShortage]):
+        self.shortages = shortages
+        super().__init__(
+            "Insufficient stock for UPC "
+            + ", ".join(shortage.UPC for shortage in shortages)
         )
 
-        relational_check = RelationalCheck(
-            check_number=data.check_number,
-            id_employee=employee_id,
-            card_number=data.card_number,
-            print_date=data.print_date,
-            sum_total=float(final_total),
-            vat=float(vat),
-        )
 
-        with transaction(self.repo._db):
-            created_relational_check = self.repo.create(relational_check)
-
-            sales = []
-            for sale_with_price in sales_with_prices:
-                sales.append(
-                    Sale(
-                        UPC=sale_with_price.UPC,
-                        product_number=sale_with_price.product_number,
-                        selling_price=sale_with_price.selling_price,
-                        check_number=created_relational_check.check_number,
-                    )
-                )
+class CheckNumberTakenError(ValueError):
+    def __init__(self, check_number: Optional[str]):
+        self.check_number = check_number
+        super().__init__(f"Check {check_number} already exists")
 
-            created_sales = self.sale_repo.create_multiple(sales)
 
-            # reduce inventory for each product
-            for sale_with_price in sales_with_prices:
-                self.store_product_repo.reduce_inventory(
-                    sale_with_price.UPC, sale_with_price.product_number
-                )
-
-        return Check(**created_relational_check.model_dump(), sales=created_sales)
-
-    def _prepare_sales_and_calculate_totals(
-        self, data: CreateCheck
-    ) -> tuple[list[SaleWithPrice], float, float]:
-        self._validate_sales_data(data.sales)
-
-        sales_with_prices = self._create_sales_with_prices(data.sales)
-
-        base_total = self._calculate_base_total(sales_with_prices)
-        final_total = self._apply_customer_discount(base_total, data.card_number)
-        vat = self._calculate_vat(final_total)
-
-        return sales_with_prices, final_total, vat
+class CheckModificationController(BaseCheckController):
+    VAT_RATE = 0.2
+    CHECK_PRIMARY_KEY = "check_pkey"
 
-    def _validate_sales_data(self, sales_data) -> None:
-        for sale_data in sales_data:
-            store_product = self.store_product_repo.get_by_upc(sale_data.UPC)
-            if not store_product:
-                raise ValueError(f"Product with UPC {sale_data.UPC} not found")
+    def __init__(
+        self,
+        repo: CheckRepository,
+        customer_card_repo: CustomerCardRepository,
+        store_product_repo: StoreProductRepository,
+        sale_repo: SaleRepository,
+        inventory_movement_repo: InventoryMovementRepository,
+        stock_reservation_repo: StockReservationRepository,
+        *,
+        batch_chunk_size: int = 100,
+    ):
+        super().__init__(repo, customer_card_repo, store_product_repo, sale_repo)
+        self.inventory_movement_repo = inventory_movement_repo
+        self.stock_reservation_repo = stock_reservation_repo
+        self.batch_chunk_size = batch_chunk_size
 
-            if store_product.products_number < sale_data.product_number:
-                raise ValueError(
-                    f"Insufficient stock for UPC {sale_data.UPC}. "
-                    f"Available: {store_product.products_number}, "
-                    f"Requested: {sale_data.product_number}"
+    def create(
+        self,
+        data: CreateCheck,
+        employee_id: str,
+        on_created: Optional[Callable[[Check], None]] = None,
+    ) -> Check:
+        """
+        `on_created` runs in the checkout's transaction, so what it writes is
+        committed together with the check or not at all.
+
+        Raises:
+            CheckNumberTakenError: a check with the given number exists.
+            ValueError: an unknown UPC or card.
+            InsufficientStockError: fewer units are available than requested.
+        """
+        try:
+            with unit_of_work(self.repo._db):
+                self.store_product_repo.lock_stock(
+                    sorted({sale.UPC for sale in data.sales})
                 )
-
-    def _create_sales_with_prices(self, sales_data) -> list[SaleWithPrice]:
-        sales_with_prices = []
-
-        for sale_data in sales_data:
-            store_product = self.store_product_repo.get_by_upc(sale_data.UPC)
-            if not store_product:
-                raise ValueError(f"Product with UPC {sale_data.UPC} not found")
-
-            sale_with_price = SaleWithPrice(
-                UPC=sale_data.UPC,
-                product_number=sale_data.product_number,
-                selling_price=store_product.selling_price,
+                result = self.repo.checkout(data, employee_id, self.VAT_RATE)
+                if result.check is not None and on_created is not None:
+                    on_created(result.check)
+        except IntegrityError as e:
+            if e.is_unique_violation(self.CHECK_PRIMARY_KEY):
+                raise CheckNumberTakenError(data.check_number) from e
+            raise
+        if result.missing_upcs:
+            raise ValueError(
+                f"Product with UPC {', '.join(result.missing_upcs)} not found"
+            )
+        if not result.card_found:
+            raise ValueError(f"Customer card {data.card_number} not found")
+        if result.shortages:
+            raise InsufficientStockError(result.shortages)
+
+        if result.check is None:
+            raise RuntimeError(
+                "Checkout created no check without naming a missing UPC, card "
+                "or shortage"
             )
-            sales_with_prices.append(sale_with_price)
+        return result.check
+
+    def reserve_check_numbers(self, count: int) -> CheckNumberBlock:
+        return CheckNumberBlock(check_numbers=self.repo.reserve_check_numbers(count))
+
+    def create_batch(self, items: list[Any], employee_id: str) -> CheckBatchResult:
+        """
+        Creates checks replayed by a till, committing them in chunks. Checks
+        without a number are numbered from one reserved block.
+
+        A check that is invalid, references an unknown UPC or card, repeats a
+        check number or lacks stock is rejected on its own; the rest of the batch
+        is still created.
+        """
+        results: list[CheckBatchItemResult] = []
+        checks: list[tuple[int, CreateCheck]] = []
+        for index, item in enumerate(items):
+            try:
+                checks.append((index, CreateCheck.model_validate(item)))
+            except ValidationError as e:
+                error = "; ".join(
+                    f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}"
+                    for detail in e.errors()
+                )
+                results.append(
+                    CheckBatchItemResult(index=index, status="rejected", error=error)
+                )
 
-        return sales_with_prices
+        unnumbered = [
+            position
+            for position, (_, data) in enumerate(checks)
+            if data.check_number is None
+        ]
+        if unnumbered:
+            check_numbers = self.repo.reserve_check_numbers(len(unnumbered))
+            for position, check_number in zip(unnumbered, check_numbers):
+                index, data = checks[position]
+                checks[position] = (
+                    index,
+                    data.model_copy(update={"check_number": check_number}),
+                )
 
-    def _calculate_base_total(self, sales_with_prices: list[SaleWithPrice]) -> float:
-        total_sum = 0.0
+        seen_check_numbers: set[str] = set()
+        for start in range(0, len(checks), self.batch_chunk_size):
+            chunk = [
+                (index, data, employee_id)
+                for index, data in checks[start : start + self.batch_chunk_size]
+            ]
+            try:
+                chunk_results, _ = self._create_batch_chunk(chunk, seen_check_numbers)
+            except DatabaseError as e:
+                # * One failing statement rolls back the whole chunk, so retry each
+                # * check on its own to reject only the ones at fault
+                logger.warning(
+                    "check_batch.chunk_failed", size=len(chunk), error=str(e)
+                )
+                chunk_results = [
+                    result
+                    for entry in chunk
+                    for result in self._create_batch_entry(entry, seen_check_numbers)
+                ]
+            results.extend(chunk_results)
+
+        results.sort(key=lambda result: result.index)
+        created = sum(result.status == "created" for result in results)
+        return CheckBatchResult(
+            created=created, rejected=len(results) - created, results=results
+        )
 
-        for sale in sales_with_prices:
-            line_total = sale.selling_price * sale.product_number
-            total_sum += line_total
+    def create_group(
+        self, checkouts: list[tuple[CreateCheck, str]]
+    ) -> list[Check | Exception]:
+        """
+        Creates checks of several checkouts, given with the creating employee, in
+        one transaction.
+
+        Returns:
+            list: the created check, or the error `create()` would raise, for
+                every checkout in order.
+        """
+        unnumbered = [
+            position
+            for position, (data, _) in enumerate(checkouts)
+            if data.check_number is None
+        ]
+        check_numbers = iter(
+            self.repo.reserve_check_numbers(len(unnumbered)) if unnumbered else []
+        )
+        chunk = [
+            (
+                position,
+                data
+                if data.check_number is not None
+                else data.model_copy(update={"check_number": next(check_numbers)}),
+                employee_id,
+            )
+            for position, (data, employee_id) in enumerate(checkouts)
+        ]
+
+        try:
+            _, outcomes = self._create_batch_chunk(chunk, set())
+        except DatabaseError as e:
+            # * One failing statement rolls back the whole group, so retry each
+            # * checkout on its own to fail only the ones at fault
+            logger.warning("check_group.failed", size=len(chunk), error=str(e))
+            return [
+                self._create_or_error(data, employee_id)
+                for data, employee_id in checkouts
+            ]
+
+        return [outcomes[position] for position in range(len(chunk))]
+
+    def _create_batch_entry(
+        self, entry: tuple[int, CreateCheck, str], seen_check_numbers: set[str]
+    ) -> list[CheckBatchItemResult]:
+        try:
+            results, _ = self._create_batch_chunk([entry], seen_check_numbers)
+        except DatabaseError as e:
+            index, data, _ = entry
+            return [
+                CheckBatchItemResult(
+                    index=index,
+                    check_number=data.check_number,
+                    status="rejected",
+                    error=str(e),
+                )
+            ]
+        return results
+
+    def _create_or_error(
+        self, data: CreateCheck, employee_id: str
+    ) -> Check | Exception:
+        try:
+            return self.create(data, employee_id)
+        except (ValueError, DatabaseError) as e:
+            return e
+
+    def _create_batch_chunk(
+        self,
+        chunk: list[tuple[int, CreateCheck, str]],
+        seen_check_numbers: set[str],
+    ) -> tuple[list[CheckBatchItemResult], dict[int, Check | ValueError]]:
+        """
+        Creates the checks of `(index, check, employee_id)` entries in one unit of
+        work, rejecting those that cannot be created.
+
+        Returns:
+            tuple: the result of every entry, and by index the created check or
+                the error `create()` would raise for it.
+        """
+        upcs = sorted({sale.UPC for _, data, _ in chunk for sale in data.sales})
+        card_numbers = list(
+            {data.card_number for _, data, _ in chunk if data.card_number is not None}
+        )
+        check_numbers = [data.check_number for _, data, _ in chunk]
+        carts = [
+            (data.cart_id, employee_id)
+            for _, data, employee_id in chunk
+            if data.cart_id is not None
+        ]
+
+        results: list[CheckBatchItemResult] = []
+        outcomes: dict[int, Check | ValueError] = {}
+        chunk_check_numbers: set[str] = set()
+        try:
+            with unit_of_work(self.repo._db):
+                store_products = self.store_product_repo.lock_many_by_upc(upcs)
+                cards = self.customer_card_repo.get_many_by_card_number(card_numbers)
+                existing_checks = self.repo.get_many_by_check_number(check_numbers)
+
+                # * Units held by carts are only available to the checkout of the
+                # * holding cart
+                reserved = self.stock_reservation_repo.get_reserved(upcs)
+                remaining = {
+                    upc: store_product.products_number - reserved.get(upc, 0)
+                    for upc, store_product in store_products.items()
+                }
+                # * A cart's holds count only for checks of the employee who
+                # * placed them
+                holds: dict[tuple[UUID, str], dict[str, int]] = {}
+                for hold in self.stock_reservation_repo.get_by_carts(
+                    [cart_id for cart_id, _ in carts]
+                ):
+                    holds.setdefault((hold.cart_id, hold.id_employee), {})[hold.UPC] = (
+                        hold.quantity
+                    )
+                new_checks: list[RelationalCheck] = []
+                new_sales: list[Sale] = []
+                movements: list[CreateInventoryMovement] = []
+
+                for index, data, employee_id in chunk:
+                    quantities: dict[str, int] = {}
+                    for sale in data.sales:
+                        quantities[sale.UPC] = (
+                            quantities.get(sale.UPC, 0) + sale.product_number
+                        )
+
+                    held = (
+                        holds.pop((data.cart_id, employee_id), {})
+                        if data.cart_id
+                        else {}
+                    )
+                    available = {
+                        upc: units + held.get(upc, 0)
+                        for upc, units in remaining.items()
+                    }
+                    error = self._reject_batch_check(
+                        data,
+                        quantities,
+                        available,
+                        cards,
+                        existing_checks.keys() | seen_check_numbers,
+                    )
+                    if error is not None:
+                        outcomes[index] = error
+                        result = CheckBatchItemResult(
+                            index=index,
+                            check_number=data.check_number,
+                            status="rejected",
+                            error=str(error),
+                            shortages=(
+                                error.shortages
+                                if isinstance(error, InsufficientStockError)
+                                else []
+                            ),
+                        )
+                    else:
+                        result = CheckBatchItemResult(
+                            index=index,
+                            check_number=data.check_number,
+                            status="created",
+                        )
+                        new_check = self._price_check(
+                            data, employee_id, quantities, store_products, cards
+                        )
+                        check_sales = [
+                            Sale(
+                                UPC=upc,
+                                product_number=quantity,
+                                selling_price=store_products[upc].selling_price,
+                                check_number=data.check_number,
+                            )
+                            for upc, quantity in quantities.items()
+                        ]
+                        # * The rest of the cart's holds is released with it
+                        for upc, units in held.items():
+                            if upc in remaining:
+                                remaining[upc] += units
+                        for upc, quantity in quantities.items():
+                            remaining[upc] -= quantity
+                            movements.append(
+                                CreateInventoryMovement(
+                                    UPC=upc,
+                                    kind="sale",
+                                    quantity=-quantity,
+                                    check_number=data.check_number,
+                                )
+                            )
+                        new_checks.append(new_check)
+                        new_sales.extend(check_sales)
+                        outcomes[index] = Check(
+                            **new_check.model_dump(), sales=check_sales
+                        )
+                        chunk_check_numbers.add(data.check_number)
+                        seen_check_numbers.add(data.check_number)
+                    results.append(result)
+
+                self.repo.create_multiple(new_checks)
+                self.sale_repo.create_multiple(new_sales)
+                self.inventory_movement_repo.create_multiple(movements)
+                self.stock_reservation_repo.release_many(
+                    {
+                        (data.cart_id, employee_id)
+                        for index, data, employee_id in chunk
+                        if isinstance(outcomes[index], Check)
+                        and data.cart_id is not None
+                    }
+                )
+        except DatabaseError:
+            seen_check_numbers -= chunk_check_numbers
+            raise
 
-        return total_sum
+        return results, outcomes
 
-    def _apply_customer_discount(
-        self, base_total: float, card_number: Optional[str]
-    ) -> float:
-        if not card_number:
-            return base_total
+    def _reject_batch_check(
+        self,
+        data: CreateCheck,
+        quantities: dict[str, int],
+        remaining: dict[str, int],
+        cards: dict[str, CustomerCard],
+        taken_check_numbers: Collection[str],
+    ) -> Optional[ValueError]:
+        """The error `create()` would raise for the check, if any."""
+        if data.check_number in taken_check_numbers:
+            return CheckNumberTakenError(data.check_number)
+
+        missing_upcs = [upc for upc in quantities if upc not in remaining]
+        if missing_upcs:
+            return ValueError(f"Product with UPC {', '.join(missing_upcs)} not found")
+
+        if data.card_number is not None and data.card_number not in cards:
+            return ValueError(f"Customer card {data.card_number} not found")
+
+        shortages = [
+            StockShortage(UPC=upc, requested=quantity, available=remaining[upc])
+            for upc, quantity in quantities.items()
+            if remaining[upc] < quantity
+        ]
+        if shortages:
+            return InsufficientStockError(shortages)
+
+        return None
+
+    def _price_check(
+        self,
+        data: CreateCheck,
+        employee_id: str,
+        quantities: dict[str, int],
+        store_products: dict[str, StoreProduct],
+        cards: dict[str, CustomerCard],
+    ) -> RelationalCheck:
+        sum_total = sum(
+            store_products[upc].selling_price * quantity
+            for upc, quantity in quantities.items()
+        )
+        if data.card_number is not None:
+            sum_total *= 1 - cards[data.card_number].percent / 100
 
-        customer_card = self.customer_card_repo.get(card_number)
-        if not customer_card:
-            raise ValueError(f"Customer card {card_number} not found")
+        return RelationalCheck(
+            check_number=data.check_number,
+            id_employee=employee_id,
+            card_number=data.card_number,
+            print_date=data.print_date,
+            sum_total=sum_total,
+            vat=sum_total * self.VAT_RATE,
+        )
 
-        discount_multiplier = 1 - (customer_card.percent / 100)
-        return base_total * discount_multiplier
 
-    def _calculate_vat(self, total: float) -> float:
-        return total * 0.2
+class CheckCleanupController(BaseCheckController):
+    def count_checks(
+        self, date_from: Optional[date] = None, date_to: Optional[date] = None
+    ) -> int:
+        return self.repo.count_in_period(date_from, date_to)
 
+    def truncate_checks(self) -> None:
+        self.repo.truncate()
 
-class CheckCleanupController(BaseCheckController):
-    def delete_all_checks(self) -> None:
-        all_checks = self.repo.get_all(limit=None)
+    def delete_checks(
+        self,
+        *,
+        batch_size: int,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Deletes checks in check number order, `batch_size` at a time, each batch
+        committed on its own, so memory use and transaction size stay constant.
+
+        Returns:
+            int: the number of deleted checks.
+        """
+        deleted_total = 0
+        last_check_number = None
+        while True:
+            deleted, last_check_number = self.repo.delete_batch(
+                batch_size,
+                after=last_check_number,
+                date_from=date_from,
+                date_to=date_to,
+            )
+            if not deleted:
+                break
 
-        if not all_checks:
-            return None
+            deleted_total += deleted
+            if on_progress is not None:
+                on_progress(deleted)
 
-        check_numbers = [check.check_number for check in all_checks]
-        self.repo.delete_multiple(check_numbers)
+        self.repo.analyze()
+        return deleted_total
@@ -1,6 +1,6 @@
 from abc import ABC
 from datetime import date
-from typing import Any, Literal, TypedDict
+from typing import Any, Collection, Literal, Optional, TypedDict
 
 from ..dal.repositories.customer_card import CustomerCardRepository
 from ..dal.schemas.customer_card import (
@@ -8,6 +8,7 @@ from ..dal.schemas.customer_card import (
     CustomerCardCreate,
     CustomerCardUpdate,
 )
+from .single_flight import SingleFlight, coalesce
 
 
 class BaseCustomerCardController(ABC):
@@ -25,13 +26,27 @@ class CustomerCardQueryController(BaseCustomerCardController):
         "sort_order": "desc",
     }
 
+    def __init__(
+        self,
+        repo: CustomerCardRepository,
+        single_flight: Optional[SingleFlight] = None,
+    ):
+        super().__init__(repo)
+        self.single_flight = single_flight
+
     def get_customer_card(self, card_number: str) -> CustomerCard:
         return self.repo.get(card_number)
 
     def get_all(
-        self, *, limit: int | None = None, offset: int | None = None
+        self,
+        *,
+        limit: int | None = None,
+        offset: int | None = None,
+        fields: Collection[str] | None = None,
     ) -> tuple[list[CustomerCard], int]:
-        cards = self.repo.search(limit=limit, offset=offset, **self.DEFAULT_ORDERING)
+        cards = self.repo.search(
+            limit=limit, offset=offset, fields=fields, **self.DEFAULT_ORDERING
+        )
         total = self.repo.get_total_count()
         return cards, total
 
@@ -44,6 +59,7 @@ class CustomerCardQueryController(BaseCustomerCardController):
         sort_order: Literal["asc", "desc"] | None = None,
         limit: int | None = None,
         offset: int | None = None,
+        fields: Collection[str] | None = None,
     ) -> tuple[list[CustomerCard], int]:
         search_params = CustomerCardUpdate()
         if cust_surname:
@@ -57,6 +73,7 @@ class CustomerCardQueryController(BaseCustomerCardController):
             sort_order=sort_order or self.DEFAULT_ORDERING["sort_order"],
             limit=limit,
             offset=offset,
+            fields=fields,
         )
         total = self.repo.get_total_count(search_params)
         return cards, total
@@ -69,11 +86,15 @@ class CustomerCardQueryController(BaseCustomerCardController):
         start_date: date | None = None,
         end_date: date | None = None,
     ) -> list[dict[str, Any]]:
-        return self.repo.get_card_sold_categories(
-            card_number=card_number,
-            category_name=category_name,
-            start_date=start_date,
-            end_date=end_date,
+        return coalesce(
+            self.single_flight,
+            ("card_sold_categories", card_number, category_name, start_date, end_date),
+            lambda: self.repo.get_card_sold_categories(
+                card_number=card_number,
+                category_name=category_name,
+                start_date=start_date,
+                end_date=end_date,
+            ),
         )
 
 
@@ -1,4 +1,5 @@
 from datetime import date
+from typing import Optional
 
 from ..dal.repositories.employee import EmployeeRepository
 from ..dal.schemas.employee import (
@@ -8,21 +9,33 @@ from ..dal.schemas.employee import (
     UpdateEmployee,
 )
 from .roles.employee import UserEmployeePermissionController
+from .single_flight import SingleFlight, coalesce
 
 
 class EmployeeQueryController:
-    def __init__(self, repo: EmployeeRepository):
+    def __init__(
+        self, repo: EmployeeRepository, single_flight: Optional[SingleFlight] = None
+    ):
         self.repo = repo
+        self.single_flight = single_flight
 
     def only_with_promotional_sales(self) -> list[Employee]:
-        return self.repo.get_employees_only_with_promotional_sales()
+        return coalesce(
+            self.single_flight,
+            ("employees_only_with_promotional_sales",),
+            self.repo.get_employees_only_with_promotional_sales,
+        )
 
     def get_employee_self_info(self, id_employee: str) -> EmployeeSelfInfo:
         employee = self.repo.get_by_id(id_employee)
         if not employee:
             raise ValueError(f"Employee with id '{id_employee}' not found")
 
-        statistics = self.repo.get_employee_statistics(id_employee)
+        statistics = coalesce(
+            self.single_flight,
+            ("employee_statistics", id_employee),
+            lambda: self.repo.get_employee_statistics(id_employee),
+        )
 
         today = date.today()
         age = today.year - employee.date_of_birth.year
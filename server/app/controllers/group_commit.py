@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Optional
+
+import structlog
+
+from ..dal.schemas.check import Check, CreateCheck
+from ..dal.unit_of_work import UnitOfWork
+from ..db.connection._base import IDatabase
+from .check import CheckModificationController
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class _PendingCheckout:
+    data: CreateCheck
+    employee_id: str
+    future: "Future[Check]"
+
+
+class CheckGroupCommitter:
+    """
+    Group commit stage in front of `CheckModificationController.create`.
+
+    Checkouts submitted from any thread are queued and a single worker, holding
+    its own database connection, takes up to `max_batch_size` of those that
+    arrive within `max_delay` of the first one and creates them in one
+    transaction. Every caller gets a future with its own check or error.
+    """
+
+    def __init__(
+        self,
+        db_factory: Callable[[], IDatabase],
+        controller_factory: Callable[[IDatabase], CheckModificationController],
+        *,
+        max_batch_size: int = 50,
+        max_delay: timedelta = timedelta(milliseconds=5),
+    ):
+        self._db_factory = db_factory
+        self._controller_factory = controller_factory
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay.total_seconds()
+
+        self._queue: "queue.Queue[Optional[_PendingCheckout]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, data: CreateCheck, employee_id: str) -> "Future[Check]":
+        future: "Future[Check]" = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Check group committer is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="check-group-commit", daemon=True
+                )
+                self._worker.start()
+            self._queue.put(_PendingCheckout(data, employee_id, future))
+        return future
+
+    def close(self) -> None:
+        """Commits checkouts already queued and stops the worker."""
+        with self._lock:
+            self._closed = True
+            worker = self._worker
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
+
+    def _run(self) -> None:
+        try:
+            with self._db_factory() as db:
+                controller = self._controller_factory(db)
+                stopping = False
+                while not stopping:
+                    batch, stopping = self._collect()
+                    if not batch:
+                        continue
+                    if not db.is_connected():
+                        db.connect()
+                    try:
+                        self._commit(controller, batch)
+                    finally:
+                        # * The connection outlives the group; rows mapped for
+                        # * it must not answer the next one, nor pile up
+                        UnitOfWork.for_database(db).clear()
+        except Exception as e:
+            # * Fail whatever is still queued, the next submit starts a new worker
+            logger.error("check_group.worker_failed", error=str(e))
+            with self._lock:
+                self._worker = None
+                while not self._queue.empty():
+                    pending = self._queue.get_nowait()
+                    if (
+                        pending is not None
+                        and pending.future.set_running_or_notify_cancel()
+                    ):
+                        pending.future.set_exception(e)
+
+    def _collect(self) -> tuple[list[_PendingCheckout], bool]:
+        """
+        Waits for a checkout, then gathers more until the batch is full or the
+        delay runs out.
+
+        Returns:
+            tuple: the batch and whether the committer was closed meanwhile.
+        """
+        first = self._queue.get()
+        if first is None:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if pending is None:
+                return batch, True
+            batch.append(pending)
+        return batch, False
+
+    def _commit(
+        self, controller: CheckModificationController, batch: list[_PendingCheckout]
+    ) -> None:
+        batch = [
+            pending
+            for pending in batch
+            if pending.future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+
+        logger.debug("check_group.commit", size=len(batch))
+        try:
+            outcomes = controller.create_group(
+                [(pending.data, pending.employee_id) for pending in batch]
+            )
+        except Exception as e:
+            logger.error("check_group.commit_failed", size=len(batch), error=str(e))
+            for pending in batch:
+                pending.future.set_exception(e)
+            return
+
+        for pending, outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                pending.future.set_exception(outcome)
+            else:
+                pending.future.set_result(outcome)
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+from ..dal.repositories.idempotency import IdempotencyKeyRepository
+from ..dal.schemas.idempotency import IdempotencyRecord
+
+
+class IdempotencyKeyError(Exception):
+    pass
+
+
+class IdempotencyKeyInUseError(IdempotencyKeyError):
+    pass
+
+
+class IdempotencyKeyMismatchError(IdempotencyKeyError):
+    pass
+
+
+class IdempotencyController:
+    """
+    Remembers the response to a request sent with an `Idempotency-Key`, so a
+    client retry within `ttl` gets the same response without the request being
+    run again.
+
+    A claim that is not completed within `lease`, because its process died or
+    lost its connection, is taken over by the next request with the key.
+    """
+
+    def __init__(
+        self,
+        repo: IdempotencyKeyRepository,
+        ttl: timedelta,
+        lease: timedelta = timedelta(seconds=60),
+    ):
+        self.repo = repo
+        self.ttl = ttl
+        self.lease = lease
+
+    def begin(self, user_id: int, key: str, request_hash: str) -> IdempotencyRecord:
+        """
+        Claims `key` for a request, or returns the stored record when the request
+        is a replay of a completed one.
+
+        Returns:
+            IdempotencyRecord: the record to replay, or the new claim, which has
+                no `status_code` yet.
+
+        Raises:
+            IdempotencyKeyMismatchError: the key was used for a different request.
+            IdempotencyKeyInUseError: the original request is still running.
+        """
+        now = datetime.now()
+        expired_before = now - self.ttl
+
+        record = self.repo.get(user_id, key, created_after=expired_before)
+        if record is None or (
+            record.status_code is None and record.created_at <= now - self.lease
+        ):
+            claim = IdempotencyRecord(
+                user_id=user_id, key=key, request_hash=request_hash, created_at=now
+            )
+            if self.repo.claim(
+                claim, expired_before=expired_before, abandoned_before=now - self.lease
+            ):
+                return claim
+            # * Claimed concurrently by another request with the same key
+            record = self.repo.get(user_id, key, created_after=expired_before)
+
+        if record is not None and record.request_hash != request_hash:
+            raise IdempotencyKeyMismatchError(
+                f"Idempotency key {key} was already used for a different request"
+            )
+        if record is None or record.status_code is None:
+            raise IdempotencyKeyInUseError(
+                f"A request with idempotency key {key} is still being processed"
+            )
+        return record
+
+    def complete(
+        self, claim: IdempotencyRecord, status_code: int, response: Any
+    ) -> None:
+        """
+        Raises:
+            IdempotencyKeyInUseError: the claim outlived its lease and another
+                request took the key over.
+        """
+        if not self.repo.complete(claim, status_code, response):
+            raise IdempotencyKeyInUseError(
+                f"Idempotency key {claim.key} was taken over by another request"
+            )
+
+    def release(self, claim: IdempotencyRecord) -> None:
+        """Forgets a claimed key after its request failed, so it can be retried."""
+        self.repo.delete(claim)
+
+    def purge(self) -> int:
+        """Deletes the records of expired keys, returning how many."""
+        return self.repo.purge(expired_before=datetime.now() - self.ttl)
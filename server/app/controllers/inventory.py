@@ -0,0 +1,170 @@
+from typing import Optional
+
+import structlog
+
+from ..dal.repositories.inventory_movement import InventoryMovementRepository
+from ..dal.repositories.stock_reservation import StockReservationRepository
+from ..dal.repositories.store_product import StoreProductRepository
+from ..dal.schemas.inventory_movement import (
+    CreateInventoryMovement,
+    InventoryMovement,
+    InventoryMovementKind,
+    StockLevel,
+)
+from ..dal.unit_of_work import unit_of_work
+
+logger = structlog.get_logger(__name__)
+
+
+class InventoryController:
+    """
+    Stock changes outside of checkouts. Every change is appended to the inventory
+    ledger under the lock of the affected store products.
+
+    Units under active holds of carts are promised to their checkouts, so no
+    change may take stock below them.
+    """
+
+    def __init__(
+        self,
+        store_product_repo: StoreProductRepository,
+        movement_repo: InventoryMovementRepository,
+        reservation_repo: StockReservationRepository,
+    ):
+        self.store_product_repo = store_product_repo
+        self.movement_repo = movement_repo
+        self.reservation_repo = reservation_repo
+
+    def get_stock(self, upc: str) -> StockLevel:
+        stock = self.movement_repo.get_stock(upc)
+        if stock is None:
+            raise ValueError(f"Store product with UPC {upc} not found")
+        return stock
+
+    def get_movements(
+        self,
+        upc: str,
+        *,
+        skip: int = 0,
+        limit: Optional[int] = 10,
+        kind: Optional[InventoryMovementKind] = None,
+    ) -> tuple[list[InventoryMovement], int]:
+        movements = self.movement_repo.get_by_upc(upc, skip, limit, kind)
+        total = self.movement_repo.get_total_count(upc, kind)
+        return movements, total
+
+    def record(
+        self, upc: str, kind: InventoryMovementKind, quantity: int
+    ) -> InventoryMovement:
+        """
+        Raises:
+            ValueError: the store product does not exist, a restock is not
+                positive, or the movement would take stock below the units held
+                by carts.
+        """
+        if kind == "restock" and quantity <= 0:
+            raise ValueError("Restocked quantity must be positive")
+        if quantity == 0:
+            raise ValueError("Quantity must not be zero")
+
+        with unit_of_work(self.store_product_repo._db):
+            store_product = self.store_product_repo.lock_many_by_upc([upc]).get(upc)
+            if store_product is None:
+                raise ValueError(f"Store product with UPC {upc} not found")
+            available = store_product.products_number - self._held(upc)
+            if available + quantity < 0:
+                raise ValueError(
+                    f"Cannot take {-quantity} units off. "
+                    f"Only {available} units available."
+                )
+
+            (movement,) = self.movement_repo.create_multiple(
+                [CreateInventoryMovement(UPC=upc, kind=kind, quantity=quantity)]
+            )
+        return movement
+
+    def set_stock(self, upc: str, products_number: int) -> Optional[InventoryMovement]:
+        """
+        Records an adjustment bringing the stock of a store product to
+        `products_number`; nothing when it is already there.
+
+        Raises:
+            ValueError: the store product does not exist, or carts hold more
+                than `products_number` units of it.
+        """
+        with unit_of_work(self.store_product_repo._db):
+            store_product = self.store_product_repo.lock_many_by_upc([upc]).get(upc)
+            if store_product is None:
+                raise ValueError(f"Store product with UPC {upc} not found")
+            if store_product.products_number == products_number:
+                return None
+            held = self._held(upc)
+            if products_number < held:
+                raise ValueError(
+                    f"Cannot set stock to {products_number}. "
+                    f"Open carts hold {held} units."
+                )
+
+            (movement,) = self.movement_repo.create_multiple(
+                [
+                    CreateInventoryMovement(
+                        UPC=upc,
+                        kind="adjustment",
+                        quantity=products_number - store_product.products_number,
+                    )
+                ]
+            )
+        return movement
+
+    def convert(self, source_upc: str, target_upc: str, units: int) -> None:
+        """
+        Moves units from one store product to another, e.g. a regular product to
+        its promotional version.
+        """
+        with unit_of_work(self.store_product_repo._db):
+            store_products = self.store_product_repo.lock_many_by_upc(
+                [source_upc, target_upc]
+            )
+            for upc in (source_upc, target_upc):
+                if upc not in store_products:
+                    raise ValueError(f"Store product with UPC {upc} not found")
+
+            available = store_products[source_upc].products_number - self._held(
+                source_upc
+            )
+            if units > available:
+                raise ValueError(
+                    f"Cannot convert {units} units. Only {available} units available."
+                )
+
+            self.movement_repo.create_multiple(
+                [
+                    CreateInventoryMovement(
+                        UPC=source_upc, kind="conversion", quantity=-units
+                    ),
+                    CreateInventoryMovement(
+                        UPC=target_upc, kind="conversion", quantity=units
+                    ),
+                ]
+            )
+
+    def _held(self, upc: str) -> int:
+        return self.reservation_repo.get_reserved([upc]).get(upc, 0)
+
+    def compact(self, chunk_size: int = 500) -> int:
+        """
+        Folds recorded movements into the stock snapshots, `chunk_size` store
+        products per transaction so that checkouts wait only briefly.
+
+        Returns:
+            int: the number of store products whose snapshot moved.
+        """
+        upcs = self.movement_repo.get_pending_upcs()
+        compacted = 0
+        for start in range(0, len(upcs), chunk_size):
+            chunk = upcs[start : start + chunk_size]
+            with unit_of_work(self.store_product_repo._db):
+                self.store_product_repo.lock_stock(chunk)
+                compacted += self.movement_repo.compact(chunk)
+            logger.debug("inventory.compacted", size=len(chunk))
+        return compacted
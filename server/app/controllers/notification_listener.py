@@ -0,0 +1,118 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Callable, Optional
+
+import structlog
+
+from ..db.connection._base import IDatabase
+
+logger = structlog.get_logger(__name__)
+
+
+class NotificationListener(ABC):
+    """
+    Worker thread that holds its own database connection and follows the
+    notifications on `CHANNEL`.
+
+    On every connection it listens first and then calls `_load`, so no change
+    slips in between; from then on it is ready, passes the payloads of each
+    wait to `_apply`, and calls `_check` every `check_interval`. A failure
+    drops the connection and the worker reconnects after `retry_delay`; until
+    it has loaded again it is not ready.
+    """
+
+    CHANNEL: str
+    THREAD_NAME: str
+
+    def __init__(
+        self,
+        db_factory: Callable[[], IDatabase],
+        *,
+        check_interval: Optional[timedelta] = None,
+        retry_delay: timedelta = timedelta(seconds=5),
+    ):
+        self._db_factory = db_factory
+        self.check_interval = check_interval.total_seconds() if check_interval else None
+        self.retry_delay = retry_delay.total_seconds()
+
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self, timeout: Optional[timedelta] = None) -> bool:
+        """
+        Starts the worker and waits up to `timeout` for the initial load, or
+        not at all without one.
+
+        Returns:
+            bool: whether the worker is ready.
+        """
+        if self._worker is None:
+            self._stopping.clear()
+            self._worker = threading.Thread(
+                target=self._run, name=self.THREAD_NAME, daemon=True
+            )
+            self._worker.start()
+        if timeout is None:
+            return self.is_ready
+        return self._ready.wait(timeout.total_seconds())
+
+    def close(self) -> None:
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self._ready.clear()
+
+    @abstractmethod
+    def _load(self, db: IDatabase) -> None:
+        """Catches up with the database after (re)connecting."""
+
+    @abstractmethod
+    def _apply(self, db: IDatabase, payloads: list[str]) -> None:
+        """Applies the payloads received in one wait, in order."""
+
+    def _check(self, db: IDatabase) -> None:
+        """Runs every `check_interval`, by default loading everything again."""
+        self._load(db)
+
+    def _disconnected(self) -> None:
+        """Runs after the connection is lost or closed."""
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                with self._db_factory() as db:
+                    db.listen(self.CHANNEL)
+                    self._load(db)
+                    self._ready.set()
+                    self._follow(db)
+            except Exception as e:
+                logger.error(
+                    "notification_listener.worker_failed",
+                    channel=self.CHANNEL,
+                    error=str(e),
+                )
+            self._ready.clear()
+            self._disconnected()
+            self._stopping.wait(self.retry_delay)
+
+    def _follow(self, db: IDatabase) -> None:
+        interval = self.check_interval or float("inf")
+        next_check = time.monotonic() + interval
+        while not self._stopping.is_set():
+            # * Wake up at least once a second to notice `close()`
+            timeout = min(max(next_check - time.monotonic(), 0), 1)
+            payloads = [payload for _, payload in db.wait_for_notifications(timeout)]
+            if payloads:
+                self._apply(db, payloads)
+
+            if time.monotonic() >= next_check:
+                self._check(db)
+                next_check = time.monotonic() + interval
@@ -1,14 +1,25 @@
+from datetime import timedelta
 from enum import Enum
-from typing import Generator, Type
+from typing import Generator, Optional, Type
 
 from pydantic import BaseModel
 
+from ...cache import RepositoryCache
 from ...dal.repositories.auth import (
     GroupPermissionRepository,
+    GroupRepository,
     PermissionRepository,
     UserGroupRepository,
+    UserRepository,
 )
-from ...dal.schemas.auth import Permission, PermissionCreate, PermissionUpdate, User
+from ...dal.schemas.auth import (
+    Permission,
+    PermissionCreate,
+    PermissionUpdate,
+    TokenUser,
+    User,
+)
+from ..auth.versions import AuthVersionTable
 
 
 class BasicPermission(Enum):
@@ -24,10 +35,19 @@ class UserPermissionController:
         permission_repo: PermissionRepository,
         user_group_repo: UserGroupRepository,
         group_permission_repo: GroupPermissionRepository,
+        user_repo: UserRepository,
+        *,
+        cache: Optional[RepositoryCache] = None,
+        codenames_ttl: timedelta = timedelta(minutes=5),
+        auth_versions: Optional[AuthVersionTable] = None,
     ):
         self.permission_repo = permission_repo
         self.user_group_repo = user_group_repo
         self.group_permission_repo = group_permission_repo
+        self.user_repo = user_repo
+        self.cache = cache
+        self.auth_versions = auth_versions
+        self.codenames_ttl = codenames_ttl.total_seconds()
         self._model_name_cache: dict[str, set[Permission]] = {}
 
     def _get_codename(self, model_name: str, perm_name: BasicPermission | str) -> str:
@@ -89,25 +109,47 @@ class UserPermissionController:
         self._model_name_cache[model_name] = basic_permissions
         return basic_permissions, True
 
+    def get_codenames(self, user: User) -> frozenset[str]:
+        """
+        Codenames of the permissions granted to the user's groups, resolved once
+        and cached until the user's auth version moves on, or for
+        `codenames_ttl`. Users authenticated by token claims bring their own.
+        """
+        if isinstance(user, TokenUser) and user.permissions is not None:
+            return user.permissions
+
+        if self.cache is None:
+            return self._load_codenames(user.id)
+
+        # * The database bumps the version on any change to the user's groups or
+        # * their permissions, including those of other processes and of SQL
+        version = self.auth_versions.get(user.id) if self.auth_versions else None
+        if version is None:
+            version = self.user_repo.get_auth_version(user.id)
+
+        return self.cache.get_or_load(
+            f"{type(self).__name__}.get_codenames",
+            (
+                UserGroupRepository.table_name,
+                GroupPermissionRepository.table_name,
+                GroupRepository.table_name,
+                PermissionRepository.table_name,
+            ),
+            (user.id, version),
+            lambda: self._load_codenames(user.id),
+            self.codenames_ttl,
+        )
+
+    def _load_codenames(self, user_id: int) -> frozenset[str]:
+        return frozenset(
+            perm.codename for perm in self.permission_repo.get_by_user(user_id)
+        )
+
     def has_permission(self, user: User, permission: Permission) -> bool:
         if self._has_all_permissions(user):
             return True
 
-        permissions, _ = self.create_basic_permissions(permission.model_name)
-        if permission not in permissions:
-            return False
-
-        user_groups = self.user_group_repo.get_user_groups(user.id)
-
-        for group in user_groups:
-            group_permissions = self.group_permission_repo.get_group_permissions(
-                group.group_id
-            )
-
-            if any(perm.permission_id == permission.id for perm in group_permissions):
-                return True
-
-        return False
+        return permission.codename in self.get_codenames(user)
 
     def has_model_permission(
         self, user: User, model: Type[BaseModel], name: str | BasicPermission
@@ -115,20 +157,7 @@ class UserPermissionController:
         if self._has_all_permissions(user):
             return True
 
-        name = self._get_codename(model.__name__, name)
-
-        perm = self.permission_repo.search(
-            PermissionUpdate(model_name=model.__name__, codename=name)
-        )
-        if not perm:
-            return False
-
-        if len(perm) > 1:
-            raise ValueError(
-                f"Multiple permissions found for {model.__name__} with codename {name}"
-            )
-
-        return self.has_permission(user, perm[0])
+        return self._get_codename(model.__name__, name) in self.get_codenames(user)
 
     def get_or_create_perm(
         self, model_name: str | Type[BaseModel], name: str | BasicPermission
@@ -153,11 +182,4 @@ class UserPermissionController:
             yield from self.permission_repo.get_all()
             return
 
-        user_groups = self.user_group_repo.get_user_groups(user.id)
-        for group in user_groups:
-            group_permissions = self.group_permission_repo.get_group_permissions(
-                group.group_id
-            )
-            for group_perm in group_permissions:
-                perm = self.permission_repo.get(group_perm.permission_id)
-                yield perm
+        yield from self.permission_repo.get_by_user(user.id)
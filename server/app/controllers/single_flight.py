@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_T = TypeVar("_T")
+
+
+class SingleFlightTimeoutError(Exception):
+    """The shared computation did not finish in time."""
+
+
+@dataclass
+class _Flight:
+    future: "Future[Any]" = field(default_factory=Future)
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Shares one computation among concurrent calls with the same key: the first
+    caller runs it on its own thread and connection, and callers arriving while
+    it runs wait for its result or error instead of running it again. Nothing
+    is kept once the computation ends.
+
+    At most `max_waiters` callers wait on a computation; any more run their own,
+    as they would without it. A waiter gives up after `timeout`.
+
+    Calls only overlap on separate threads, so the views using it are plain
+    `def` endpoints that FastAPI runs in its threadpool; as `async def` they
+    would run one at a time on the event loop, with nothing to share.
+    """
+
+    def __init__(
+        self, *, max_waiters: int = 100, timeout: timedelta = timedelta(seconds=30)
+    ):
+        self.max_waiters = max_waiters
+        self.timeout = timeout.total_seconds()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], _T]) -> _T:
+        """
+        Raises:
+            SingleFlightTimeoutError: waited for another caller's computation
+                longer than `timeout`.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leading = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+            elif flight.waiters < self.max_waiters:
+                flight.waiters += 1
+            else:
+                flight = None
+
+        if flight is None:
+            logger.debug("single_flight.overflow", key=key)
+            return fn()
+        if not leading:
+            return self._wait(key, flight)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._land(key)
+            flight.future.set_exception(e)
+            raise
+        self._land(key)
+        flight.future.set_result(result)
+        return result
+
+    def _wait(self, key: Hashable, flight: _Flight) -> Any:
+        try:
+            return flight.future.result(timeout=self.timeout)
+        except FutureTimeoutError as e:
+            raise SingleFlightTimeoutError(
+                f"Gave up waiting for {key!r} after {self.timeout}s"
+            ) from e
+
+    def _land(self, key: Hashable) -> None:
+        with self._lock:
+            del self._flights[key]
+
+
+def coalesce(
+    single_flight: Optional[SingleFlight], key: Hashable, fn: Callable[[], _T]
+) -> _T:
+    """Runs `fn` through `single_flight`, or directly without one."""
+    if single_flight is None:
+        return fn()
+    return single_flight.do(key, fn)
@@ -0,0 +1,66 @@
+from datetime import timedelta
+from uuid import UUID
+
+from ..dal.repositories.stock_reservation import StockReservationRepository
+from ..dal.repositories.store_product import StoreProductRepository
+from ..dal.schemas.check import StockShortage
+from ..dal.schemas.stock_reservation import StockReservation
+from ..dal.unit_of_work import unit_of_work
+from .check import InsufficientStockError
+
+
+class StockReservationController:
+    """
+    Holds on stock for the items scanned into an open cart, so that a shortage
+    shows up at the scan instead of at checkout. A cart's holds expire `ttl`
+    after its last scan and are consumed by a checkout that names the cart.
+
+    A cart belongs to the employee who placed its first hold; to anyone else it
+    does not exist.
+    """
+
+    def __init__(
+        self,
+        store_product_repo: StoreProductRepository,
+        repo: StockReservationRepository,
+        ttl: timedelta,
+    ):
+        self.store_product_repo = store_product_repo
+        self.repo = repo
+        self.ttl = ttl
+
+    def get_cart(self, cart_id: UUID, id_employee: str) -> list[StockReservation]:
+        return self.repo.get_by_cart(cart_id, id_employee)
+
+    def reserve(
+        self, cart_id: UUID, id_employee: str, upc: str, quantity: int
+    ) -> StockReservation:
+        """
+        Raises:
+            ValueError: the store product does not exist, or the cart belongs to
+                another employee.
+            InsufficientStockError: fewer than `quantity` units are available.
+        """
+        with unit_of_work(self.repo._db):
+            owner = self.repo.get_owner(cart_id)
+            if owner is not None and owner != id_employee:
+                raise ValueError(f"Cart {cart_id} not found")
+
+            self.store_product_repo.lock_stock([upc])
+            hold, available = self.repo.reserve(
+                cart_id, id_employee, upc, quantity, self.ttl
+            )
+            if available is None:
+                raise ValueError(f"Product with UPC {upc} not found")
+            if hold is None:
+                raise InsufficientStockError(
+                    [StockShortage(UPC=upc, requested=quantity, available=available)]
+                )
+            self.repo.refresh(cart_id, id_employee, self.ttl)
+        return hold
+
+    def release(self, cart_id: UUID, id_employee: str, upc: str) -> None:
+        self.repo.release(cart_id, id_employee, upc)
+
+    def release_cart(self, cart_id: UUID, id_employee: str) -> None:
+        self.repo.release(cart_id, id_employee)
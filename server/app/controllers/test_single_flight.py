@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+
+from .single_flight import SingleFlight, SingleFlightTimeoutError, coalesce
+
+KEY = "report"
+
+
+class _Computation:
+    """Blocks until released and counts how often it ran."""
+
+    def __init__(self, result="result"):
+        self.result = result
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _wait_for_waiters(single_flight: SingleFlight, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with single_flight._lock:
+            flight = single_flight._flights.get(KEY)
+            if flight is not None and flight.waiters == count:
+                return
+        time.sleep(0.001)
+    raise AssertionError(f"{count} waiters never joined")
+
+
+def test_concurrent_calls_share_one_computation():
+    single_flight = SingleFlight()
+    computation = _Computation()
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        leader = pool.submit(single_flight.do, KEY, computation)
+        assert computation.started.wait(5)
+        waiters = [pool.submit(single_flight.do, KEY, computation) for _ in range(4)]
+        _wait_for_waiters(single_flight, 4)
+        computation.release.set()
+
+        results = [future.result(5) for future in (leader, *waiters)]
+
+    assert results == ["result"] * 5
+    assert computation.calls == 1
+    assert not single_flight._flights
+
+
+def test_waiters_receive_the_error():
+    single_flight = SingleFlight()
+    computation = _Computation(ValueError("boom"))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(single_flight.do, KEY, computation)
+        assert computation.started.wait(5)
+        waiter = pool.submit(single_flight.do, KEY, computation)
+        _wait_for_waiters(single_flight, 1)
+        computation.release.set()
+
+        for future in (leader, waiter):
+            with pytest.raises(ValueError, match="boom"):
+                future.result(5)
+
+    assert computation.calls == 1
+    assert not single_flight._flights
+
+
+def test_nothing_is_kept_after_the_computation():
+    single_flight = SingleFlight()
+
+    assert single_flight.do(KEY, lambda: 1) == 1
+    assert single_flight.do(KEY, lambda: 2) == 2
+
+
+def test_callers_over_max_waiters_run_their_own():
+    single_flight = SingleFlight(max_waiters=1)
+    computation = _Computation()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(single_flight.do, KEY, computation)
+        assert computation.started.wait(5)
+        waiter = pool.submit(single_flight.do, KEY, computation)
+        _wait_for_waiters(single_flight, 1)
+
+        # * Does not wait for the blocked leader
+        assert single_flight.do(KEY, lambda: "own") == "own"
+
+        computation.release.set()
+        assert leader.result(5) == waiter.result(5) == "result"
+
+    assert computation.calls == 1
+
+
+def test_waiter_gives_up_after_timeout():
+    single_flight = SingleFlight(timeout=timedelta(milliseconds=50))
+    computation = _Computation()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(single_flight.do, KEY, computation)
+        assert computation.started.wait(5)
+
+        with pytest.raises(SingleFlightTimeoutError):
+            single_flight.do(KEY, computation)
+
+        computation.release.set()
+        assert leader.result(5) == "result"
+
+    assert computation.calls == 1
+    assert not single_flight._flights
+
+
+def test_coalesce_without_single_flight():
+    assert coalesce(None, KEY, lambda: "direct") == "direct"
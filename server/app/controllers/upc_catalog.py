@@ -0,0 +1,183 @@
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Callable, Optional
+
+import structlog
+
+from ..cache.shared_catalog import SharedCatalogReader, SharedCatalogWriter
+from ..dal.repositories.store_product import StoreProductRepository
+from ..dal.schemas.check import CreateCheck
+from ..dal.schemas.store_product import ScannedProduct
+from ..db.connection._base import IDatabase
+from .notification_listener import NotificationListener
+
+logger = structlog.get_logger(__name__)
+
+
+class BaseUpcCatalog(ABC):
+    """What a till shows for a scanned UPC: name, price, promotion and stock."""
+
+    @property
+    @abstractmethod
+    def is_ready(self) -> bool: ...
+
+    @abstractmethod
+    def get(self, upc: str) -> Optional[ScannedProduct]: ...
+
+    def doubts_checkout(self, data: CreateCheck) -> bool:
+        """
+        Whether a UPC of a checkout is missing from the table or short of units.
+        Only a hint: the table trails the database, so a doubted checkout may
+        still succeed and any other may still fail; the locked checkout decides
+        either way. Never doubts while the table is not ready.
+        """
+        if not self.is_ready:
+            return False
+
+        quantities: dict[str, int] = {}
+        for sale in data.sales:
+            quantities[sale.UPC] = quantities.get(sale.UPC, 0) + sale.product_number
+
+        for upc, quantity in quantities.items():
+            entry = self.get(upc)
+            if entry is None or entry.products_number < quantity:
+                return True
+        return False
+
+
+class UpcCatalog(NotificationListener, BaseUpcCatalog):
+    """
+    Process-local UPC catalog.
+
+    A worker thread, holding its own database connection, loads the whole table
+    on start and then reloads the entries named by the `upc_catalog`
+    notifications of the database triggers. Every `check_interval` it compares
+    the versions it was notified of with the last one handed out; a version
+    still missing at the next check means a notification was lost, or its
+    change rolled back, and the whole table is reloaded.
+
+    While the worker is disconnected the table is not ready and callers have to
+    read the database instead.
+
+    With a `snapshot` writer the table is also published to shared memory for
+    the `SharedUpcCatalog`s of other processes.
+    """
+
+    CHANNEL = "upc_catalog"
+    THREAD_NAME = "upc-catalog"
+
+    def __init__(
+        self,
+        db_factory: Callable[[], IDatabase],
+        repo_factory: Callable[[IDatabase], StoreProductRepository],
+        *,
+        check_interval: timedelta = timedelta(seconds=30),
+        retry_delay: timedelta = timedelta(seconds=5),
+        snapshot: Optional[SharedCatalogWriter] = None,
+    ):
+        super().__init__(
+            db_factory, check_interval=check_interval, retry_delay=retry_delay
+        )
+        self._repo_factory = repo_factory
+        self.snapshot = snapshot
+
+        self._entries: dict[str, ScannedProduct] = {}
+        # * Versions notified since the last check, and the last version handed
+        # * out as of the last two checks
+        self._seen: set[int] = set()
+        self._checked_version = self._last_version = 0
+
+    def get(self, upc: str) -> Optional[ScannedProduct]:
+        return self._entries.get(upc)
+
+    def close(self) -> None:
+        super().close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+
+    def _load(self, db: IDatabase) -> None:
+        version = self._reload(self._repo_factory(db))
+        self._seen = set()
+        self._checked_version = self._last_version = version
+
+    def _apply(self, db: IDatabase, payloads: list[str]) -> None:
+        upcs: set[str] = set()
+        product_ids: set[int] = set()
+        for payload in payloads:
+            notified_version, kind, key = payload.split(":", 2)
+            self._seen.add(int(notified_version))
+            if kind == "product":
+                product_ids.add(int(key))
+            else:
+                upcs.add(key)
+        self._refresh(self._repo_factory(db), upcs, product_ids)
+
+    def _check(self, db: IDatabase) -> None:
+        repo = self._repo_factory(db)
+        if any(
+            missed not in self._seen
+            for missed in range(self._checked_version + 1, self._last_version + 1)
+        ):
+            logger.warning(
+                "upc_catalog.missed_notifications",
+                since=self._checked_version,
+                until=self._last_version,
+            )
+            self._reload(repo)
+        self._checked_version = self._last_version
+        self._seen = {
+            notified for notified in self._seen if notified > self._checked_version
+        }
+        self._last_version = repo.get_catalog_version()
+
+    def _disconnected(self) -> None:
+        if self.snapshot is not None:
+            self.snapshot.retract()
+
+    def _reload(self, repo: StoreProductRepository) -> int:
+        """
+        Loads the whole table.
+
+        Returns:
+            int: the last version handed out before loading; the table reflects
+                every change up to it.
+        """
+        version = repo.get_catalog_version()
+        self._entries = {entry.UPC: entry for entry in repo.get_scanned()}
+        if self.snapshot is not None:
+            self.snapshot.publish(self._entries.values())
+        logger.info("upc_catalog.loaded", size=len(self._entries), version=version)
+        return version
+
+    def _refresh(
+        self, repo: StoreProductRepository, upcs: set[str], product_ids: set[int]
+    ) -> None:
+        entries = repo.get_scanned(sorted(upcs), sorted(product_ids))
+        removed = upcs - {entry.UPC for entry in entries}
+        for upc in removed:
+            self._entries.pop(upc, None)
+        for entry in entries:
+            self._entries[entry.UPC] = entry
+
+        if self.snapshot is not None:
+            updated = [self.snapshot.update(entry) for entry in entries]
+            if removed or not all(updated):
+                self.snapshot.publish(self._entries.values())
+        logger.debug("upc_catalog.refreshed", size=len(entries))
+
+
+class SharedUpcCatalog(BaseUpcCatalog):
+    """
+    UPC catalog read from the shared memory snapshot that the `UpcCatalog` of
+    another process publishes, so worker processes share one copy of it.
+    """
+
+    def __init__(self, reader: SharedCatalogReader):
+        self.reader = reader
+
+    @property
+    def is_ready(self) -> bool:
+        return self.reader.is_ready
+
+    def get(self, upc: str) -> Optional[ScannedProduct]:
+        return self.reader.get(upc)
@@ -0,0 +1,126 @@
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Collection, Optional, Sequence
+
+import structlog
+
+from ..dal.repositories.table_version import TableVersionRepository
+from ..db.connection._base import IDatabase
+from .notification_listener import NotificationListener
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class WarmupStep:
+    name: str
+    run: Callable[[IDatabase], int]
+    """Reads what the step warms, returning the number of rows read."""
+
+
+@dataclass(frozen=True)
+class WarmupResult:
+    step: str
+    rows: int
+    duration: float
+    error: Optional[str] = None
+
+    def describe(self) -> str:
+        duration_ms = round(self.duration * 1000)
+        if self.error is not None:
+            return f"{self.step}: failed after {duration_ms} ms ({self.error})"
+        return f"{self.step}: {self.rows} rows in {duration_ms} ms"
+
+
+class CacheWarmer(NotificationListener):
+    """
+    Runs the reads of the first requests after a restart ahead of them, so the
+    pages they touch are in the database's shared buffers and their results in
+    the application caches of this process. A failing step is logged and
+    skipped.
+
+    After `start()`, a worker thread holding its own database connection warms
+    again when asked on the `cache_warmup` channel, as the `warm-caches`
+    command does after bulk imports, and every `interval` when one of
+    `watched_tables` changed since the last warm-up.
+    """
+
+    CHANNEL = "cache_warmup"
+    THREAD_NAME = "cache-warmup"
+
+    def __init__(
+        self,
+        db_factory: Callable[[], IDatabase],
+        steps: Sequence[WarmupStep],
+        *,
+        watched_tables: Collection[str] = (),
+        interval: Optional[timedelta] = None,
+        retry_delay: timedelta = timedelta(seconds=5),
+    ):
+        super().__init__(db_factory, check_interval=interval, retry_delay=retry_delay)
+        self.steps = steps
+        self.watched_tables = watched_tables
+
+        self._versions: dict[str, int] = {}
+
+    def run(
+        self, progress: Optional[Callable[[WarmupResult], None]] = None
+    ) -> list[WarmupResult]:
+        """Runs every step once, passing each result to `progress` as it ends."""
+        with self._db_factory() as db:
+            return self._warm(db, progress)
+
+    def request(self) -> None:
+        """Asks the warmers started in every server process to warm again."""
+        with self._db_factory() as db:
+            db.execute(f"NOTIFY {self.CHANNEL}")
+
+    def _warm(
+        self,
+        db: IDatabase,
+        progress: Optional[Callable[[WarmupResult], None]] = None,
+    ) -> list[WarmupResult]:
+        if self.watched_tables:
+            self._versions = TableVersionRepository(db).get_versions(
+                self.watched_tables
+            )
+
+        results = []
+        for step in self.steps:
+            started = time.perf_counter()
+            try:
+                rows, error = step.run(db), None
+            except Exception as e:
+                rows, error = 0, str(e)
+                logger.warning("warmup.step_failed", step=step.name, error=error)
+            result = WarmupResult(step.name, rows, time.perf_counter() - started, error)
+            logger.debug(
+                "warmup.step_done", step=step.name, rows=rows, duration=result.duration
+            )
+            if progress is not None:
+                progress(result)
+            results.append(result)
+        return results
+
+    def _load(self, db: IDatabase) -> None:
+        # * `run()` warms at startup; a reconnect only resumes listening
+        pass
+
+    def _apply(self, db: IDatabase, payloads: list[str]) -> None:
+        self._rewarm(db, "requested")
+
+    def _check(self, db: IDatabase) -> None:
+        versions = TableVersionRepository(db).get_versions(self.watched_tables)
+        if versions != self._versions:
+            self._rewarm(db, "changed")
+
+    def _rewarm(self, db: IDatabase, reason: str) -> None:
+        started = time.perf_counter()
+        results = self._warm(db)
+        logger.info(
+            "warmup.done",
+            reason=reason,
+            failed=[result.step for result in results if result.error],
+            duration=time.perf_counter() - started,
+        )
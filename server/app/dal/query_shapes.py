@@ -0,0 +1,349 @@
+"""
+Representative calls of every repository read and write method.
+
+Used by `manage.py analyze-queries` to explain each SQL shape the repositories can
+produce, including filter and sort permutations of the list methods.
+"""
+
+from datetime import date, datetime, timedelta
+from itertools import chain, combinations
+from typing import Any, Callable, Iterable, Iterator, get_args, get_type_hints
+from uuid import UUID
+
+from ..db.connection._base import IDatabase
+from .repositories._base import DBRepository
+from .repositories.auth import (
+    GroupPermissionRepository,
+    GroupRepository,
+    PermissionRepository,
+    UserGroupRepository,
+    UserRepository,
+)
+from .repositories.category import CategoryRepository
+from .repositories.check import CheckRepository
+from .repositories.customer_card import CustomerCardRepository
+from .repositories.employee import EmployeeRepository
+from .repositories.inventory_movement import InventoryMovementRepository
+from .repositories.product import ProductRepository
+from .repositories.sale import SaleRepository
+from .repositories.stock_reservation import StockReservationRepository
+from .repositories.store_product import StoreProductRepository
+from .repositories.table_version import TableVersionRepository
+from .schemas.auth import PermissionUpdate, UserUpdate
+from .schemas.check import CreateCheck
+from .schemas.customer_card import CustomerCard, CustomerCardUpdate
+from .schemas.inventory_movement import CreateInventoryMovement
+from .schemas.product import UpdateProduct
+from .schemas.sale import CreateSale
+from .schemas.store_product import UpdateStoreProduct
+
+QueryShape = tuple[str, Callable[[IDatabase], Any]]
+
+SAMPLE_UPC = "000000000001"
+SAMPLE_CHECK_NUMBER = "0000000001"
+SAMPLE_EMPLOYEE_ID = "0000000001"
+SAMPLE_CARD_NUMBER = "0000000000001"
+SAMPLE_DATE_FROM = date(2025, 1, 1)
+SAMPLE_DATE_TO = date(2025, 12, 31)
+SAMPLE_CART_ID = UUID("00000000-0000-0000-0000-000000000001")
+
+
+def _shape(
+    repo_cls: type[DBRepository], method: str, *args: Any, **kwargs: Any
+) -> QueryShape:
+    arguments = [repr(arg) for arg in args] + [f"{k}={v!r}" for k, v in kwargs.items()]
+    label = f"{repo_cls.__name__}.{method}({', '.join(arguments)})"
+    return label, lambda db: getattr(repo_cls(db), method)(*args, **kwargs)
+
+
+def _powerset(filters: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    keys = list(filters)
+    subsets = chain.from_iterable(
+        combinations(keys, size) for size in range(len(keys) + 1)
+    )
+    for subset in subsets:
+        yield {key: filters[key] for key in subset}
+
+
+def _permutations(
+    repo_cls: type[DBRepository],
+    method: str,
+    filters: dict[str, Any],
+    *,
+    sort_param: str | None = "sort_by",
+    sort_values: Iterable[str] | None = None,
+    order_param: str = "sort_order",
+) -> Iterator[QueryShape]:
+    """Every filter combination with default ordering, then every ordering unfiltered."""
+    for subset in _powerset(filters):
+        yield _shape(repo_cls, method, **subset)
+
+    if sort_param is None:
+        return
+
+    if sort_values is None:
+        hints = get_type_hints(getattr(repo_cls, method))
+        sort_values = get_args(hints[sort_param])
+
+    for value in sort_values:
+        for order in ("asc", "desc"):
+            yield _shape(repo_cls, method, **{sort_param: value, order_param: order})
+
+
+def _store_product_shapes() -> Iterator[QueryShape]:
+    repo = StoreProductRepository
+    filters = {
+        "search": "milk",
+        "promotional_only": True,
+        "id_product": 1,
+        "upcs": [SAMPLE_UPC],
+    }
+    update = UpdateStoreProduct(
+        UPC_prom=None,
+        id_product=1,
+        selling_price=10,
+        products_number=10,
+        promotional_product=False,
+    )
+
+    yield from _permutations(repo, "get_all", filters)
+    yield _shape(repo, "get_all", expand=["product", "category"])
+    yield _shape(repo, "get_all", fields=["UPC", "selling_price"])
+    yield from _permutations(repo, "get_total_count", filters, sort_param=None)
+    yield _shape(repo, "get_by_upc", SAMPLE_UPC)
+    yield _shape(repo, "get_many_by_upc", [SAMPLE_UPC])
+    yield _shape(repo, "lock_stock", [SAMPLE_UPC])
+    yield _shape(repo, "lock_many_by_upc", [SAMPLE_UPC])
+    yield _shape(repo, "get_regular_product_for_product_id", 1)
+    yield _shape(repo, "get_promotional_product_for_product_id", 1)
+    yield _shape(repo, "get_promotional_products_for_product_ids", [1])
+    yield _shape(repo, "exists_for_product_and_promo_type", 1, True)
+    yield _shape(repo, "exists_for_product_and_promo_type", 1, True, SAMPLE_UPC)
+    yield _shape(repo, "update", SAMPLE_UPC, update)
+    yield _shape(repo, "delete", SAMPLE_UPC)
+    yield _shape(repo, "delete_multiple", [SAMPLE_UPC])
+    yield _shape(repo, "get_scanned")
+    yield _shape(repo, "get_scanned", [SAMPLE_UPC], [1])
+    yield _shape(repo, "get_catalog_version")
+
+
+def _inventory_movement_shapes() -> Iterator[QueryShape]:
+    repo = InventoryMovementRepository
+    movement = CreateInventoryMovement(UPC=SAMPLE_UPC, kind="restock", quantity=1)
+
+    for method in ("get_by_upc", "get_total_count"):
+        yield _shape(repo, method, SAMPLE_UPC)
+        yield _shape(repo, method, SAMPLE_UPC, kind="sale")
+    yield _shape(repo, "get_stock", SAMPLE_UPC)
+    yield _shape(repo, "create_multiple", [movement])
+    yield _shape(repo, "get_pending_upcs")
+    yield _shape(repo, "compact", [SAMPLE_UPC])
+
+
+def _stock_reservation_shapes() -> Iterator[QueryShape]:
+    repo = StockReservationRepository
+    ttl = timedelta(minutes=5)
+
+    yield _shape(repo, "get_by_cart", SAMPLE_CART_ID, SAMPLE_EMPLOYEE_ID)
+    yield _shape(repo, "get_by_carts", [SAMPLE_CART_ID])
+    yield _shape(repo, "get_owner", SAMPLE_CART_ID)
+    yield _shape(repo, "get_reserved", [SAMPLE_UPC])
+    yield _shape(
+        repo, "reserve", SAMPLE_CART_ID, SAMPLE_EMPLOYEE_ID, SAMPLE_UPC, 1, ttl
+    )
+    yield _shape(repo, "refresh", SAMPLE_CART_ID, SAMPLE_EMPLOYEE_ID, ttl)
+    yield _shape(repo, "release_many", [(SAMPLE_CART_ID, SAMPLE_EMPLOYEE_ID)])
+    yield _shape(repo, "release", SAMPLE_CART_ID, SAMPLE_EMPLOYEE_ID)
+    yield _shape(repo, "release", SAMPLE_CART_ID, SAMPLE_EMPLOYEE_ID, SAMPLE_UPC)
+
+
+def _product_shapes() -> Iterator[QueryShape]:
+    repo = ProductRepository
+    filters = {"search": "milk", "category_number": 1, "product_ids": [1]}
+    update = UpdateProduct(
+        id_product=1, category_number=1, product_name="milk", characteristics="1l"
+    )
+
+    yield from _permutations(repo, "get_all", filters)
+    yield _shape(repo, "get_all", expand=["category"])
+    yield _shape(repo, "get_all", fields=["id_product", "product_name"])
+    yield from _permutations(repo, "get_total_count", filters, sort_param=None)
+    yield _shape(repo, "get_by_id", 1)
+    yield _shape(repo, "get_many_by_id", [1])
+    yield _shape(repo, "update", 1, update)
+    yield _shape(repo, "delete", 1)
+    yield _shape(repo, "delete_multiple", [1])
+
+
+def _category_shapes() -> Iterator[QueryShape]:
+    repo = CategoryRepository
+
+    filters = {"search": "dairy", "category_numbers": [1]}
+
+    yield from _permutations(repo, "get_all", filters)
+    yield from _permutations(repo, "get_total_count", filters, sort_param=None)
+    yield _shape(repo, "get_by_number", 1)
+    yield _shape(repo, "get_many_by_number", [1])
+    yield _shape(repo, "update", 1, "dairy")
+    yield _shape(repo, "delete", 1)
+    yield _shape(repo, "delete_multiple", [1])
+    yield from _permutations(
+        repo,
+        "get_category_revenue_report",
+        {"date_from": SAMPLE_DATE_FROM, "date_to": SAMPLE_DATE_TO},
+        sort_param=None,
+    )
+    yield _shape(repo, "get_categories_with_all_products_sold")
+
+
+def _check_shapes() -> Iterator[QueryShape]:
+    repo = CheckRepository
+    filters = {
+        "date_from": SAMPLE_DATE_FROM,
+        "date_to": SAMPLE_DATE_TO,
+        "employee_id": SAMPLE_EMPLOYEE_ID,
+        "product_upc": SAMPLE_UPC,
+    }
+    checkout = CreateCheck(
+        check_number=SAMPLE_CHECK_NUMBER,
+        card_number=SAMPLE_CARD_NUMBER,
+        print_date=datetime(2025, 1, 1),
+        sales=[CreateSale(UPC=SAMPLE_UPC, product_number=1)],
+    )
+
+    yield from _permutations(repo, "get_all", {**filters, "limit": 10})
+    yield from _permutations(repo, "get_metadata_stats", filters, sort_param=None)
+    yield _shape(repo, "get_by_check_number", SAMPLE_CHECK_NUMBER)
+    yield _shape(repo, "get_many_by_check_number", [SAMPLE_CHECK_NUMBER])
+    yield _shape(repo, "get_total_sum_by_period", SAMPLE_DATE_FROM, SAMPLE_DATE_TO)
+    yield _shape(
+        repo,
+        "get_total_sum_by_period",
+        SAMPLE_DATE_FROM,
+        SAMPLE_DATE_TO,
+        SAMPLE_EMPLOYEE_ID,
+    )
+    yield _shape(repo, "checkout", checkout, SAMPLE_EMPLOYEE_ID, 0.2)
+    yield _shape(
+        repo,
+        "checkout",
+        checkout.model_copy(update={"cart_id": SAMPLE_CART_ID}),
+        SAMPLE_EMPLOYEE_ID,
+        0.2,
+    )
+    yield _shape(repo, "delete", SAMPLE_CHECK_NUMBER)
+    yield _shape(repo, "delete_multiple", [SAMPLE_CHECK_NUMBER])
+    yield from _permutations(
+        repo,
+        "count_in_period",
+        {"date_from": SAMPLE_DATE_FROM, "date_to": SAMPLE_DATE_TO},
+        sort_param=None,
+    )
+    yield from _permutations(
+        repo,
+        "delete_batch",
+        {
+            "after": SAMPLE_CHECK_NUMBER,
+            "date_from": SAMPLE_DATE_FROM,
+            "date_to": SAMPLE_DATE_TO,
+        },
+        sort_param=None,
+    )
+
+
+def _sale_shapes() -> Iterator[QueryShape]:
+    yield _shape(SaleRepository, "get_by_check", SAMPLE_CHECK_NUMBER)
+    yield _shape(SaleRepository, "get_by_check", SAMPLE_CHECK_NUMBER, ["sales.product"])
+    yield _shape(SaleRepository, "get_by_checks", [SAMPLE_CHECK_NUMBER])
+    yield _shape(
+        SaleRepository, "get_by_checks", [SAMPLE_CHECK_NUMBER], ["sales.product"]
+    )
+    yield _shape(SaleRepository, "get_by_product", SAMPLE_UPC)
+
+
+def _customer_card_shapes() -> Iterator[QueryShape]:
+    repo = CustomerCardRepository
+    search = CustomerCardUpdate(cust_surname="Shevchenko", percent=5)
+
+    yield _shape(repo, "search")
+    yield _shape(repo, "search", search)
+    yield _shape(repo, "search", fields=["card_number", "cust_surname"])
+    for field in CustomerCard.model_fields:
+        for order in ("asc", "desc"):
+            yield _shape(repo, "search", order_by=field, sort_order=order, limit=10)
+    yield _shape(repo, "get_total_count")
+    yield _shape(repo, "get_total_count", search)
+    yield _shape(repo, "get", SAMPLE_CARD_NUMBER)
+    yield _shape(repo, "get_many_by_card_number", [SAMPLE_CARD_NUMBER])
+    yield _shape(repo, "update", SAMPLE_CARD_NUMBER, CustomerCardUpdate(percent=5))
+    yield _shape(repo, "delete", SAMPLE_CARD_NUMBER)
+    yield from _permutations(
+        repo,
+        "get_card_sold_categories",
+        {
+            "card_number": SAMPLE_CARD_NUMBER,
+            "category_name": "dairy",
+            "start_date": SAMPLE_DATE_FROM,
+            "end_date": SAMPLE_DATE_TO,
+        },
+        sort_param=None,
+    )
+
+
+def _employee_shapes() -> Iterator[QueryShape]:
+    repo = EmployeeRepository
+
+    yield from _permutations(
+        repo, "get_all", {"search": "Shevchenko", "role_filter": "cashier"}
+    )
+    yield _shape(repo, "get_all", fields=["id_employee", "empl_surname"])
+    yield _shape(repo, "get_by_id", SAMPLE_EMPLOYEE_ID)
+    yield _shape(repo, "get_many_by_id", [SAMPLE_EMPLOYEE_ID])
+    yield _shape(repo, "delete", SAMPLE_EMPLOYEE_ID)
+    yield _shape(repo, "delete_multiple", [SAMPLE_EMPLOYEE_ID])
+    yield _shape(repo, "get_employee_statistics", SAMPLE_EMPLOYEE_ID)
+    yield _shape(repo, "get_employees_only_with_promotional_sales")
+
+
+def _auth_shapes() -> Iterator[QueryShape]:
+    yield _shape(UserRepository, "search", UserUpdate(username="admin"))
+    yield _shape(UserRepository, "search", UserUpdate(id_employee=SAMPLE_EMPLOYEE_ID))
+    yield _shape(UserRepository, "get_auth_version", 1)
+    yield _shape(UserRepository, "get_auth_versions")
+    yield _shape(PermissionRepository, "get_all")
+    yield _shape(PermissionRepository, "get", 1)
+    yield _shape(PermissionRepository, "get_by_user", 1)
+    yield _shape(
+        PermissionRepository,
+        "search",
+        PermissionUpdate(model_name="Product", codename="product.can_view"),
+    )
+    yield _shape(GroupRepository, "get_all")
+    yield _shape(GroupRepository, "get_by_name", "Cashier")
+    yield _shape(GroupRepository, "get_groups_by_ids", [1, 2])
+    yield _shape(UserGroupRepository, "get_user_groups", 1)
+    yield _shape(UserGroupRepository, "get_group_users", 1)
+    yield _shape(GroupPermissionRepository, "get_group_permissions", 1)
+    yield _shape(GroupPermissionRepository, "get_permission_groups", 1)
+
+
+def _table_version_shapes() -> Iterator[QueryShape]:
+    yield _shape(
+        TableVersionRepository, "get_versions", ["store_product", "product", "category"]
+    )
+
+
+def repository_query_shapes() -> list[QueryShape]:
+    return [
+        *_store_product_shapes(),
+        *_inventory_movement_shapes(),
+        *_stock_reservation_shapes(),
+        *_product_shapes(),
+        *_category_shapes(),
+        *_check_shapes(),
+        *_sale_shapes(),
+        *_customer_card_shapes(),
+        *_employee_shapes(),
+        *_auth_shapes(),
+        *_table_version_shapes(),
+    ]
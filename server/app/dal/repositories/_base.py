@@ -1,19 +1,29 @@
 from abc import ABC
-from typing import Any, Generic, Optional, Tuple, Type, TypeVar
+from typing import Any, Collection, Generic, Optional, Tuple, Type, TypeVar
 
 from pydantic import BaseModel
 
+from ...cache import ReportCache, RepositoryCache
 from ...db.connection._base import IDatabase
-from ..schemas._base import UNSET
+from ..schemas._base import UNSET, partial_model
+from ..unit_of_work import UnitOfWork
 
 _T_BaseModel = TypeVar("_T_BaseModel", bound=BaseModel)
+_T_Related = TypeVar("_T_Related", bound=BaseModel)
 
 
 class DBRepository(ABC):
     table_name: str
 
-    def __init__(self, db: IDatabase):
+    def __init__(
+        self,
+        db: IDatabase,
+        cache: Optional[RepositoryCache] = None,
+        report_cache: Optional[ReportCache] = None,
+    ):
         self._db = db
+        self._cache = cache
+        self._report_cache = report_cache
 
     def _build_pagination_clause(
         self, skip: int = 0, limit: Optional[int] = None
@@ -40,11 +50,107 @@ class DBRepository(ABC):
 
 class PydanticDBRepository(DBRepository, Generic[_T_BaseModel]):
     model: Type[_T_BaseModel]
+    pk_field: Optional[str] = None
+    # * A view to read rows from, when some fields are derived from other tables
+    view_name: Optional[str] = None
+    # * Fields of the view that are not written back by updates
+    derived_fields: tuple[str, ...] = ()
 
     @property
     def _fields(self) -> list[str]:
         return list(self.model.model_fields.keys())
 
+    @property
+    def _unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork.for_database(self._db)
+
+    def _get_identity(self, pk: Any) -> Optional[_T_BaseModel]:
+        return self._unit_of_work.get(self.table_name, pk)  # type: ignore[return-value]
+
+    def _load(self, row: tuple[Any, ...]) -> _T_BaseModel:
+        """
+        Converts a fetched row, returning the instance already in the identity map
+        for the same primary key, so pending changes are not lost.
+        """
+        instance = self._row_to_model(row)
+        if self.pk_field is None:
+            return instance
+        pk = getattr(instance, self.pk_field)
+        return self._unit_of_work.register(self.table_name, pk, instance)  # type: ignore[return-value]
+
+    def _store(self, instance: _T_BaseModel) -> _T_BaseModel:
+        """Replaces the mapped instance with one just written to the database."""
+        if self.pk_field is not None:
+            pk = getattr(instance, self.pk_field)
+            self._unit_of_work.replace(self.table_name, pk, instance)
+        return instance
+
+    def _evict(self, *pks: Any) -> None:
+        for pk in pks:
+            self._unit_of_work.evict(self.table_name, pk)
+
+    def _get_many_by_pk(self, pks: list[Any]) -> dict[Any, _T_BaseModel]:
+        """Fetches rows by primary key, querying only those not mapped yet."""
+        assert self.pk_field is not None, "Repository has no primary key field"
+
+        found: dict[Any, _T_BaseModel] = {}
+        missing = []
+        for pk in dict.fromkeys(pks):
+            instance = self._get_identity(pk)
+            if instance is None:
+                missing.append(pk)
+            else:
+                found[pk] = instance
+
+        if missing:
+            rows = self._db.execute(
+                f"""
+                    SELECT {", ".join(self._fields)}
+                    FROM {self.view_name or self.table_name}
+                    WHERE {self.pk_field} = ANY(%s)
+                """,
+                (missing,),
+            )
+            for row in rows:
+                instance = self._load(row)
+                found[getattr(instance, self.pk_field)] = instance
+
+        return found
+
+    def _update_deferred(self, pk: Any, instance: _T_BaseModel) -> bool:
+        """
+        Registers an update with the active unit of work instead of running it.
+
+        Returns:
+            bool: False when no unit of work is active and the caller must write.
+        """
+        if not self._unit_of_work.active:
+            return False
+        self._unit_of_work.register_dirty(self, pk, instance)
+        return True
+
+    def _flush(self, instances: list[_T_BaseModel]) -> None:
+        """Writes dirty instances as a single batch of UPDATE statements."""
+        assert self.pk_field is not None, "Repository has no primary key field"
+
+        columns = [
+            field
+            for field in self._fields
+            if field != self.pk_field and field not in self.derived_fields
+        ]
+        statement = f"""
+            UPDATE {self.table_name}
+            SET {", ".join(f"{column} = %s" for column in columns)}
+            WHERE {self.pk_field} = %s
+        """
+
+        params: list[Any] = []
+        for instance in instances:
+            params.extend(getattr(instance, column) for column in columns)
+            params.append(getattr(instance, self.pk_field))
+
+        self._db.execute(";".join([statement] * len(instances)), tuple(params))
+
     def _row_to_model(self, row: tuple[Any, ...]) -> _T_BaseModel:
         if len(row) != len(self._fields):
             raise ValueError(
@@ -52,6 +158,55 @@ class PydanticDBRepository(DBRepository, Generic[_T_BaseModel]):
             )
         return self.model(**dict(zip(self._fields, row)))
 
+    def _select_fields(self, fields: Optional[Collection[str]]) -> list[str]:
+        """Model fields to select, in model order; all of them when not given."""
+        if fields is None:
+            return self._fields
+
+        unknown = set(fields) - set(self._fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return [field for field in self._fields if field in fields]
+
+    def _row_to_partial(
+        self,
+        row: tuple[Any, ...],
+        fields: list[str],
+        model: Optional[Type[BaseModel]] = None,
+        **related: Any,
+    ) -> BaseModel:
+        """
+        Builds `model` (the repository model by default) from a row selected with
+        `fields`, or its partial counterpart when only some fields were selected.
+        """
+        model = model or self.model
+        values = dict(zip(fields, row[: len(fields)]), **related)
+        if len(fields) == len(self._fields):
+            return model(**values)
+        return partial_model(model)(**values)
+
+    @staticmethod
+    def _related_columns(alias: str, model: Type[BaseModel]) -> list[str]:
+        return [f"{alias}.{field}" for field in model.model_fields]
+
+    @staticmethod
+    def _row_to_related(
+        row: tuple[Any, ...], offset: int, model: Type[_T_Related]
+    ) -> tuple[Optional[_T_Related], int]:
+        """
+        Builds a joined model from the columns of a row starting at `offset`.
+
+        Returns:
+            tuple: the model, or None when the outer join matched nothing, and
+                the offset of the next related model's columns.
+        """
+        fields = list(model.model_fields)
+        values = row[offset : offset + len(fields)]
+        next_offset = offset + len(fields)
+        if all(value is None for value in values):
+            return None, next_offset
+        return model(**dict(zip(fields, values))), next_offset
+
     def _construct_clauses(
         self,
         fields: list[str],
@@ -3,6 +3,7 @@ from typing import overload
 import structlog
 from pydantic import SecretStr
 
+from ...cache import cached, invalidates
 from ...db.connection import DatabaseError, DataError, IntegrityError
 from ..schemas._base import UNSET
 from ..schemas.auth import (
@@ -135,6 +136,17 @@ class UserRepository(PydanticDBRepository[User]):
             (user_id,),
         )
 
+    def get_auth_version(self, user_id: int) -> int | None:
+        """Version of the user, their groups and group permissions, see 011."""
+        rows = self._db.execute(
+            "SELECT version FROM auth_user_version WHERE user_id = %s", (user_id,)
+        )
+        return rows[0][0] if rows else None
+
+    def get_auth_versions(self) -> dict[int, int]:
+        rows = self._db.execute("SELECT user_id, version FROM auth_user_version")
+        return {user_id: version for user_id, version in rows}
+
 
 class PermissionRepository(PydanticDBRepository[Permission]):
     table_name = "auth_permission"
@@ -144,6 +156,7 @@ class PermissionRepository(PydanticDBRepository[Permission]):
     class AlreadyExists(DatabaseError):
         pass
 
+    @cached()
     def get_all(self) -> list[Permission]:
         rows = self._db.execute(
             f"""
@@ -153,6 +166,7 @@ class PermissionRepository(PydanticDBRepository[Permission]):
         )
         return [self._row_to_model(row) for row in rows]
 
+    @cached()
     def get(self, permission_id: int) -> Permission:
         rows = self._db.execute(
             f"""
@@ -164,6 +178,7 @@ class PermissionRepository(PydanticDBRepository[Permission]):
         )
         return self._row_to_model(rows[0])
 
+    @cached()
     def search(
         self,
         permission: PermissionUpdate | None = None,
@@ -187,6 +202,24 @@ class PermissionRepository(PydanticDBRepository[Permission]):
         )
         return [self._row_to_model(row) for row in rows]
 
+    def get_by_user(self, user_id: int) -> list[Permission]:
+        """Permissions granted to any group of the user."""
+        rows = self._db.execute(
+            f"""
+                SELECT DISTINCT {", ".join(f"p.{field}" for field in self._fields)}
+                FROM {self.table_name} p
+                INNER JOIN {GroupPermissionRepository.table_name} gp
+                    ON gp.permission_id = p.{self.pk_field}
+                INNER JOIN {UserGroupRepository.table_name} ug
+                    ON ug.group_id = gp.group_id
+                WHERE ug.user_id = %s
+                ORDER BY p.{self.pk_field}
+            """,
+            (user_id,),
+        )
+        return [self._row_to_model(row) for row in rows]
+
+    @invalidates
     def create(self, permission: PermissionCreate) -> Permission:
         fields = list(self._fields)
         fields.remove(self.pk_field)
@@ -215,6 +248,7 @@ class PermissionRepository(PydanticDBRepository[Permission]):
         except DatabaseError as e:
             raise ValueError("database error") from e
 
+    @invalidates
     def delete(self, permission_id: int) -> None:
         self._db.execute(
             f"""
@@ -285,6 +319,7 @@ class GroupRepository(PydanticDBRepository[Group]):
         except DatabaseError as e:
             raise ValueError("database error") from e
 
+    @invalidates
     def delete(self, group_id: int) -> None:
         self._db.execute(
             f"""
@@ -311,6 +346,7 @@ class UserGroupRepository(PydanticDBRepository[UserGroup]):
         )
         return [self._row_to_model(row) for row in rows]
 
+    @invalidates
     def create(self, user_id: int, group_id: int) -> UserGroup:
         try:
             rows = self._db.execute(
@@ -329,6 +365,7 @@ class UserGroupRepository(PydanticDBRepository[UserGroup]):
         except DatabaseError as e:
             raise ValueError("database error") from e
 
+    @invalidates
     def delete(self, user_id: int, group_id: int) -> None:
         self._db.execute(
             f"""
@@ -377,6 +414,7 @@ class GroupPermissionRepository(PydanticDBRepository[GroupPermission]):
         )
         return [self._row_to_model(row) for row in rows]
 
+    @invalidates
     def create(self, group_id: int, permission_id: int) -> GroupPermission:
         try:
             rows = self._db.execute(
@@ -395,6 +433,7 @@ class GroupPermissionRepository(PydanticDBRepository[GroupPermission]):
         except DatabaseError as e:
             raise ValueError("database error") from e
 
+    @invalidates
     def delete(self, group_id: int, permission_id: int) -> None:
         self._db.execute(
             f"""
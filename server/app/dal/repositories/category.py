@@ -3,6 +3,7 @@ from typing import Literal, Optional
 
 import structlog
 
+from ...cache import cached, cached_report, invalidates
 from ..schemas.category import Category
 from ._base import PydanticDBRepository
 
@@ -12,7 +13,9 @@ logger = structlog.get_logger(__name__)
 class CategoryRepository(PydanticDBRepository[Category]):
     table_name = "category"
     model = Category
+    pk_field = "category_number"
 
+    @cached()
     def get_all(
         self,
         skip: int = 0,
@@ -20,13 +23,9 @@ class CategoryRepository(PydanticDBRepository[Category]):
         search: Optional[str] = None,
         sort_by: Literal["category_number", "category_name"] = "category_number",
         sort_order: Literal["asc", "desc"] = "asc",
+        category_numbers: Optional[list[int]] = None,
     ) -> list[Category]:
-        where_clause = ""
-        params = []
-
-        if search:
-            where_clause = "WHERE category_name ILIKE %s"
-            params.append(f"%{search}%")
+        where_clause, params = self._build_where_clause(search, category_numbers)
 
         limit_clause, limit_params = self._build_pagination_clause(skip, limit)
         params.extend(limit_params)
@@ -42,13 +41,13 @@ class CategoryRepository(PydanticDBRepository[Category]):
         rows = self._db.execute(query, tuple(params))
         return [self._row_to_model(row) for row in rows]
 
-    def get_total_count(self, search: Optional[str] = None) -> int:
-        where_clause = ""
-        params = []
-
-        if search:
-            where_clause = "WHERE category_name ILIKE %s"
-            params.append(f"%{search}%")
+    @cached()
+    def get_total_count(
+        self,
+        search: Optional[str] = None,
+        category_numbers: Optional[list[int]] = None,
+    ) -> int:
+        where_clause, params = self._build_where_clause(search, category_numbers)
 
         query = f"""
             SELECT COUNT(*)
@@ -59,7 +58,28 @@ class CategoryRepository(PydanticDBRepository[Category]):
         rows = self._db.execute(query, tuple(params))
         return rows[0][0] if rows else 0
 
+    def _build_where_clause(
+        self, search: Optional[str], category_numbers: Optional[list[int]]
+    ) -> tuple[str, list]:
+        where_clauses = []
+        params: list = []
+
+        if search:
+            where_clauses.append("category_name ILIKE %s")
+            params.append(f"%{search}%")
+
+        if category_numbers is not None:
+            where_clauses.append("category_number = ANY(%s)")
+            params.append(category_numbers)
+
+        where_clause = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+        return where_clause, params
+
+    @cached()
     def get_by_number(self, category_number: int) -> Category | None:
+        if (category := self._get_identity(category_number)) is not None:
+            return category
+
         rows = self._db.execute(
             f"""
                 SELECT {", ".join(self._fields)}
@@ -68,8 +88,13 @@ class CategoryRepository(PydanticDBRepository[Category]):
             """,
             (category_number,),
         )
-        return self._row_to_model(rows[0]) if rows else None
+        return self._load(rows[0]) if rows else None
+
+    @cached()
+    def get_many_by_number(self, category_numbers: list[int]) -> dict[int, Category]:
+        return self._get_many_by_pk(category_numbers)
 
+    @invalidates
     def create(self, category_name: str) -> Category:
         rows = self._db.execute(
             f"""
@@ -79,8 +104,9 @@ class CategoryRepository(PydanticDBRepository[Category]):
             """,
             (category_name,),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
 
+    @invalidates
     def update(self, category_number: int, category_name: str) -> Category:
         rows = self._db.execute(
             f"""
@@ -91,8 +117,9 @@ class CategoryRepository(PydanticDBRepository[Category]):
             """,
             (category_name, category_number),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
 
+    @invalidates
     def delete(self, category_number: int) -> None:
         self._db.execute(
             f"""
@@ -101,7 +128,9 @@ class CategoryRepository(PydanticDBRepository[Category]):
             """,
             (category_number,),
         )
+        self._evict(category_number)
 
+    @invalidates
     def delete_multiple(self, category_numbers: list[int]) -> None:
         if not category_numbers:
             return
@@ -113,7 +142,11 @@ class CategoryRepository(PydanticDBRepository[Category]):
             """,
             (category_numbers,),
         )
+        self._evict(*category_numbers)
 
+    @cached_report(
+        depends_on=("category", "product", "store_product"), period_end="date_to"
+    )
     def get_category_revenue_report(
         self, date_from: Optional[date] = None, date_to: Optional[date] = None
     ) -> list[dict]:
@@ -172,6 +205,7 @@ class CategoryRepository(PydanticDBRepository[Category]):
             for row in rows
         ]
 
+    @cached_report(depends_on=("category", "product", "store_product"))
     def get_categories_with_all_products_sold(self) -> list[dict]:
         """Get categories where all products have been sold at least once."""
         query = """
@@ -3,7 +3,7 @@ from typing import Any, Dict, Literal, Optional
 
 import structlog
 
-from ..schemas.check import RelationalCheck
+from ..schemas.check import Check, CheckoutResult, CreateCheck, RelationalCheck
 from ._base import PydanticDBRepository
 
 logger = structlog.get_logger(__name__)
@@ -12,6 +12,10 @@ logger = structlog.get_logger(__name__)
 class CheckRepository(PydanticDBRepository[RelationalCheck]):
     table_name = '"check"'  # reserved keyword
     model = RelationalCheck
+    pk_field = "check_number"
+
+    # * Next value of check_number_seq, zero-padded to the VARCHAR(10) format
+    NEXT_CHECK_NUMBER = "lpad(nextval('check_number_seq')::text, 10, '0')"
 
     def get_all(
         self,
@@ -75,9 +79,13 @@ class CheckRepository(PydanticDBRepository[RelationalCheck]):
         employee_id: Optional[str] = None,
         product_upc: Optional[str] = None,
     ) -> Dict[str, Any]:
+        """
+        Totals of the checks matching the filters, computed in one statement that
+        reads the filtered checks once and their sales once.
+        """
         where_clauses = []
-        params = []
-        joins = []
+        params: list[Any] = []
+        sale_clauses = []
 
         if date_from:
             where_clauses.append("c.print_date >= %s")
@@ -89,50 +97,52 @@ class CheckRepository(PydanticDBRepository[RelationalCheck]):
             where_clauses.append("c.id_employee = %s")
             params.append(employee_id)
         if product_upc:
-            joins.append("INNER JOIN sale s ON c.check_number = s.check_number")
-            where_clauses.append("s.UPC = %s")
+            where_clauses.append(
+                "EXISTS (SELECT 1 FROM sale ps"
+                " WHERE ps.check_number = c.check_number AND ps.UPC = %s)"
+            )
+            params.append(product_upc)
+            # * Item totals only count the filtered product
+            sale_clauses.append("s.UPC = %s")
             params.append(product_upc)
-
-        from_clause = f"FROM {self.table_name} c"
-        if joins:
-            from_clause += f" {' '.join(joins)}"
 
         where_clause = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+        sale_filter = "".join(f" AND {clause}" for clause in sale_clauses)
 
-        count_query = f"""
-            SELECT COUNT(DISTINCT c.check_number) as checks_count,
-                   COALESCE(SUM(DISTINCT c.sum_total), 0) as total_sum,
-                   COALESCE(SUM(DISTINCT c.vat), 0) as total_vat
-            {from_clause}
-            {where_clause}
-        """
-
-        count_result = self._db.execute(count_query, tuple(params))
-        checks_count = count_result[0][0] if count_result else 0
-        total_sum = float(count_result[0][1]) if count_result else 0.0
-        total_vat = float(count_result[0][2]) if count_result else 0.0
-
-        items_query = f"""
-            SELECT COALESCE(SUM(s.product_number), 0) as total_items,
-                   COUNT(DISTINCT s.UPC) as total_product_types
+        rows = self._db.execute(
+            f"""
+            WITH filtered AS MATERIALIZED (
+                SELECT c.check_number, c.sum_total, c.vat
+                FROM {self.table_name} c
+                {where_clause}
+            )
+            SELECT
+                (SELECT COUNT(*) FROM filtered),
+                (SELECT COALESCE(SUM(sum_total), 0) FROM filtered),
+                (SELECT COALESCE(SUM(vat), 0) FROM filtered),
+                COALESCE(SUM(s.product_number), 0),
+                COUNT(DISTINCT s.UPC)
             FROM sale s
-            INNER JOIN {self.table_name} c ON s.check_number = c.check_number
-            {where_clause}
-        """
-
-        items_result = self._db.execute(items_query, tuple(params))
-        total_items_count = int(items_result[0][0]) if items_result else 0
-        total_product_types = int(items_result[0][1]) if items_result else 0
+            WHERE s.check_number IN (SELECT check_number FROM filtered){sale_filter}
+            """,
+            tuple(params),
+        )
+        checks_count, total_sum, total_vat, total_items_count, total_product_types = (
+            rows[0]
+        )
 
         return {
             "checks_count": checks_count,
-            "total_sum": total_sum,
-            "total_vat": total_vat,
-            "total_items_count": total_items_count,
-            "total_product_types": total_product_types,
+            "total_sum": float(total_sum),
+            "total_vat": float(total_vat),
+            "total_items_count": int(total_items_count),
+            "total_product_types": int(total_product_types),
         }
 
     def get_by_check_number(self, check_number: str) -> Optional[RelationalCheck]:
+        if (check := self._get_identity(check_number)) is not None:
+            return check
+
         rows = self._db.execute(
             f"""
             SELECT {", ".join(self._fields)}
@@ -141,7 +151,12 @@ class CheckRepository(PydanticDBRepository[RelationalCheck]):
             """,
             (check_number,),
         )
-        return self._row_to_model(rows[0]) if rows else None
+        return self._load(rows[0]) if rows else None
+
+    def get_many_by_check_number(
+        self, check_numbers: list[str]
+    ) -> dict[str, RelationalCheck]:
+        return self._get_many_by_pk(check_numbers)
 
     def get_total_sum_by_period(
         self,
@@ -176,13 +191,266 @@ class CheckRepository(PydanticDBRepository[RelationalCheck]):
             """,
             tuple(check_data.values()),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
+
+    def reserve_check_numbers(self, count: int) -> list[str]:
+        """
+        Allocates `count` check numbers from the database sequence. They are never
+        handed out again, so a till can number its checks from them offline.
+        """
+        rows = self._db.execute(
+            f"SELECT {self.NEXT_CHECK_NUMBER} FROM generate_series(1, %s)",
+            (count,),
+        )
+        return [row[0] for row in rows]
+
+    def create_multiple(self, checks: list[RelationalCheck]) -> list[RelationalCheck]:
+        if not checks:
+            return []
+
+        values_placeholders = []
+        params = []
+        for check in checks:
+            values_placeholders.append(f"({', '.join(['%s'] * len(self._fields))})")
+            params.extend(getattr(check, field) for field in self._fields)
+
+        rows = self._db.execute(
+            f"""
+            INSERT INTO {self.table_name} ({", ".join(self._fields)})
+            VALUES {", ".join(values_placeholders)}
+            RETURNING {", ".join(self._fields)}
+            """,
+            tuple(params),
+        )
+        return [self._store(self._row_to_model(row)) for row in rows]
+
+    def checkout(
+        self, data: CreateCheck, id_employee: str, vat_rate: float
+    ) -> CheckoutResult:
+        """
+        Creates a check with its sales and records the sold units in the inventory
+        ledger in a single statement.
+
+        Must run inside a transaction after the sold store products are locked
+        with `StoreProductRepository.lock_stock`, so concurrent checkouts wait for
+        each other instead of overselling, and stock and prices are read under
+        the lock. A check without a number gets the next one from the sequence.
+
+        Every line must be available: stock minus the active holds of other
+        carts, so that the checkout's own cart may sell what it holds; the cart's
+        holds are then consumed. Nothing is written unless every UPC exists with
+        enough units and the card (if any) exists; the result then lists what was
+        missing instead of a check.
+        """
+        cart_id = str(data.cart_id) if data.cart_id else None
+        quantities: dict[str, int] = {}
+        for sale in data.sales:
+            quantities[sale.UPC] = quantities.get(sale.UPC, 0) + sale.product_number
+
+        rows = self._db.execute(
+            f"""
+            WITH requested AS (
+                SELECT upc, quantity
+                FROM unnest(%s::varchar[], %s::int[]) AS r(upc, quantity)
+            ),
+            card AS (
+                SELECT percent FROM customer_card WHERE card_number = %s
+            ),
+            lines AS (
+                SELECT
+                    r.upc,
+                    r.quantity,
+                    sp.selling_price,
+                    (
+                        SELECT s.products_number
+                        FROM store_product_stock s
+                        WHERE s.UPC = r.upc
+                    ) - COALESCE(
+                        (
+                            SELECT SUM(o.quantity)
+                            FROM stock_reservation o
+                            WHERE o.UPC = r.upc
+                                AND o.expires_at > now()
+                                AND (
+                                    o.cart_id IS DISTINCT FROM %s::uuid
+                                    OR o.id_employee <> %s
+                                )
+                        ),
+                        0
+                    ) AS available
+                FROM requested r
+                LEFT JOIN store_product sp ON sp.UPC = r.upc
+            ),
+            accepted AS (
+                SELECT SUM(selling_price * quantity)
+                    * (1 - COALESCE((SELECT percent FROM card), 0) / 100.0)
+                    AS sum_total
+                FROM lines
+                -- bool_and skips NULLs: an unknown UPC (no price) must fail its own line
+                HAVING bool_and(selling_price IS NOT NULL)
+                    AND bool_and(available >= quantity)
+                    AND (%s::varchar IS NULL OR EXISTS (SELECT 1 FROM card))
+            ),
+            new_check AS (
+                INSERT INTO {self.table_name}
+                    (check_number, id_employee, card_number, print_date, sum_total, vat)
+                SELECT
+                    COALESCE(%s, {self.NEXT_CHECK_NUMBER}),
+                    %s,
+                    %s,
+                    %s,
+                    sum_total,
+                    sum_total * %s
+                FROM accepted
+                RETURNING {", ".join(self._fields)}
+            ),
+            new_sales AS (
+                INSERT INTO sale (UPC, check_number, product_number, selling_price)
+                SELECT l.upc, c.check_number, l.quantity, l.selling_price
+                FROM lines l CROSS JOIN new_check c
+                RETURNING UPC AS "UPC", product_number, selling_price, check_number
+            ),
+            new_movements AS (
+                INSERT INTO inventory_movement (UPC, kind, quantity, check_number)
+                SELECT l.upc, 'sale', -l.quantity, c.check_number
+                FROM lines l CROSS JOIN new_check c
+            ),
+            consumed AS (
+                DELETE FROM stock_reservation
+                WHERE cart_id = %s::uuid
+                    AND id_employee = %s
+                    AND EXISTS (SELECT 1 FROM new_check)
+            )
+            SELECT
+                (SELECT row_to_json(c) FROM new_check c),
+                (SELECT COALESCE(json_agg(s), '[]') FROM new_sales s),
+                (
+                    SELECT COALESCE(json_agg(json_build_object(
+                        'UPC', upc,
+                        'requested', quantity,
+                        'available', available
+                    )), '[]')
+                    FROM lines
+                    WHERE selling_price IS NOT NULL AND available < quantity
+                ),
+                (
+                    SELECT COALESCE(json_agg(upc), '[]')
+                    FROM lines
+                    WHERE selling_price IS NULL
+                ),
+                %s::varchar IS NULL OR EXISTS (SELECT 1 FROM card)
+            """,
+            (
+                list(quantities),
+                list(quantities.values()),
+                data.card_number,
+                cart_id,
+                id_employee,
+                data.card_number,
+                data.check_number,
+                id_employee,
+                data.card_number,
+                data.print_date,
+                vat_rate,
+                cart_id,
+                id_employee,
+                data.card_number,
+            ),
+        )
+        check, sales, shortages, missing_upcs, card_found = rows[0]
+        if check is None:
+            return CheckoutResult(
+                shortages=shortages, missing_upcs=missing_upcs, card_found=card_found
+            )
+
+        # * Stock of the sold store products has changed behind their repository
+        for upc in quantities:
+            self._unit_of_work.evict("store_product", upc)
+
+        relational_check = self._store(self.model(**check))
+        return CheckoutResult(check=Check(**relational_check.model_dump(), sales=sales))
 
     def delete(self, check_number: str) -> None:
         self._db.execute(
             f"DELETE FROM {self.table_name} WHERE check_number = %s",
             (check_number,),
         )
+        self._evict(check_number)
+
+    def _period_clauses(
+        self, date_from: Optional[date], date_to: Optional[date]
+    ) -> tuple[list[str], list[Any]]:
+        clauses, params = [], []
+        if date_from:
+            clauses.append("print_date >= %s")
+            params.append(date_from)
+        if date_to:
+            clauses.append("print_date < %s + INTERVAL '1 day'")
+            params.append(date_to)
+        return clauses, params
+
+    def count_in_period(
+        self, date_from: Optional[date] = None, date_to: Optional[date] = None
+    ) -> int:
+        clauses, params = self._period_clauses(date_from, date_to)
+        where_clause = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._db.execute(
+            f"SELECT COUNT(*) FROM {self.table_name} {where_clause}", tuple(params)
+        )
+        return rows[0][0]
+
+    def delete_batch(
+        self,
+        batch_size: int = 10_000,
+        after: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> tuple[int, Optional[str]]:
+        """
+        Deletes the next `batch_size` checks in check number order, starting after
+        `after`. Sales go with them through ON DELETE CASCADE.
+
+        Returns:
+            tuple: the number of deleted checks and the last deleted check number,
+                to pass as `after` for the next batch.
+        """
+        clauses, params = self._period_clauses(date_from, date_to)
+        if after is not None:
+            clauses.append("check_number > %s")
+            params.append(after)
+        where_clause = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        rows = self._db.execute(
+            f"""
+            WITH batch AS (
+                SELECT check_number
+                FROM {self.table_name}
+                {where_clause}
+                ORDER BY check_number
+                LIMIT %s
+            ),
+            deleted AS (
+                DELETE FROM {self.table_name} c
+                USING batch b
+                WHERE c.check_number = b.check_number
+                RETURNING c.check_number
+            )
+            SELECT check_number FROM deleted ORDER BY check_number
+            """,
+            (*params, batch_size),
+        )
+        deleted = [row[0] for row in rows]
+        self._evict(*deleted)
+        return len(deleted), deleted[-1] if deleted else None
+
+    def truncate(self) -> None:
+        """Removes every check and, through CASCADE, every sale."""
+        self._db.execute(f"TRUNCATE TABLE {self.table_name} CASCADE")
+        self._unit_of_work.evict_table(self.table_name)
+
+    def analyze(self) -> None:
+        """Refreshes planner statistics of checks and sales after bulk changes."""
+        self._db.execute(f"ANALYZE {self.table_name}, sale")
 
     def delete_multiple(self, check_numbers: list[str]) -> None:
         placeholders = ", ".join(["%s"] * len(check_numbers))
@@ -190,3 +458,4 @@ class CheckRepository(PydanticDBRepository[RelationalCheck]):
             f"DELETE FROM {self.table_name} WHERE check_number IN ({placeholders})",
             tuple(check_numbers),
         )
+        self._evict(*check_numbers)
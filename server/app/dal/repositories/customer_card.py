@@ -1,8 +1,9 @@
 from datetime import date
-from typing import Any, Literal
+from typing import Any, Collection, Literal
 
 import structlog
 
+from ...cache import cached, cached_report, invalidates
 from ..schemas._base import UNSET
 from ..schemas.customer_card import CustomerCard, CustomerCardCreate, CustomerCardUpdate
 from ._base import PydanticDBRepository
@@ -13,7 +14,9 @@ logger = structlog.get_logger(__name__)
 class CustomerCardRepository(PydanticDBRepository[CustomerCard]):
     table_name = "customer_card"
     model = CustomerCard
+    pk_field = "card_number"
 
+    @invalidates
     def create(
         self,
         customer_card: CustomerCardCreate,
@@ -35,8 +38,9 @@ class CustomerCardRepository(PydanticDBRepository[CustomerCard]):
             """,
             tuple(params),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
 
+    @invalidates
     def delete(
         self,
         card_number: str,
@@ -48,7 +52,9 @@ class CustomerCardRepository(PydanticDBRepository[CustomerCard]):
             """,
             (card_number,),
         )
+        self._evict(card_number)
 
+    @invalidates
     def delete_multiple(self, card_numbers: list[str]) -> None:
         self._db.execute(
             f"""
@@ -57,7 +63,9 @@ class CustomerCardRepository(PydanticDBRepository[CustomerCard]):
             """,
             (card_numbers,),
         )
+        self._evict(*card_numbers)
 
+    @invalidates
     def update(
         self,
         card_number: str,
@@ -79,7 +87,7 @@ class CustomerCardRepository(PydanticDBRepository[CustomerCard]):
             """,
             tuple(params + [card_number]),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
 
     def get_total_count(self, customer_card: CustomerCardUpdate | None = None) -> int:
         fields = list(self._fields)
@@ -104,19 +112,21 @@ class CustomerCardRepository(PydanticDBRepository[CustomerCard]):
         sort_order: Literal["asc", "desc"] = "desc",
         limit: int | None = None,
         offset: int | None = None,
+        fields: Collection[str] | None = None,
     ) -> list[CustomerCard]:
-        fields = list(self._fields)
-        if order_by is not None and order_by not in fields:
+        all_fields = list(self._fields)
+        if order_by is not None and order_by not in all_fields:
             raise ValueError(f"Invalid order_by: {order_by}")
 
         if sort_order not in ["asc", "desc"]:
             raise ValueError(f"Invalid sort_order: {sort_order}")
 
         where_clauses, params = self._construct_clauses(
-            fields, customer_card, use_like=True
+            all_fields, customer_card, use_like=True
         )
 
-        query = f""" SELECT {", ".join(fields)} FROM {self.table_name}"""
+        selected_fields = self._select_fields(fields)
+        query = f""" SELECT {", ".join(selected_fields)} FROM {self.table_name}"""
         if where_clauses:
             query += " WHERE " + " AND ".join(where_clauses)
 
@@ -130,12 +140,18 @@ class CustomerCardRepository(PydanticDBRepository[CustomerCard]):
             query += f" {limit_clause}"
 
         rows = self._db.execute(query, tuple(params + extra_params))
-        return [self._row_to_model(row) for row in rows]
+        if fields is None:
+            return [self._row_to_model(row) for row in rows]
+        return [self._row_to_partial(row, selected_fields) for row in rows]  # type: ignore[misc]
 
+    @cached()
     def get(
         self,
         card_number: str,
     ) -> CustomerCard:
+        if (customer_card := self._get_identity(card_number)) is not None:
+            return customer_card
+
         rows = self._db.execute(
             f"""
                 SELECT {", ".join(self._fields)}
@@ -146,8 +162,17 @@ class CustomerCardRepository(PydanticDBRepository[CustomerCard]):
         )
         if not rows:
             raise ValueError(f"Customer card with card_number {card_number} not found")
-        return self._row_to_model(rows[0])
+        return self._load(rows[0])
+
+    def get_many_by_card_number(
+        self, card_numbers: list[str]
+    ) -> dict[str, CustomerCard]:
+        return self._get_many_by_pk(card_numbers)
 
+    @cached_report(
+        depends_on=("customer_card", "category", "product", "store_product"),
+        period_end="end_date",
+    )
     def get_card_sold_categories(
         self,
         *,
@@ -1,8 +1,9 @@
 from datetime import date, datetime
-from typing import Literal, Optional
+from typing import Collection, Literal, Optional
 
 import structlog
 
+from ...cache import cached_report
 from ..schemas.employee import (
     CreateEmployee,
     Employee,
@@ -17,6 +18,7 @@ logger = structlog.get_logger(__name__)
 class EmployeeRepository(PydanticDBRepository[Employee]):
     table_name = "employee"
     model = Employee
+    pk_field = "id_employee"
 
     def get_all(
         self,
@@ -33,7 +35,9 @@ class EmployeeRepository(PydanticDBRepository[Employee]):
             "date_of_start",
         ] = "empl_surname",
         sort_order: Literal["asc", "desc"] = "asc",
+        fields: Optional[Collection[str]] = None,
     ) -> list[Employee]:
+        selected_fields = self._select_fields(fields)
         where_clauses = []
         params = []
 
@@ -50,7 +54,7 @@ class EmployeeRepository(PydanticDBRepository[Employee]):
         params.extend(limit_params)
 
         query = f"""
-            SELECT {", ".join(self._fields)}
+            SELECT {", ".join(selected_fields)}
             FROM {self.table_name}
             {where_clause}
             ORDER BY {sort_by} {sort_order}
@@ -60,9 +64,14 @@ class EmployeeRepository(PydanticDBRepository[Employee]):
         logger.debug(f"Executing query: {query}")
         logger.debug(f"Parameters: {params}")
         rows = self._db.execute(query, tuple(params))
-        return [self._row_to_model(row) for row in rows]
+        if fields is None:
+            return [self._row_to_model(row) for row in rows]
+        return [self._row_to_partial(row, selected_fields) for row in rows]  # type: ignore[misc]
 
     def get_by_id(self, id_employee: str) -> Employee | None:
+        if (employee := self._get_identity(id_employee)) is not None:
+            return employee
+
         rows = self._db.execute(
             f"""
                 SELECT {", ".join(self._fields)}
@@ -71,7 +80,10 @@ class EmployeeRepository(PydanticDBRepository[Employee]):
                 """,
             (id_employee,),
         )
-        return self._row_to_model(rows[0]) if rows else None
+        return self._load(rows[0]) if rows else None
+
+    def get_many_by_id(self, employee_ids: list[str]) -> dict[str, Employee]:
+        return self._get_many_by_pk(employee_ids)
 
     def create(self, emp: CreateEmployee) -> Employee:
         rows = self._db.execute(
@@ -82,7 +94,7 @@ class EmployeeRepository(PydanticDBRepository[Employee]):
                 """,
             tuple(emp.model_dump().values()),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
 
     def update(self, id_employee: str, emp: UpdateEmployee) -> Employee:
         set_clause = ", ".join(
@@ -102,7 +114,7 @@ class EmployeeRepository(PydanticDBRepository[Employee]):
                 """,
             tuple(values),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
 
     def delete(self, id_employee: str) -> None:
         result = self._db.execute(
@@ -111,6 +123,7 @@ class EmployeeRepository(PydanticDBRepository[Employee]):
         )
         if not result:
             raise Exception(f"Employee with id '{id_employee}' not found")
+        self._evict(id_employee)
 
     def delete_multiple(self, employee_ids: list[str]) -> None:
         if not employee_ids:
@@ -138,7 +151,9 @@ class EmployeeRepository(PydanticDBRepository[Employee]):
             """,
             tuple(employee_ids),
         )
+        self._evict(*employee_ids)
 
+    @cached_report(depends_on=("product", "store_product"))
     def get_employee_statistics(self, id_employee: str) -> EmployeeWorkStatistics:
         basic_stats_query = """
             SELECT 
@@ -224,6 +239,7 @@ class EmployeeRepository(PydanticDBRepository[Employee]):
             most_sold_product_quantity=most_sold_product_quantity,
         )
 
+    @cached_report(depends_on=("employee", "store_product"))
     def get_employees_only_with_promotional_sales(self) -> list[Employee]:
         fields = ",".join(self._fields)
         role = "cashier"
@@ -0,0 +1,117 @@
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+import structlog
+
+from ..schemas.idempotency import IdempotencyRecord
+from ._base import PydanticDBRepository
+
+logger = structlog.get_logger(__name__)
+
+
+class IdempotencyKeyRepository(PydanticDBRepository[IdempotencyRecord]):
+    table_name = "idempotency_key"
+    model = IdempotencyRecord
+
+    def get(
+        self, user_id: int, key: str, created_after: datetime
+    ) -> Optional[IdempotencyRecord]:
+        rows = self._db.execute(
+            f"""
+            SELECT {", ".join(self._fields)}
+            FROM {self.table_name}
+            WHERE user_id = %s AND key = %s AND created_at > %s
+            """,
+            (user_id, key, created_after),
+        )
+        return self._row_to_model(rows[0]) if rows else None
+
+    def claim(
+        self,
+        record: IdempotencyRecord,
+        expired_before: datetime,
+        abandoned_before: datetime,
+    ) -> bool:
+        """
+        Stores a key for a request that is about to run. A key created before
+        `expired_before`, or still uncompleted since before `abandoned_before`,
+        is taken over.
+
+        Returns:
+            bool: False when another unexpired request already holds the key.
+        """
+        rows = self._db.execute(
+            f"""
+            INSERT INTO {self.table_name} (user_id, key, request_hash, created_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (user_id, key) DO UPDATE
+            SET request_hash = EXCLUDED.request_hash,
+                status_code = NULL,
+                response = NULL,
+                created_at = EXCLUDED.created_at
+            WHERE {self.table_name}.created_at <= %s
+                OR (
+                    {self.table_name}.status_code IS NULL
+                    AND {self.table_name}.created_at <= %s
+                )
+            RETURNING user_id
+            """,
+            (
+                record.user_id,
+                record.key,
+                record.request_hash,
+                record.created_at,
+                expired_before,
+                abandoned_before,
+            ),
+        )
+        return bool(rows)
+
+    def complete(
+        self, claim: IdempotencyRecord, status_code: int, response: Any
+    ) -> bool:
+        """
+        Stores the response of a claimed key.
+
+        Returns:
+            bool: False when the claim was taken over in the meantime.
+        """
+        rows = self._db.execute(
+            f"""
+            UPDATE {self.table_name}
+            SET status_code = %s, response = %s::jsonb
+            WHERE user_id = %s AND key = %s AND created_at = %s
+                AND status_code IS NULL
+            RETURNING user_id
+            """,
+            (
+                status_code,
+                json.dumps(response),
+                claim.user_id,
+                claim.key,
+                claim.created_at,
+            ),
+        )
+        return bool(rows)
+
+    def delete(self, claim: IdempotencyRecord) -> None:
+        """Deletes a claimed key, unless it was taken over in the meantime."""
+        self._db.execute(
+            f"""
+            DELETE FROM {self.table_name}
+            WHERE user_id = %s AND key = %s AND created_at = %s
+            """,
+            (claim.user_id, claim.key, claim.created_at),
+        )
+
+    def purge(self, expired_before: datetime) -> int:
+        rows = self._db.execute(
+            f"""
+            DELETE FROM {self.table_name}
+            WHERE created_at <= %s
+            RETURNING user_id
+            """,
+            (expired_before,),
+        )
+        return len(rows)
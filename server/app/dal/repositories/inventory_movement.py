@@ -0,0 +1,193 @@
+from typing import Optional
+
+import structlog
+
+from ..schemas.inventory_movement import (
+    CreateInventoryMovement,
+    InventoryMovement,
+    InventoryMovementKind,
+    StockLevel,
+)
+from ._base import PydanticDBRepository
+from .store_product import StoreProductRepository
+
+logger = structlog.get_logger(__name__)
+
+
+class InventoryMovementRepository(PydanticDBRepository[InventoryMovement]):
+    """
+    Append-only ledger of stock changes. Current stock is the store product's
+    snapshot plus the movements recorded after it, see `store_product_stock`.
+
+    Writers must hold the lock of the store products they record movements for
+    (`StoreProductRepository.lock_stock`), so that compaction never folds a
+    movement while an earlier one is still uncommitted.
+    """
+
+    table_name = "inventory_movement"
+    model = InventoryMovement
+    pk_field = "movement_id"
+
+    def get_by_upc(
+        self,
+        upc: str,
+        skip: int = 0,
+        limit: Optional[int] = 10,
+        kind: Optional[InventoryMovementKind] = None,
+    ) -> list[InventoryMovement]:
+        where_clause = "WHERE UPC = %s"
+        params: list = [upc]
+        if kind is not None:
+            where_clause += " AND kind = %s"
+            params.append(kind)
+
+        limit_clause, limit_params = self._build_pagination_clause(skip, limit)
+        params.extend(limit_params)
+
+        rows = self._db.execute(
+            f"""
+            SELECT {", ".join(self._fields)}
+            FROM {self.table_name}
+            {where_clause}
+            ORDER BY movement_id DESC
+            {limit_clause}
+            """,
+            tuple(params),
+        )
+        return [self._row_to_model(row) for row in rows]
+
+    def get_total_count(
+        self, upc: str, kind: Optional[InventoryMovementKind] = None
+    ) -> int:
+        where_clause = "WHERE UPC = %s"
+        params: list = [upc]
+        if kind is not None:
+            where_clause += " AND kind = %s"
+            params.append(kind)
+
+        rows = self._db.execute(
+            f"SELECT COUNT(*) FROM {self.table_name} {where_clause}", tuple(params)
+        )
+        return rows[0][0]
+
+    def get_stock(self, upc: str) -> Optional[StockLevel]:
+        rows = self._db.execute(
+            f"""
+            SELECT
+                sp.UPC,
+                sp.products_number + COALESCE(SUM(im.quantity), 0),
+                sp.products_number,
+                COUNT(im.movement_id),
+                (
+                    SELECT COALESCE(SUM(r.quantity), 0)
+                    FROM stock_reservation r
+                    WHERE r.UPC = sp.UPC AND r.expires_at > now()
+                )
+            FROM store_product sp
+            LEFT JOIN {self.table_name} im
+                ON im.UPC = sp.UPC AND im.movement_id > sp.stock_movement_id
+            WHERE sp.UPC = %s
+            GROUP BY sp.UPC, sp.products_number
+            """,
+            (upc,),
+        )
+        if not rows:
+            return None
+        upc, products_number, snapshot_products_number, pending_movements, reserved = (
+            rows[0]
+        )
+        return StockLevel(
+            UPC=upc,
+            products_number=products_number,
+            snapshot_products_number=snapshot_products_number,
+            pending_movements=pending_movements,
+            reserved=reserved,
+            available=products_number - reserved,
+        )
+
+    def create_multiple(
+        self, movements: list[CreateInventoryMovement]
+    ) -> list[InventoryMovement]:
+        if not movements:
+            return []
+
+        rows = self._db.execute(
+            f"""
+            INSERT INTO {self.table_name} (UPC, kind, quantity, check_number)
+            SELECT *
+            FROM unnest(%s::varchar[], %s::varchar[], %s::int[], %s::varchar[])
+            RETURNING {", ".join(self._fields)}
+            """,
+            (
+                [movement.UPC for movement in movements],
+                [movement.kind for movement in movements],
+                [movement.quantity for movement in movements],
+                [movement.check_number for movement in movements],
+            ),
+        )
+
+        # * Keep mapped store products in sync instead of re-reading them
+        for movement in movements:
+            store_product = self._unit_of_work.get(
+                StoreProductRepository.table_name, movement.UPC
+            )
+            if store_product is not None:
+                self._unit_of_work.replace(
+                    StoreProductRepository.table_name,
+                    movement.UPC,
+                    store_product.model_copy(
+                        update={
+                            "products_number": store_product.products_number  # type: ignore[attr-defined]
+                            + movement.quantity
+                        }
+                    ),
+                )
+
+        return [self._row_to_model(row) for row in rows]
+
+    def get_pending_upcs(self) -> list[str]:
+        """UPCs with movements recorded after their snapshot."""
+        rows = self._db.execute(
+            f"""
+            SELECT sp.UPC
+            FROM store_product sp
+            WHERE EXISTS (
+                SELECT 1
+                FROM {self.table_name} im
+                WHERE im.UPC = sp.UPC AND im.movement_id > sp.stock_movement_id
+            )
+            ORDER BY sp.UPC
+            """
+        )
+        return [row[0] for row in rows]
+
+    def compact(self, upcs: list[str]) -> int:
+        """
+        Folds the movements recorded after the snapshot of each store product into
+        it. Must run inside a transaction after the store products are locked.
+
+        Returns:
+            int: the number of store products whose snapshot moved.
+        """
+        rows = self._db.execute(
+            f"""
+            WITH pending AS (
+                SELECT
+                    im.UPC,
+                    SUM(im.quantity) AS quantity,
+                    MAX(im.movement_id) AS movement_id
+                FROM {self.table_name} im
+                JOIN store_product sp ON sp.UPC = im.UPC
+                WHERE im.UPC = ANY(%s) AND im.movement_id > sp.stock_movement_id
+                GROUP BY im.UPC
+            )
+            UPDATE store_product sp
+            SET products_number = sp.products_number + p.quantity,
+                stock_movement_id = p.movement_id
+            FROM pending p
+            WHERE sp.UPC = p.UPC
+            RETURNING sp.UPC
+            """,
+            (upcs,),
+        )
+        return len(rows)
@@ -1,9 +1,16 @@
-from typing import Literal, Optional
+from typing import Collection, Literal, Optional
 
 import structlog
 
-from ...db.connection._base import IDatabase
-from ..schemas.product import CreateProduct, Product, UpdateProduct
+from ...cache import cached, invalidates
+from ..schemas.category import Category
+from ..schemas.product import (
+    CreateProduct,
+    ExpandedProduct,
+    Product,
+    ProductExpand,
+    UpdateProduct,
+)
 from ._base import PydanticDBRepository
 
 logger = structlog.get_logger(__name__)
@@ -12,10 +19,9 @@ logger = structlog.get_logger(__name__)
 class ProductRepository(PydanticDBRepository[Product]):
     table_name = "product"
     model = Product
+    pk_field = "id_product"
 
-    def __init__(self, db: IDatabase):
-        self._db = db
-
+    @cached(depends_on=("category",))
     def get_all(
         self,
         skip: int = 0,
@@ -26,18 +32,31 @@ class ProductRepository(PydanticDBRepository[Product]):
         ] = "id_product",
         sort_order: Literal["asc", "desc"] = "asc",
         category_number: Optional[int] = None,
+        product_ids: Optional[list[int]] = None,
+        expand: Collection[ProductExpand] = (),
+        fields: Optional[Collection[str]] = None,
     ) -> list[Product]:
+        """
+        With `expand=["category"]` the category is joined in the same query and
+        `ExpandedProduct` instances are returned. With `fields` only those columns
+        are selected and partial models returned.
+        """
+        selected_fields = self._select_fields(fields)
         where_clauses = []
         params = []
 
         if search:
-            where_clauses.append("product_name ILIKE %s")
+            where_clauses.append("p.product_name ILIKE %s")
             params.append(f"%{search}%")
 
         if category_number is not None:
-            where_clauses.append("category_number = %s")
+            where_clauses.append("p.category_number = %s")
             params.append(category_number)
 
+        if product_ids is not None:
+            where_clauses.append("p.id_product = ANY(%s)")
+            params.append(product_ids)
+
         where_clause = ""
         if where_clauses:
             where_clause = "WHERE " + " AND ".join(where_clauses)
@@ -45,19 +64,45 @@ class ProductRepository(PydanticDBRepository[Product]):
         limit_clause, limit_params = self._build_pagination_clause(skip, limit)
         params.extend(limit_params)
 
+        select_columns = [f"p.{field}" for field in selected_fields]
+        join_clause = ""
+        if "category" in expand:
+            select_columns += self._related_columns("c", Category)
+            join_clause = (
+                "LEFT JOIN category c ON p.category_number = c.category_number"
+            )
+
         query = f"""
-            SELECT {", ".join(self._fields)}
-            FROM {self.table_name}
+            SELECT {", ".join(select_columns)}
+            FROM {self.table_name} p
+            {join_clause}
             {where_clause}
-            ORDER BY {sort_by} {sort_order.upper()}
+            ORDER BY p.{sort_by} {sort_order.upper()}
             {limit_clause}
         """
 
         rows = self._db.execute(query, tuple(params))
-        return [self._row_to_model(row) for row in rows]
-
+        if not expand and fields is None:
+            return [self._row_to_model(row) for row in rows]
+
+        products = []
+        for row in rows:
+            related = {}
+            if "category" in expand:
+                related["category"], _ = self._row_to_related(
+                    row, len(selected_fields), Category
+                )
+            products.append(
+                self._row_to_partial(row, selected_fields, ExpandedProduct, **related)
+            )
+        return products  # type: ignore[return-value]
+
+    @cached()
     def get_total_count(
-        self, search: Optional[str] = None, category_number: Optional[int] = None
+        self,
+        search: Optional[str] = None,
+        category_number: Optional[int] = None,
+        product_ids: Optional[list[int]] = None,
     ) -> int:
         where_clauses = []
         params = []
@@ -70,6 +115,10 @@ class ProductRepository(PydanticDBRepository[Product]):
             where_clauses.append("category_number = %s")
             params.append(category_number)
 
+        if product_ids is not None:
+            where_clauses.append("id_product = ANY(%s)")
+            params.append(product_ids)
+
         where_clause = ""
         if where_clauses:
             where_clause = "WHERE " + " AND ".join(where_clauses)
@@ -83,7 +132,11 @@ class ProductRepository(PydanticDBRepository[Product]):
         rows = self._db.execute(query, tuple(params))
         return rows[0][0] if rows else 0
 
+    @cached()
     def get_by_id(self, id_product: int) -> Product | None:
+        if (product := self._get_identity(id_product)) is not None:
+            return product
+
         rows = self._db.execute(
             f"""
                 SELECT {", ".join(self._fields)}
@@ -92,8 +145,13 @@ class ProductRepository(PydanticDBRepository[Product]):
             """,
             (id_product,),
         )
-        return self._row_to_model(rows[0]) if rows else None
+        return self._load(rows[0]) if rows else None
 
+    @cached()
+    def get_many_by_id(self, product_ids: list[int]) -> dict[int, Product]:
+        return self._get_many_by_pk(product_ids)
+
+    @invalidates
     def create(self, create_product: CreateProduct) -> Product:
         rows = self._db.execute(
             f"""
@@ -107,13 +165,18 @@ class ProductRepository(PydanticDBRepository[Product]):
                 create_product.characteristics,
             ),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
 
+    @invalidates
     def update(
         self,
         id_product: int,
         update_product: UpdateProduct,
     ) -> Product:
+        product = Product(**{**update_product.model_dump(), "id_product": id_product})
+        if self._update_deferred(id_product, product):
+            return product
+
         rows = self._db.execute(
             f"""
                 UPDATE {self.table_name}
@@ -128,8 +191,9 @@ class ProductRepository(PydanticDBRepository[Product]):
                 id_product,
             ),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
 
+    @invalidates
     def delete(self, id_product: int) -> None:
         self._db.execute(
             f"""
@@ -138,7 +202,9 @@ class ProductRepository(PydanticDBRepository[Product]):
             """,
             (id_product,),
         )
+        self._evict(id_product)
 
+    @invalidates
     def delete_multiple(self, product_ids: list[int]) -> None:
         if not product_ids:
             return
@@ -150,3 +216,4 @@ class ProductRepository(PydanticDBRepository[Product]):
             """,
             (product_ids,),
         )
+        self._evict(*product_ids)
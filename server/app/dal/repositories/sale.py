@@ -1,8 +1,10 @@
-from typing import Iterable, List
+from typing import Collection, Iterable, List
 
 import structlog
 
-from ..schemas.sale import Sale
+from ..schemas.check import CheckExpand
+from ..schemas.product import Product
+from ..schemas.sale import ExpandedSale, Sale
 from ._base import PydanticDBRepository
 
 logger = structlog.get_logger(__name__)
@@ -12,16 +14,54 @@ class SaleRepository(PydanticDBRepository[Sale]):
     table_name = "sale"
     model = Sale
 
-    def get_by_check(self, check_number: str) -> List[Sale]:
+    def get_by_check(
+        self, check_number: str, expand: Collection[CheckExpand] = ()
+    ) -> List[Sale]:
+        return self.get_by_checks([check_number], expand).get(check_number, [])
+
+    def get_by_checks(
+        self, check_numbers: list[str], expand: Collection[CheckExpand] = ()
+    ) -> dict[str, List[Sale]]:
+        """Sales of several checks in one query, grouped by check number."""
+        if not check_numbers:
+            return {}
+
+        sales: dict[str, List[Sale]] = {}
+        if "sales.product" in expand:
+            rows = self._db.execute(
+                f"""
+                SELECT {", ".join(self._related_columns("s", self.model))},
+                       {", ".join(self._related_columns("p", Product))}
+                FROM {self.table_name} s
+                LEFT JOIN store_product sp ON s.UPC = sp.UPC
+                LEFT JOIN product p ON sp.id_product = p.id_product
+                WHERE s.check_number = ANY(%s)
+                """,
+                (check_numbers,),
+            )
+            for row in rows:
+                sale = self._row_to_expanded(row)
+                sales.setdefault(sale.check_number, []).append(sale)
+            return sales
+
         rows = self._db.execute(
             f"""
             SELECT {", ".join(self._fields)}
             FROM {self.table_name}
-            WHERE check_number = %s
+            WHERE check_number = ANY(%s)
             """,
-            (check_number,),
+            (check_numbers,),
+        )
+        for row in rows:
+            sale = self._row_to_model(row)
+            sales.setdefault(sale.check_number, []).append(sale)
+        return sales
+
+    def _row_to_expanded(self, row: tuple) -> ExpandedSale:
+        product, _ = self._row_to_related(row, len(self._fields), Product)
+        return ExpandedSale(
+            **dict(zip(self._fields, row[: len(self._fields)])), product=product
         )
-        return [self._row_to_model(row) for row in rows]
 
     def create(self, sale: Sale) -> Sale:
         rows = self._db.execute(
@@ -0,0 +1,186 @@
+from datetime import timedelta
+from typing import Collection, Optional
+from uuid import UUID
+
+import structlog
+
+from ..schemas.stock_reservation import StockReservation
+from ._base import PydanticDBRepository
+
+logger = structlog.get_logger(__name__)
+
+
+class StockReservationRepository(PydanticDBRepository[StockReservation]):
+    """
+    Holds placed on stock by open carts. A hold counts until `expires_at`; the
+    rows of expired holds are only cleaned up lazily. A cart belongs to the
+    employee who placed its holds, and only they can read or change them.
+    """
+
+    table_name = "stock_reservation"
+    model = StockReservation
+
+    def get_by_cart(self, cart_id: UUID, id_employee: str) -> list[StockReservation]:
+        rows = self._db.execute(
+            f"""
+            SELECT {", ".join(self._fields)}
+            FROM {self.table_name}
+            WHERE cart_id = %s AND id_employee = %s AND expires_at > now()
+            ORDER BY UPC
+            """,
+            (str(cart_id), id_employee),
+        )
+        return [self._row_to_model(row) for row in rows]
+
+    def get_owner(self, cart_id: UUID) -> Optional[str]:
+        """The employee holding stock in a cart, None for a new cart."""
+        rows = self._db.execute(
+            f"SELECT id_employee FROM {self.table_name} WHERE cart_id = %s LIMIT 1",
+            (str(cart_id),),
+        )
+        return rows[0][0] if rows else None
+
+    def get_by_carts(self, cart_ids: Collection[UUID]) -> list[StockReservation]:
+        if not cart_ids:
+            return []
+
+        rows = self._db.execute(
+            f"""
+            SELECT {", ".join(self._fields)}
+            FROM {self.table_name}
+            WHERE cart_id = ANY(%s::uuid[]) AND expires_at > now()
+            """,
+            ([str(cart_id) for cart_id in cart_ids],),
+        )
+        return [self._row_to_model(row) for row in rows]
+
+    def get_reserved(self, upcs: list[str]) -> dict[str, int]:
+        """Units under active holds of each UPC."""
+        rows = self._db.execute(
+            f"""
+            SELECT UPC, SUM(quantity)
+            FROM {self.table_name}
+            WHERE UPC = ANY(%s) AND expires_at > now()
+            GROUP BY UPC
+            """,
+            (upcs,),
+        )
+        return {upc: reserved for upc, reserved in rows}
+
+    def reserve(
+        self,
+        cart_id: UUID,
+        id_employee: str,
+        upc: str,
+        quantity: int,
+        ttl: timedelta,
+    ) -> tuple[Optional[StockReservation], Optional[int]]:
+        """
+        Sets the hold of an employee's cart on a UPC to `quantity` units, if that
+        many are available: current stock minus the active holds of other carts.
+        Expired holds of the UPC are dropped on the way. Must run inside a
+        transaction after the store product is locked.
+
+        Returns:
+            tuple: the hold, or None when too few units are available, and the
+                available units, or None when the store product does not exist.
+        """
+        rows = self._db.execute(
+            f"""
+            WITH purged AS (
+                DELETE FROM {self.table_name}
+                WHERE UPC = %s AND expires_at <= now() AND cart_id <> %s
+            ),
+            available AS (
+                SELECT s.products_number - COALESCE(
+                    (
+                        SELECT SUM(r.quantity)
+                        FROM {self.table_name} r
+                        WHERE r.UPC = s.UPC
+                            AND r.expires_at > now()
+                            AND r.cart_id <> %s
+                    ),
+                    0
+                ) AS units
+                FROM store_product_stock s
+                WHERE s.UPC = %s
+            ),
+            held AS (
+                INSERT INTO {self.table_name}
+                    (cart_id, id_employee, UPC, quantity, expires_at)
+                SELECT %s, %s, %s, %s, now() + %s
+                FROM available
+                WHERE units >= %s
+                ON CONFLICT (cart_id, UPC) DO UPDATE
+                SET quantity = EXCLUDED.quantity, expires_at = EXCLUDED.expires_at
+                WHERE {self.table_name}.id_employee = EXCLUDED.id_employee
+                RETURNING {", ".join(self._fields)}
+            )
+            SELECT (SELECT units FROM available), h.*
+            FROM (SELECT 1) AS one
+            LEFT JOIN held h ON true
+            """,
+            (
+                upc,
+                str(cart_id),
+                str(cart_id),
+                upc,
+                str(cart_id),
+                id_employee,
+                upc,
+                quantity,
+                ttl,
+                quantity,
+            ),
+        )
+        available, *hold = rows[0]
+        if hold[0] is None:
+            return None, available
+        return self._row_to_model(tuple(hold)), available
+
+    def refresh(self, cart_id: UUID, id_employee: str, ttl: timedelta) -> None:
+        """Extends the active holds of a cart that is still being scanned."""
+        self._db.execute(
+            f"""
+            UPDATE {self.table_name}
+            SET expires_at = now() + %s
+            WHERE cart_id = %s AND id_employee = %s AND expires_at > now()
+            """,
+            (ttl, str(cart_id), id_employee),
+        )
+
+    def release_many(self, carts: Collection[tuple[UUID, str]]) -> None:
+        """Drops all holds of `(cart_id, id_employee)` carts."""
+        if not carts:
+            return
+
+        self._db.execute(
+            f"""
+            DELETE FROM {self.table_name} r
+            USING unnest(%s::uuid[], %s::varchar[]) AS c(cart_id, id_employee)
+            WHERE r.cart_id = c.cart_id AND r.id_employee = c.id_employee
+            """,
+            (
+                [str(cart_id) for cart_id, _ in carts],
+                [id_employee for _, id_employee in carts],
+            ),
+        )
+
+    def release(
+        self, cart_id: UUID, id_employee: str, upc: Optional[str] = None
+    ) -> None:
+        """Drops the hold of a cart on one UPC, or all of its holds."""
+        if upc is None:
+            self._db.execute(
+                f"DELETE FROM {self.table_name} WHERE cart_id = %s AND id_employee = %s",
+                (str(cart_id), id_employee),
+            )
+            return
+
+        self._db.execute(
+            f"""
+            DELETE FROM {self.table_name}
+            WHERE cart_id = %s AND id_employee = %s AND UPC = %s
+            """,
+            (str(cart_id), id_employee, upc),
+        )
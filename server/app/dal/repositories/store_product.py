@@ -1,9 +1,17 @@
-from typing import Literal, Optional
+from typing import Collection, Literal, Optional
 
 import structlog
 
-from ...db.connection._base import IDatabase
-from ..schemas.store_product import CreateStoreProduct, StoreProduct, UpdateStoreProduct
+from ..schemas.category import Category
+from ..schemas.product import Product
+from ..schemas.store_product import (
+    CreateStoreProduct,
+    ExpandedStoreProduct,
+    ScannedProduct,
+    StoreProduct,
+    StoreProductExpand,
+    UpdateStoreProduct,
+)
 from ._base import PydanticDBRepository
 
 logger = structlog.get_logger(__name__)
@@ -11,10 +19,22 @@ logger = structlog.get_logger(__name__)
 
 class StoreProductRepository(PydanticDBRepository[StoreProduct]):
     table_name = "store_product"
+    view_name = "store_product_stock"
     model = StoreProduct
+    pk_field = "UPC"
+    derived_fields = ("products_number",)
 
-    def __init__(self, db: IDatabase):
-        self._db = db
+    # * Stock is the snapshot plus the ledger movements recorded after it
+    CURRENT_STOCK = """
+        sp.products_number + COALESCE(
+            (
+                SELECT SUM(im.quantity)
+                FROM inventory_movement im
+                WHERE im.UPC = sp.UPC AND im.movement_id > sp.stock_movement_id
+            ),
+            0
+        )
+    """
 
     def get_all(
         self,
@@ -31,7 +51,16 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
         sort_order: Literal["asc", "desc"] = "asc",
         promotional_only: Optional[bool] = None,
         id_product: Optional[int] = None,
+        upcs: Optional[list[str]] = None,
+        expand: Collection[StoreProductExpand] = (),
+        fields: Optional[Collection[str]] = None,
     ) -> list[StoreProduct]:
+        """
+        Relations listed in `expand` are read from the product and category joins
+        of the same query and returned as `ExpandedStoreProduct` instances.
+        With `fields` only those columns are selected and partial models returned.
+        """
+        selected_fields = self._select_fields(fields)
         where_clauses = []
         params = []
 
@@ -54,6 +83,10 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
             where_clauses.append("sp.id_product = %s")
             params.append(id_product)
 
+        if upcs is not None:
+            where_clauses.append("sp.UPC = ANY(%s)")
+            params.append(upcs)
+
         where_clause = ""
         if where_clauses:
             where_clause = "WHERE " + " AND ".join(where_clauses)
@@ -61,9 +94,15 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
         limit_clause, limit_params = self._build_pagination_clause(skip, limit)
         params.extend(limit_params)
 
+        select_columns = [f"sp.{field}" for field in selected_fields]
+        if "product" in expand:
+            select_columns += self._related_columns("p", Product)
+        if "category" in expand:
+            select_columns += self._related_columns("c", Category)
+
         query = f"""
-            SELECT {", ".join([f"sp.{field}" for field in self._fields])}
-            FROM {self.table_name} sp
+            SELECT {", ".join(select_columns)}
+            FROM {self.view_name} sp
             LEFT JOIN product p ON sp.id_product = p.id_product
             LEFT JOIN category c ON p.category_number = c.category_number
             {where_clause}
@@ -72,13 +111,31 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
         """
 
         rows = self._db.execute(query, tuple(params))
-        return [self._row_to_model(row) for row in rows]
+        if not expand and fields is None:
+            return [self._row_to_model(row) for row in rows]
+        return [self._row_to_expanded(row, selected_fields, expand) for row in rows]
+
+    def _row_to_expanded(
+        self,
+        row: tuple,
+        fields: list[str],
+        expand: Collection[StoreProductExpand],
+    ) -> StoreProduct:
+        offset = len(fields)
+        related = {}
+        if "product" in expand:
+            related["product"], offset = self._row_to_related(row, offset, Product)
+        if "category" in expand:
+            related["category"], offset = self._row_to_related(row, offset, Category)
+
+        return self._row_to_partial(row, fields, ExpandedStoreProduct, **related)  # type: ignore[return-value]
 
     def get_total_count(
         self,
         search: Optional[str] = None,
         promotional_only: Optional[bool] = None,
         id_product: Optional[int] = None,
+        upcs: Optional[list[str]] = None,
     ) -> int:
         where_clauses = []
         params = []
@@ -101,6 +158,10 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
             where_clauses.append("sp.id_product = %s")
             params.append(id_product)
 
+        if upcs is not None:
+            where_clauses.append("sp.UPC = ANY(%s)")
+            params.append(upcs)
+
         where_clause = ""
         if where_clauses:
             where_clause = "WHERE " + " AND ".join(where_clauses)
@@ -117,15 +178,55 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
         return rows[0][0] if rows else 0
 
     def get_by_upc(self, upc: str) -> StoreProduct | None:
+        if (store_product := self._get_identity(upc)) is not None:
+            return store_product
+
         rows = self._db.execute(
             f"""
                 SELECT {", ".join(self._fields)}
-                FROM {self.table_name}
+                FROM {self.view_name}
                 WHERE UPC = %s
             """,
             (upc,),
         )
-        return self._row_to_model(rows[0]) if rows else None
+        return self._load(rows[0]) if rows else None
+
+    def get_many_by_upc(self, upcs: list[str]) -> dict[str, StoreProduct]:
+        return self._get_many_by_pk(upcs)
+
+    def lock_stock(self, upcs: list[str]) -> None:
+        """
+        Locks store products against stock changes of concurrent transactions,
+        in UPC order so that they lock rows in the same order. Must run inside a
+        transaction, and before stock is read: a statement that waited for the
+        lock would still see the stock as of its own start.
+
+        FOR NO KEY UPDATE leaves the rows free for inserts referencing them.
+        """
+        self._db.execute(
+            f"""
+                SELECT UPC
+                FROM {self.table_name}
+                WHERE UPC = ANY(%s)
+                ORDER BY UPC
+                FOR NO KEY UPDATE
+            """,
+            (upcs,),
+        )
+
+    def lock_many_by_upc(self, upcs: list[str]) -> dict[str, StoreProduct]:
+        """Locks store products with `lock_stock` and reads their current stock."""
+        self.lock_stock(upcs)
+        rows = self._db.execute(
+            f"""
+                SELECT {", ".join(self._fields)}
+                FROM {self.view_name}
+                WHERE UPC = ANY(%s)
+            """,
+            (upcs,),
+        )
+        store_products = [self._store(self._row_to_model(row)) for row in rows]
+        return {store_product.UPC: store_product for store_product in store_products}
 
     def get_regular_product_for_product_id(
         self, id_product: int
@@ -134,12 +235,12 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
         rows = self._db.execute(
             f"""
                 SELECT {", ".join(self._fields)}
-                FROM {self.table_name}
+                FROM {self.view_name}
                 WHERE id_product = %s AND promotional_product = false
             """,
             (id_product,),
         )
-        return self._row_to_model(rows[0]) if rows else None
+        return self._load(rows[0]) if rows else None
 
     def get_promotional_product_for_product_id(
         self, id_product: int
@@ -148,12 +249,32 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
         rows = self._db.execute(
             f"""
                 SELECT {", ".join(self._fields)}
-                FROM {self.table_name}
+                FROM {self.view_name}
                 WHERE id_product = %s AND promotional_product = true
             """,
             (id_product,),
         )
-        return self._row_to_model(rows[0]) if rows else None
+        return self._load(rows[0]) if rows else None
+
+    def get_promotional_products_for_product_ids(
+        self, product_ids: list[int]
+    ) -> dict[int, StoreProduct]:
+        """Get the promotional store products for the given product IDs, keyed by product ID."""
+        if not product_ids:
+            return {}
+
+        rows = self._db.execute(
+            f"""
+                SELECT {", ".join(self._fields)}
+                FROM {self.view_name}
+                WHERE id_product = ANY(%s) AND promotional_product = true
+            """,
+            (list(product_ids),),
+        )
+        store_products = [self._load(row) for row in rows]
+        return {
+            store_product.id_product: store_product for store_product in store_products
+        }
 
     def create(
         self,
@@ -174,30 +295,37 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
                 create_store_product.promotional_product,
             ),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
 
     def update(
         self,
         upc: str,
         update_store_product: UpdateStoreProduct,
     ) -> StoreProduct:
+        """
+        Stock is not written, changes to it are recorded in the inventory ledger.
+        A deferred update returns `products_number` as given.
+        """
+        store_product = StoreProduct(UPC=upc, **update_store_product.model_dump())
+        if self._update_deferred(upc, store_product):
+            return store_product
+
         rows = self._db.execute(
             f"""
-                UPDATE {self.table_name}
-                SET UPC_prom = %s, id_product = %s, selling_price = %s, products_number = %s, promotional_product = %s
+                UPDATE {self.table_name} sp
+                SET UPC_prom = %s, id_product = %s, selling_price = %s, promotional_product = %s
                 WHERE UPC = %s
-                RETURNING {", ".join(self._fields)}
+                RETURNING UPC_prom, id_product, selling_price, {self.CURRENT_STOCK}, promotional_product, UPC
             """,
             (
                 update_store_product.UPC_prom,
                 update_store_product.id_product,
                 update_store_product.selling_price,
-                update_store_product.products_number,
                 update_store_product.promotional_product,
                 upc,
             ),
         )
-        return self._row_to_model(rows[0])
+        return self._store(self._row_to_model(rows[0]))
 
     def delete(self, upc: str) -> None:
         self._db.execute(
@@ -207,6 +335,7 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
             """,
             (upc,),
         )
+        self._evict(upc)
 
     def delete_multiple(self, upcs: list[str]) -> None:
         if not upcs:
@@ -219,6 +348,7 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
             """,
             (upcs,),
         )
+        self._evict(*upcs)
 
     def exists_for_product_and_promo_type(
         self,
@@ -244,12 +374,65 @@ class StoreProductRepository(PydanticDBRepository[StoreProduct]):
         count = rows[0][0] if rows else 0
         return count > 0
 
-    def reduce_inventory(self, upc: str, quantity: int) -> None:
-        self._db.execute(
+    def get_scanned(
+        self,
+        upcs: Optional[list[str]] = None,
+        product_ids: Optional[list[int]] = None,
+    ) -> list[ScannedProduct]:
+        """
+        Scan details of the store products with the given UPCs or of the given
+        products; all of them when neither is given.
+        """
+        where_clauses = []
+        params: list[list[str] | list[int]] = []
+        if upcs is not None:
+            where_clauses.append("sp.UPC = ANY(%s)")
+            params.append(upcs)
+        if product_ids is not None:
+            where_clauses.append("sp.id_product = ANY(%s)")
+            params.append(product_ids)
+        where_clause = f"WHERE {' OR '.join(where_clauses)}" if where_clauses else ""
+
+        rows = self._db.execute(
             f"""
-                UPDATE {self.table_name}
-                SET products_number = products_number - %s
-                WHERE UPC = %s
+                SELECT
+                    sp.UPC,
+                    sp.UPC_prom,
+                    p.product_name,
+                    sp.selling_price,
+                    sp.promotional_product,
+                    sp.products_number
+                FROM {self.view_name} sp
+                JOIN product p ON p.id_product = sp.id_product
+                {where_clause}
             """,
-            (quantity, upc),
+            tuple(params),
+        )
+        return [
+            ScannedProduct(
+                UPC=upc,
+                UPC_prom=upc_prom,
+                product_name=product_name,
+                selling_price=selling_price,
+                promotional_product=promotional_product,
+                products_number=products_number,
+            )
+            for (
+                upc,
+                upc_prom,
+                product_name,
+                selling_price,
+                promotional_product,
+                products_number,
+            ) in rows
+        ]
+
+    def get_catalog_version(self) -> int:
+        """The last version handed out to a change announced on `upc_catalog`."""
+        rows = self._db.execute(
+            """
+                SELECT CASE WHEN is_called THEN last_value ELSE 0 END
+                FROM upc_catalog_version_seq
+            """
         )
+        return rows[0][0]
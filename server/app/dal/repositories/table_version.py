@@ -0,0 +1,25 @@
+from typing import Collection
+
+from ._base import DBRepository
+
+
+class TableVersionRepository(DBRepository):
+    """
+    Change counters kept by database triggers, for tables read by endpoints
+    that answer conditional requests.
+    """
+
+    table_name = "table_version"
+
+    def get_versions(self, tables: Collection[str]) -> dict[str, int]:
+        """Tables without counters are left out."""
+        rows = self._db.execute(
+            f"""
+            SELECT table_name, SUM(version)
+            FROM {self.table_name}
+            WHERE table_name = ANY(%s)
+            GROUP BY table_name
+            """,
+            (list(tables),),
+        )
+        return {table_name: int(version) for table_name, version in rows}
@@ -1,9 +1,12 @@
 # ruff: noqa: F401
-from typing import Annotated, Any, Self
+from functools import cache
+from typing import Annotated, Any, Optional, Self
 
 from pydantic import (
+    BaseModel,
     GetCoreSchemaHandler,
     GetJsonSchemaHandler,
+    create_model,
 )
 from pydantic.json_schema import JsonSchemaValue
 from pydantic_core import core_schema
@@ -78,3 +81,18 @@ class _UnsetPydanticAnnotation:
 
 
 UnsetAnnotated = Annotated[Unset, _UnsetPydanticAnnotation]
+
+
+@cache
+def partial_model(model: type[BaseModel]) -> type[BaseModel]:
+    """
+    Copy of `model` with every field optional, used for sparse fieldsets.
+
+    Instances only mark the fields they were built with as set, so responses
+    serialized with `exclude_unset` contain just the selected fields.
+    """
+    fields: dict[str, Any] = {
+        name: (Optional[field.annotation], None)
+        for name, field in model.model_fields.items()
+    }
+    return create_model(f"Partial{model.__name__}", **fields)
@@ -14,6 +14,16 @@ class User(UserCreate):
     id: int
 
 
+class TokenUser(User):
+    """
+    A user as described by the claims of a token still current, without the
+    password and with the codenames of their permissions (None for superusers).
+    """
+
+    password: str | SecretStr = ""
+    permissions: frozenset[str] | None = Field(default=None, exclude=True)
+
+
 class UserUpdate(BaseModel):
     username: str | UnsetAnnotated = Field(default=UNSET)
     password: str | SecretStr | UnsetAnnotated = Field(default=UNSET)
@@ -1,9 +1,12 @@
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal, Optional
+from uuid import UUID
 
 from pydantic import BaseModel, Field, field_validator
 
-from .sale import CreateSale, Sale
+from .sale import CreateSale, ExpandedSale, Sale
+
+CheckExpand = Literal["sales.product"]
 
 
 class BaseCheck(BaseModel):
@@ -41,8 +44,64 @@ class RelationalCheck(BaseCheck):
 
 
 class CreateCheck(BaseCheck):
-    sales: list[CreateSale]
+    check_number: Optional[str] = Field(
+        default=None,
+        min_length=10,
+        max_length=10,
+        examples=["1010101010"],
+        description="Allocated by the server when omitted",
+    )
+    cart_id: Optional[UUID] = Field(
+        default=None, description="Cart whose stock holds the checkout consumes"
+    )
+    sales: list[CreateSale] = Field(min_length=1)
 
 
 class Check(RelationalCheck):
     sales: list[Sale]
+
+
+class ExpandedCheck(RelationalCheck):
+    sales: list[ExpandedSale]
+
+
+class CheckFilters(BaseModel):
+    """Filters of a check listing. Frozen, so it can serve as a cache key."""
+
+    model_config = {"frozen": True}
+
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    employee_id: Optional[str] = None
+    product_upc: Optional[str] = None
+
+
+class StockShortage(BaseModel):
+    UPC: str
+    requested: int
+    available: int
+
+
+class CheckNumberBlock(BaseModel):
+    check_numbers: list[str]
+
+
+class CheckoutResult(BaseModel):
+    check: Optional[Check] = None
+    shortages: list[StockShortage] = []
+    missing_upcs: list[str] = []
+    card_found: bool = True
+
+
+class CheckBatchItemResult(BaseModel):
+    index: int
+    check_number: Optional[str] = None
+    status: Literal["created", "rejected"]
+    error: Optional[str] = None
+    shortages: list[StockShortage] = []
+
+
+class CheckBatchResult(BaseModel):
+    created: int
+    rejected: int
+    results: list[CheckBatchItemResult]
@@ -0,0 +1,13 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+class IdempotencyRecord(BaseModel):
+    user_id: int
+    key: str = Field(max_length=255)
+    request_hash: str = Field(max_length=64)
+    status_code: Optional[int] = None
+    response: Optional[Any] = None
+    created_at: datetime
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+InventoryMovementKind = Literal["sale", "conversion", "restock", "adjustment"]
+
+
+class CreateInventoryMovement(BaseModel):
+    UPC: str = Field(min_length=12, max_length=12, examples=["036000291452"])
+    kind: InventoryMovementKind
+    quantity: int = Field(description="Units added, negative when taken off")
+    check_number: Optional[str] = Field(default=None, max_length=10)
+
+
+class InventoryMovement(CreateInventoryMovement):
+    movement_id: int
+    created_at: datetime
+
+
+class RecordInventoryMovement(BaseModel):
+    kind: Literal["restock", "adjustment"] = Field(examples=["restock"])
+    quantity: int = Field(
+        examples=[10, -2], description="Units added, negative when taken off"
+    )
+
+
+class StockLevel(BaseModel):
+    UPC: str
+    products_number: int = Field(description="Current stock")
+    snapshot_products_number: int = Field(
+        description="Stock as of the last compaction of the ledger"
+    )
+    pending_movements: int = Field(
+        description="Movements recorded since the last compaction"
+    )
+    reserved: int = Field(description="Units held by open carts")
+    available: int = Field(description="Current stock minus the held units")
@@ -1,5 +1,11 @@
+from typing import Literal, Optional
+
 from pydantic import BaseModel
 
+from .category import Category
+
+ProductExpand = Literal["category"]
+
 
 class BaseProduct(BaseModel):
     category_number: int
@@ -11,6 +17,10 @@ class Product(BaseProduct):
     id_product: int
 
 
+class ExpandedProduct(Product):
+    category: Optional[Category] = None
+
+
 class CreateProduct(BaseProduct):
     pass
 
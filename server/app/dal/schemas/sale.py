@@ -1,5 +1,9 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field, field_validator
 
+from .product import Product
+
 
 class BaseSale(BaseModel):
     UPC: str = Field(min_length=12, max_length=12, examples=["036000291452"])
@@ -20,5 +24,9 @@ class Sale(SaleWithPrice):
         return round(v, 4)
 
 
+class ExpandedSale(Sale):
+    product: Optional[Product] = None
+
+
 class CreateSale(BaseSale):
     pass
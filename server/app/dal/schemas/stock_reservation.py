@@ -0,0 +1,18 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class StockReservation(BaseModel):
+    cart_id: UUID
+    id_employee: str = Field(min_length=10, max_length=10, examples=["0000000001"])
+    UPC: str = Field(min_length=12, max_length=12, examples=["036000291452"])
+    quantity: int = Field(gt=0, examples=[1, 2, 3])
+    expires_at: datetime
+
+
+class ReserveStock(BaseModel):
+    quantity: int = Field(
+        gt=0, examples=[1, 2, 3], description="Units of the UPC in the cart"
+    )
@@ -1,6 +1,11 @@
 from typing import Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from .category import Category
+from .product import Product
+
+StoreProductExpand = Literal["product", "category"]
 
 
 class BaseStoreProduct(BaseModel):
@@ -17,6 +22,11 @@ class StoreProduct(BaseStoreProduct):
     UPC: str = Field(min_length=12, max_length=12, examples=["036000291452"])
 
 
+class ExpandedStoreProduct(StoreProduct):
+    product: Optional[Product] = None
+    category: Optional[Category] = None
+
+
 class CreateStoreProduct(StoreProduct):
     pass
 
@@ -25,6 +35,19 @@ class UpdateStoreProduct(BaseStoreProduct):
     pass
 
 
+class ScannedProduct(BaseModel):
+    """What a till needs to put a scanned item on a check."""
+
+    model_config = ConfigDict(frozen=True)
+
+    UPC: str
+    UPC_prom: Optional[str]
+    product_name: str
+    selling_price: float
+    promotional_product: bool
+    products_number: int
+
+
 class CreatePromotionalProduct(BaseModel):
     promotional_UPC: str = Field(
         min_length=12, max_length=12, examples=["036000291453"]
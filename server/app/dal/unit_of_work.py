@@ -0,0 +1,129 @@
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Generator
+from weakref import WeakKeyDictionary
+
+import structlog
+from pydantic import BaseModel
+
+from ..db.connection import IDatabase, transaction
+
+if TYPE_CHECKING:
+    from .repositories._base import PydanticDBRepository
+
+logger = structlog.get_logger(__name__)
+
+IdentityKey = tuple[str, Any]
+
+
+class UnitOfWork:
+    """
+    Identity map and pending writes of a single database connection.
+
+    Every repository built from the same `IDatabase` shares one instance, so a
+    row fetched by primary key in one place of a request is returned from memory
+    everywhere else. Inside `unit_of_work()` updates are only registered as dirty
+    and written in one batch when the unit of work completes.
+    """
+
+    _instances: "WeakKeyDictionary[IDatabase, UnitOfWork]" = WeakKeyDictionary()
+
+    def __init__(self):
+        self._identity_map: dict[IdentityKey, BaseModel] = {}
+        self._dirty: dict[IdentityKey, tuple["PydanticDBRepository", BaseModel]] = {}
+        self._after_commit: list[Callable[[], None]] = []
+        self._depth = 0
+
+    @classmethod
+    def for_database(cls, db: IDatabase) -> "UnitOfWork":
+        uow = cls._instances.get(db)
+        if uow is None:
+            uow = cls._instances[db] = cls()
+        return uow
+
+    @property
+    def active(self) -> bool:
+        return self._depth > 0
+
+    def get(self, table_name: str, pk: Any) -> BaseModel | None:
+        return self._identity_map.get((table_name, pk))
+
+    def register(self, table_name: str, pk: Any, instance: BaseModel) -> BaseModel:
+        """Stores a loaded instance, returning the one already mapped if present."""
+        return self._identity_map.setdefault((table_name, pk), instance)
+
+    def replace(self, table_name: str, pk: Any, instance: BaseModel) -> None:
+        key = (table_name, pk)
+        self._identity_map[key] = instance
+        if key in self._dirty:
+            self._dirty[key] = (self._dirty[key][0], instance)
+
+    def register_dirty(
+        self, repo: "PydanticDBRepository", pk: Any, instance: BaseModel
+    ) -> None:
+        key = (repo.table_name, pk)
+        self._identity_map[key] = instance
+        self._dirty[key] = (repo, instance)
+
+    def evict(self, table_name: str, pk: Any) -> None:
+        self._identity_map.pop((table_name, pk), None)
+        self._dirty.pop((table_name, pk), None)
+
+    def evict_table(self, table_name: str) -> None:
+        for key in [key for key in self._identity_map if key[0] == table_name]:
+            self.evict(*key)
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Runs `callback` once the transaction commits; never if it rolls back."""
+        self._after_commit.append(callback)
+
+    def flush(self) -> None:
+        """Writes every dirty instance, one statement batch per repository."""
+        pending: dict[type, tuple["PydanticDBRepository", list[BaseModel]]] = {}
+        for repo, instance in self._dirty.values():
+            pending.setdefault(type(repo), (repo, []))[1].append(instance)
+        self._dirty.clear()
+
+        for repo, instances in pending.values():
+            logger.debug("flush", table=repo.table_name, count=len(instances))
+            repo._flush(instances)
+
+    def clear(self) -> None:
+        self._identity_map.clear()
+        self._dirty.clear()
+        self._after_commit.clear()
+
+    @contextmanager
+    def _scope(self) -> Generator[None, None, None]:
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+
+
+@contextmanager
+def unit_of_work(db: IDatabase) -> Generator[UnitOfWork, None, None]:
+    """
+    Runs a block in a transaction and flushes registered writes at its end.
+
+    Nested calls join the outer unit of work. On error pending writes are dropped
+    together with the identity map, since the rolled back rows may no longer
+    match the cached instances.
+    """
+    uow = UnitOfWork.for_database(db)
+    if uow.active:
+        with uow._scope():
+            yield uow
+        return
+
+    try:
+        with transaction(db), uow._scope():
+            yield uow
+            uow.flush()
+    except:
+        uow.clear()
+        raise
+
+    callbacks, uow._after_commit = uow._after_commit, []
+    for callback in callbacks:
+        callback()
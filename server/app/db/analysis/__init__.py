@@ -0,0 +1,8 @@
+from .base import ExplainingDatabase, PlanFinding, QueryPlanAnalyzer, QueryPlanReport
+
+__all__ = [
+    "ExplainingDatabase",
+    "PlanFinding",
+    "QueryPlanAnalyzer",
+    "QueryPlanReport",
+]
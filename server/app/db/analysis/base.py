@@ -0,0 +1,257 @@
+import re
+from typing import Any, Callable, Iterable, Literal
+
+import structlog
+from pydantic import BaseModel
+
+from ...decorators import implements
+from ..connection import DatabaseError, IDatabase
+
+logger = structlog.get_logger(__name__)
+
+
+class PlanFinding(BaseModel):
+    kind: Literal["seq_scan", "nested_loop", "sort_spill", "index_candidate"]
+    relation: str | None = None
+    detail: str
+    estimated_rows: float = 0
+
+
+class QueryPlanReport(BaseModel):
+    labels: list[str]
+    query: str
+    total_cost: float = 0
+    findings: list[PlanFinding] = []
+    error: str | None = None
+
+
+class ExplainingDatabase(IDatabase):
+    """
+    Database proxy that explains every query instead of running it.
+
+    Each executed query is sent to the wrapped database as
+    `EXPLAIN (FORMAT JSON) <query>`, so writes are planned but never applied.
+    Queries always return no rows.
+    """
+
+    def __init__(self, database: IDatabase):
+        self._database = database
+        self.plans: list[tuple[str, Any, str | None]] = []
+
+    @implements
+    def connect(self) -> None:
+        self._database.connect()
+
+    @implements
+    def is_connected(self) -> bool:
+        return self._database.is_connected()
+
+    @implements
+    def disconnect(self) -> None:
+        self._database.disconnect()
+
+    @implements
+    def start_transaction(self):
+        pass
+
+    @implements
+    def commit_transaction(self):
+        pass
+
+    @implements
+    def rollback_transaction(self):
+        pass
+
+    @implements
+    def execute(
+        self, query: str, params: tuple[Any, ...] | None = None
+    ) -> list[tuple[Any, ...]]:
+        try:
+            rows = self._database.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+        except DatabaseError as e:
+            self.plans.append((query, None, str(e)))
+        else:
+            self.plans.append((query, rows[0][0][0]["Plan"], None))
+        return []
+
+
+class QueryPlanAnalyzer:
+    """Explains repository queries and flags plans that will not scale."""
+
+    TABLE_ROWS_QUERY = """
+        SELECT c.relname, GREATEST(c.reltuples, 0)
+        FROM pg_class c
+        INNER JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind = 'r' AND n.nspname = current_schema()
+    """
+    TABLE_COLUMNS_QUERY = """
+        SELECT table_name, column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+    """
+    WORK_MEM_QUERY = "SELECT setting::bigint FROM pg_settings WHERE name = 'work_mem'"
+
+    FILTER_COLUMN_PATTERN = re.compile(
+        r"\(*(?:\w+\.)?(\w+)\)*(?:::[\w ]+)?\s*(=|<>|<=|>=|<|>|~~\*|~~)\s"
+    )
+
+    def __init__(
+        self,
+        database: IDatabase,
+        *,
+        large_table_rows: int = 10_000,
+        nested_loop_rows: int = 100_000,
+    ):
+        if not database.is_connected():
+            raise RuntimeError("Database is not connected")
+
+        self.database = database
+        self.large_table_rows = large_table_rows
+        self.nested_loop_rows = nested_loop_rows
+
+    def analyze(
+        self, shapes: Iterable[tuple[str, Callable[[IDatabase], Any]]]
+    ) -> list[QueryPlanReport]:
+        """Explains the queries issued by each shape, ranked by estimated cost.
+
+        Args:
+            shapes: pairs of a label and a call that runs repository methods
+                against the database it is given.
+
+        Returns:
+            list[QueryPlanReport]: one report per distinct SQL text.
+        """
+        table_rows = {
+            name: float(rows)
+            for name, rows in self.database.execute(self.TABLE_ROWS_QUERY)
+        }
+        table_columns: dict[str, set[str]] = {}
+        for table, column in self.database.execute(self.TABLE_COLUMNS_QUERY):
+            table_columns.setdefault(table, set()).add(column)
+        work_mem_kb = int(self.database.execute(self.WORK_MEM_QUERY)[0][0])
+
+        reports: dict[str, QueryPlanReport] = {}
+        for label, call in shapes:
+            explaining = ExplainingDatabase(self.database)
+            try:
+                call(explaining)
+            except Exception as e:
+                # * Repositories index into the (always empty) result sets,
+                # * which is expected; the queries have already been captured.
+                logger.debug("shape.interrupted", label=label, error=repr(e))
+
+            for query, plan, error in explaining.plans:
+                key = " ".join(query.split())
+                if key in reports:
+                    reports[key].labels.append(label)
+                    continue
+
+                report = QueryPlanReport(labels=[label], query=key, error=error)
+                if plan is not None:
+                    report.total_cost = plan["Total Cost"]
+                    report.findings = self._inspect(
+                        plan, table_rows, table_columns, work_mem_kb
+                    )
+                reports[key] = report
+
+        return sorted(reports.values(), key=lambda r: r.total_cost, reverse=True)
+
+    def _inspect(
+        self,
+        node: dict[str, Any],
+        table_rows: dict[str, float],
+        table_columns: dict[str, set[str]],
+        work_mem_kb: int,
+    ) -> list[PlanFinding]:
+        findings: list[PlanFinding] = []
+        node_type = node["Node Type"]
+        children = node.get("Plans", [])
+
+        if node_type == "Seq Scan":
+            relation = node.get("Relation Name")
+            rows = table_rows.get(relation or "", 0)
+            if rows >= self.large_table_rows:
+                findings.append(
+                    PlanFinding(
+                        kind="seq_scan",
+                        relation=relation,
+                        detail=f"sequential scan over ~{int(rows)} rows",
+                        estimated_rows=rows,
+                    )
+                )
+                findings.extend(
+                    self._index_candidates(
+                        relation, node.get("Filter"), rows, table_columns
+                    )
+                )
+
+        elif node_type == "Nested Loop" and len(children) == 2:
+            outer_rows, inner_rows = (child["Plan Rows"] for child in children)
+            if outer_rows * inner_rows >= self.nested_loop_rows:
+                findings.append(
+                    PlanFinding(
+                        kind="nested_loop",
+                        detail=(
+                            f"nested loop of {int(outer_rows)} outer x "
+                            f"{int(inner_rows)} inner rows"
+                        ),
+                        estimated_rows=outer_rows * inner_rows,
+                    )
+                )
+
+        elif node_type in ("Sort", "Incremental Sort"):
+            size_kb = node["Plan Rows"] * node["Plan Width"] / 1024
+            if size_kb > work_mem_kb:
+                findings.append(
+                    PlanFinding(
+                        kind="sort_spill",
+                        detail=(
+                            f"sort of ~{int(size_kb)} kB on "
+                            f"{', '.join(node.get('Sort Key', []))} exceeds "
+                            f"work_mem ({work_mem_kb} kB) and will spill to disk"
+                        ),
+                        estimated_rows=node["Plan Rows"],
+                    )
+                )
+
+        for child in children:
+            findings.extend(
+                self._inspect(child, table_rows, table_columns, work_mem_kb)
+            )
+        return findings
+
+    def _index_candidates(
+        self,
+        relation: str | None,
+        filter_expression: str | None,
+        rows: float,
+        table_columns: dict[str, set[str]],
+    ) -> list[PlanFinding]:
+        if not relation or not filter_expression:
+            return []
+
+        columns = table_columns.get(relation, set())
+        candidates: dict[str, str] = {}
+        for column, operator in self.FILTER_COLUMN_PATTERN.findall(filter_expression):
+            if column not in columns or column in candidates:
+                continue
+            if operator.startswith("~~"):
+                candidates[column] = (
+                    f"pattern match on {relation}.{column}; "
+                    f"consider a pg_trgm GIN index on ({column})"
+                )
+            else:
+                candidates[column] = (
+                    f"filter on {relation}.{column}; "
+                    f"consider CREATE INDEX ON {relation} ({column})"
+                )
+
+        return [
+            PlanFinding(
+                kind="index_candidate",
+                relation=relation,
+                detail=detail,
+                estimated_rows=rows,
+            )
+            for detail in candidates.values()
+        ]
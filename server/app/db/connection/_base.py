@@ -19,6 +19,14 @@ class IDatabase(IQueryExecutable, Protocol):
     def commit_transaction(self): ...
     def rollback_transaction(self): ...
 
+    def listen(self, channel: str) -> None: ...
+    def wait_for_notifications(self, timeout: float) -> list[tuple[str, str]]:
+        """
+        Waits up to `timeout` seconds for notifications on the channels listened
+        to, returning `(channel, payload)` pairs; an empty list on timeout.
+        """
+        ...
+
     def __enter__(self) -> "IDatabase":
         self.connect()
         return self
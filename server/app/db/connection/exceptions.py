@@ -11,9 +11,27 @@ class IntegrityError(DatabaseError):
     Raised when a database operation violates data integrity rules, such as attempting
     to insert a duplicate primary key, violating a unique constraint, or failing
     a foreign key constraint.
+
+    `code` is the SQLSTATE of the failure (e.g. `UNIQUE_VIOLATION`) and
+    `constraint` the name of the violated constraint, when the database reports
+    them.
     """
 
-    pass
+    UNIQUE_VIOLATION = "23505"
+
+    def __init__(
+        self,
+        message: object = None,
+        *,
+        code: str | None = None,
+        constraint: str | None = None,
+    ):
+        super().__init__(message)
+        self.code = code
+        self.constraint = constraint
+
+    def is_unique_violation(self, constraint: str) -> bool:
+        return self.code == self.UNIQUE_VIOLATION and self.constraint == constraint
 
 
 class DataError(DatabaseError):
@@ -1,3 +1,4 @@
+import select
 from typing import Any
 
 import psycopg2
@@ -64,7 +65,9 @@ class PostgresDatabase(IDatabase):
                     return []
         except psycopg2.IntegrityError as e:
             original_error = e
-            new_error = IntegrityError(e.pgerror)
+            new_error = IntegrityError(
+                e.pgerror, code=e.pgcode, constraint=e.diag.constraint_name
+            )
         except psycopg2.DataError as e:
             original_error = e
             new_error = DataError(e.pgerror)
@@ -98,6 +101,29 @@ class PostgresDatabase(IDatabase):
             self._conn = None
         logger.debug("disconnect.success")
 
+    @implements
+    def listen(self, channel: str) -> None:
+        self.execute(f"LISTEN {channel}")
+
+    @implements
+    def wait_for_notifications(self, timeout: float) -> list[tuple[str, str]]:
+        conn = self._must_conn
+        # * Notifications are only delivered between transactions, and even a
+        # * SELECT leaves one open outside of auto-commit
+        if self.__commit_mode:
+            conn.rollback()
+
+        try:
+            if not conn.notifies:
+                select.select([conn], [], [], timeout)
+            conn.poll()
+        except (psycopg2.Error, OSError) as e:
+            raise DatabaseError(f"Failed to wait for notifications: {e}") from e
+
+        notifications = [(notify.channel, notify.payload) for notify in conn.notifies]
+        conn.notifies.clear()
+        return notifications
+
     @implements
     def start_transaction(self):
         self.__commit_mode = False
@@ -1,14 +1,18 @@
 from datetime import timedelta
-from typing import Generator, Type
+from functools import cache
+from typing import Generator, Optional, Type
 
 from fastapi import Depends
 from pydantic import BaseModel
 
 from . import settings
+from .cache import ICacheBackend, InMemoryCacheBackend, ReportCache, RepositoryCache
+from .cache.shared_catalog import SharedCatalogReader, SharedCatalogWriter
 from .controllers.auth.hasher import IHasher, SHA256Hasher
 from .controllers.auth.login import LoginController
 from .controllers.auth.registration import RegistrationController
 from .controllers.auth.token_generator import ITokenGenerator, JWTTokenGenerator
+from .controllers.auth.versions import AuthVersionTable
 from .controllers.category import (
     CategoryModificationController,
     CategoryQueryController,
@@ -26,11 +30,18 @@ from .controllers.employee import (
     EmployeeModificationController,
     EmployeeQueryController,
 )
+from .controllers.group_commit import CheckGroupCommitter
+from .controllers.idempotency import IdempotencyController
+from .controllers.inventory import InventoryController
 from .controllers.permissions.group import UserGroupController
 from .controllers.permissions.user import UserPermissionController
 from .controllers.roles.cashier import UserCashierPermissionController
 from .controllers.roles.employee import UserEmployeePermissionController
 from .controllers.roles.manager import UserManagerPermissionController
+from .controllers.single_flight import SingleFlight
+from .controllers.stock_reservation import StockReservationController
+from .controllers.upc_catalog import BaseUpcCatalog, SharedUpcCatalog, UpcCatalog
+from .controllers.warmup import CacheWarmer, WarmupStep
 from .dal.repositories.auth import (
     GroupPermissionRepository,
     GroupRepository,
@@ -42,9 +53,13 @@ from .dal.repositories.category import CategoryRepository
 from .dal.repositories.check import CheckRepository
 from .dal.repositories.customer_card import CustomerCardRepository
 from .dal.repositories.employee import EmployeeRepository
+from .dal.repositories.idempotency import IdempotencyKeyRepository
+from .dal.repositories.inventory_movement import InventoryMovementRepository
 from .dal.repositories.product import ProductRepository
 from .dal.repositories.sale import SaleRepository
+from .dal.repositories.stock_reservation import StockReservationRepository
 from .dal.repositories.store_product import StoreProductRepository
+from .dal.repositories.table_version import TableVersionRepository
 from .dal.schemas import (
     Category,
     CustomerCard,
@@ -53,6 +68,7 @@ from .dal.schemas import (
     RelationalCheck,
     StoreProduct,
 )
+from .db.analysis import QueryPlanAnalyzer
 from .db.connection._base import IDatabase
 from .db.migrations import DatabaseMigrationService
 
@@ -83,6 +99,63 @@ def database_migration_service(
     return DatabaseMigrationService(db, migrations_path)
 
 
+def query_plan_analyzer(
+    db: IDatabase = Depends(get_db),
+    *,
+    large_table_rows: int = 10_000,
+    nested_loop_rows: int = 100_000,
+) -> QueryPlanAnalyzer:
+    return QueryPlanAnalyzer(
+        db,
+        large_table_rows=large_table_rows,
+        nested_loop_rows=nested_loop_rows,
+    )
+
+
+# Cache setup
+
+
+@cache
+def repository_cache() -> Optional[RepositoryCache]:
+    backend: ICacheBackend
+    match settings.CACHE_BACKEND:
+        case "none":
+            return None
+        case "memory":
+            backend = InMemoryCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES)
+        case "redis":
+            from .cache.redis import RedisCacheBackend
+
+            backend = RedisCacheBackend(settings.CACHE_URL)
+        case _:
+            raise RuntimeError(f"Unsupported cache backend: {settings.CACHE_BACKEND}")
+
+    return RepositoryCache(backend, default_ttl=settings.CACHE_DEFAULT_TTL_SECONDS)
+
+
+@cache
+def report_cache() -> Optional[ReportCache]:
+    backend: ICacheBackend
+    match settings.REPORT_CACHE_BACKEND:
+        case "none":
+            return None
+        case "memory":
+            backend = InMemoryCacheBackend(
+                max_entries=settings.REPORT_CACHE_MAX_ENTRIES,
+                eviction=settings.REPORT_CACHE_EVICTION,
+            )
+        case "redis":
+            from .cache.redis import RedisCacheBackend
+
+            backend = RedisCacheBackend(settings.CACHE_URL, prefix="zlagoda:report:")
+        case _:
+            raise RuntimeError(
+                f"Unsupported report cache backend: {settings.REPORT_CACHE_BACKEND}"
+            )
+
+    return ReportCache(backend, ttl=settings.REPORT_CACHE_TTL_SECONDS)
+
+
 # DAL setup
 
 
@@ -91,15 +164,15 @@ def model_registry() -> set[Type[BaseModel]]:
 
 
 def category_repository(db: IDatabase = Depends(get_db)) -> CategoryRepository:
-    return CategoryRepository(db)
+    return CategoryRepository(db, repository_cache(), report_cache())
 
 
 def employee_repository(db: IDatabase = Depends(get_db)) -> EmployeeRepository:
-    return EmployeeRepository(db)
+    return EmployeeRepository(db, report_cache=report_cache())
 
 
 def product_repository(db: IDatabase = Depends(get_db)) -> ProductRepository:
-    return ProductRepository(db)
+    return ProductRepository(db, repository_cache())
 
 
 def store_product_repository(db: IDatabase = Depends(get_db)) -> StoreProductRepository:
@@ -110,6 +183,30 @@ def check_repository(db: IDatabase = Depends(get_db)) -> CheckRepository:
     return CheckRepository(db)
 
 
+def inventory_movement_repository(
+    db: IDatabase = Depends(get_db),
+) -> InventoryMovementRepository:
+    return InventoryMovementRepository(db)
+
+
+def stock_reservation_repository(
+    db: IDatabase = Depends(get_db),
+) -> StockReservationRepository:
+    return StockReservationRepository(db)
+
+
+def idempotency_key_repository(
+    db: IDatabase = Depends(get_db),
+) -> IdempotencyKeyRepository:
+    return IdempotencyKeyRepository(db)
+
+
+def table_version_repository(
+    db: IDatabase = Depends(get_db),
+) -> TableVersionRepository:
+    return TableVersionRepository(db)
+
+
 def user_repository(db: IDatabase = Depends(get_db)) -> UserRepository:
     return UserRepository(db)
 
@@ -117,27 +214,27 @@ def user_repository(db: IDatabase = Depends(get_db)) -> UserRepository:
 def permission_repository(
     db: IDatabase = Depends(get_db),
 ) -> PermissionRepository:
-    return PermissionRepository(db)
+    return PermissionRepository(db, repository_cache())
 
 
 def user_group_repository(
     db: IDatabase = Depends(get_db),
 ) -> UserGroupRepository:
-    return UserGroupRepository(db)
+    return UserGroupRepository(db, repository_cache())
 
 
 def group_permission_repository(
     db: IDatabase = Depends(get_db),
 ) -> GroupPermissionRepository:
-    return GroupPermissionRepository(db)
+    return GroupPermissionRepository(db, repository_cache())
 
 
 def group_repository(db: IDatabase = Depends(get_db)) -> GroupRepository:
-    return GroupRepository(db)
+    return GroupRepository(db, repository_cache())
 
 
 def customer_card_repository(db: IDatabase = Depends(get_db)) -> CustomerCardRepository:
-    return CustomerCardRepository(db)
+    return CustomerCardRepository(db, repository_cache(), report_cache())
 
 
 def sale_repository(db: IDatabase = Depends(get_db)) -> SaleRepository:
@@ -155,12 +252,46 @@ def token_generator() -> ITokenGenerator:
     return JWTTokenGenerator(settings.SECRET_KEY, "HS256", timedelta(minutes=120))
 
 
+@cache
+def auth_version_table() -> Optional[AuthVersionTable]:
+    """
+    Started by the application's lifespan in every server process; until it is
+    loaded, and in CLI commands, versions are read from the database.
+    """
+    if not settings.AUTH_TOKEN_CLAIMS_ENABLED:
+        return None
+
+    return AuthVersionTable(
+        create_db,
+        UserRepository,
+        check_interval=timedelta(seconds=settings.AUTH_VERSION_CHECK_INTERVAL_SECONDS),
+    )
+
+
+@cache
+def single_flight() -> Optional[SingleFlight]:
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return None
+
+    return SingleFlight(
+        max_waiters=settings.SINGLE_FLIGHT_MAX_WAITERS,
+        timeout=timedelta(seconds=settings.SINGLE_FLIGHT_TIMEOUT_SECONDS),
+    )
+
+
 def login_controller(
     user_repo: UserRepository = Depends(user_repository),
     password_hasher: IHasher = Depends(password_hasher),
     token_generator: ITokenGenerator = Depends(token_generator),
+    permission_repo: PermissionRepository = Depends(permission_repository),
 ) -> LoginController:
-    return LoginController(user_repo, password_hasher, token_generator)
+    return LoginController(
+        user_repo,
+        password_hasher,
+        token_generator,
+        permission_repo=permission_repo,
+        auth_versions=auth_version_table(),
+    )
 
 
 def registration_controller(
@@ -176,9 +307,16 @@ def user_permission_controller(
     group_permission_repo: GroupPermissionRepository = Depends(
         group_permission_repository,
     ),
+    user_repo: UserRepository = Depends(user_repository),
 ) -> UserPermissionController:
     return UserPermissionController(
-        permission_repo, user_group_repo, group_permission_repo
+        permission_repo,
+        user_group_repo,
+        group_permission_repo,
+        user_repo,
+        cache=repository_cache(),
+        codenames_ttl=timedelta(seconds=settings.PERMISSION_CACHE_TTL_SECONDS),
+        auth_versions=auth_version_table(),
     )
 
 
@@ -195,7 +333,7 @@ def user_group_controller(
 def category_query_controller(
     category_repo: CategoryRepository = Depends(category_repository),
 ) -> CategoryQueryController:
-    return CategoryQueryController(category_repo)
+    return CategoryQueryController(category_repo, single_flight())
 
 
 def category_modification_controller(
@@ -207,7 +345,7 @@ def category_modification_controller(
 def customer_card_query_controller(
     customer_card_repo: CustomerCardRepository = Depends(customer_card_repository),
 ) -> CustomerCardQueryController:
-    return CustomerCardQueryController(customer_card_repo)
+    return CustomerCardQueryController(customer_card_repo, single_flight())
 
 
 def customer_card_modification_controller(
@@ -274,7 +412,7 @@ def check_query_controller(
     sale_repo: SaleRepository = Depends(sale_repository),
 ) -> CheckQueryController:
     return CheckQueryController(
-        check_repo, customer_card_repo, store_product_repo, sale_repo
+        check_repo, customer_card_repo, store_product_repo, sale_repo, single_flight()
     )
 
 
@@ -283,9 +421,81 @@ def check_modification_controller(
     customer_card_repo: CustomerCardRepository = Depends(customer_card_repository),
     store_product_repo: StoreProductRepository = Depends(store_product_repository),
     sale_repo: SaleRepository = Depends(sale_repository),
+    inventory_movement_repo: InventoryMovementRepository = Depends(
+        inventory_movement_repository
+    ),
+    stock_reservation_repo: StockReservationRepository = Depends(
+        stock_reservation_repository
+    ),
 ) -> CheckModificationController:
     return CheckModificationController(
-        check_repo, customer_card_repo, store_product_repo, sale_repo
+        check_repo,
+        customer_card_repo,
+        store_product_repo,
+        sale_repo,
+        inventory_movement_repo,
+        stock_reservation_repo,
+        batch_chunk_size=settings.CHECK_BATCH_CHUNK_SIZE,
+    )
+
+
+@cache
+def check_group_committer() -> Optional[CheckGroupCommitter]:
+    if not settings.CHECK_GROUP_COMMIT_ENABLED:
+        return None
+
+    def create_controller(db: IDatabase) -> CheckModificationController:
+        return check_modification_controller(
+            check_repository(db),
+            customer_card_repository(db),
+            store_product_repository(db),
+            sale_repository(db),
+            inventory_movement_repository(db),
+            stock_reservation_repository(db),
+        )
+
+    return CheckGroupCommitter(
+        create_db,
+        create_controller,
+        max_batch_size=settings.CHECK_GROUP_COMMIT_MAX_BATCH_SIZE,
+        max_delay=timedelta(milliseconds=settings.CHECK_GROUP_COMMIT_MAX_DELAY_MS),
+    )
+
+
+@cache
+def upc_catalog_loader() -> Optional[UpcCatalog]:
+    """The catalog loaded from the database; started by `runserver` only."""
+    if not settings.UPC_CATALOG_ENABLED:
+        return None
+
+    shared_memory_name = settings.UPC_CATALOG_SHARED_MEMORY_NAME
+    return UpcCatalog(
+        create_db,
+        StoreProductRepository,
+        check_interval=timedelta(seconds=settings.UPC_CATALOG_CHECK_INTERVAL_SECONDS),
+        snapshot=(
+            SharedCatalogWriter(shared_memory_name) if shared_memory_name else None
+        ),
+    )
+
+
+@cache
+def upc_catalog() -> Optional[BaseUpcCatalog]:
+    if not settings.UPC_CATALOG_ENABLED:
+        return None
+
+    if shared_memory_name := settings.UPC_CATALOG_SHARED_MEMORY_NAME:
+        return SharedUpcCatalog(SharedCatalogReader(shared_memory_name))
+    return upc_catalog_loader()
+
+
+def idempotency_controller(
+    repo: IdempotencyKeyRepository = Depends(idempotency_key_repository),
+) -> IdempotencyController:
+    return IdempotencyController(
+        repo,
+        timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        timedelta(seconds=settings.IDEMPOTENCY_CLAIM_LEASE_SECONDS),
     )
 
 
@@ -300,10 +510,31 @@ def check_cleanup_controller(
     )
 
 
+def inventory_controller(
+    store_product_repo: StoreProductRepository = Depends(store_product_repository),
+    movement_repo: InventoryMovementRepository = Depends(inventory_movement_repository),
+    reservation_repo: StockReservationRepository = Depends(
+        stock_reservation_repository
+    ),
+) -> InventoryController:
+    return InventoryController(store_product_repo, movement_repo, reservation_repo)
+
+
+def stock_reservation_controller(
+    store_product_repo: StoreProductRepository = Depends(store_product_repository),
+    repo: StockReservationRepository = Depends(stock_reservation_repository),
+) -> StockReservationController:
+    return StockReservationController(
+        store_product_repo,
+        repo,
+        timedelta(seconds=settings.STOCK_RESERVATION_TTL_SECONDS),
+    )
+
+
 def employee_query_controller(
     employee_repo: EmployeeRepository = Depends(employee_repository),
 ) -> EmployeeQueryController:
-    return EmployeeQueryController(employee_repo)
+    return EmployeeQueryController(employee_repo, single_flight())
 
 
 def employee_modification_controller(
@@ -313,3 +544,83 @@ def employee_modification_controller(
     ),
 ) -> EmployeeModificationController:
     return EmployeeModificationController(employee_repo, perm_controller)
+
+
+@cache
+def cache_warmer() -> Optional[CacheWarmer]:
+    if not settings.CACHE_WARMUP_ENABLED:
+        return None
+
+    # * The first pages are read with the arguments the views pass by default,
+    # * so their results land under the keys those requests look up
+    def warm_catalog(db: IDatabase) -> int:
+        category_repo, product_repo = category_repository(db), product_repository(db)
+        category_query_controller(category_repo).get_all()
+        product_repo.get_all(
+            skip=0,
+            limit=10,
+            search=None,
+            sort_by="id_product",
+            sort_order="asc",
+            category_number=None,
+            product_ids=None,
+            expand=frozenset(),
+            fields=None,
+        )
+        product_repo.get_total_count(
+            search=None, category_number=None, product_ids=None
+        )
+        return len(category_repo.get_all(limit=None)) + len(
+            product_repo.get_all(limit=None)
+        )
+
+    def warm_store_products(db: IDatabase) -> int:
+        return len(store_product_repository(db).get_all(limit=None))
+
+    def warm_permissions(db: IDatabase) -> int:
+        controller = user_permission_controller(
+            permission_repository(db),
+            user_group_repository(db),
+            group_permission_repository(db),
+            user_repository(db),
+        )
+        users = user_repository(db).search()
+        for user in users:
+            controller.get_codenames(user)
+        return len(users)
+
+    def warm_recent_checks(db: IDatabase) -> int:
+        controller = check_query_controller(
+            check_repository(db),
+            customer_card_repository(db),
+            store_product_repository(db),
+            sale_repository(db),
+        )
+        checks, _ = controller.get_all(limit=settings.CACHE_WARMUP_RECENT_CHECKS)
+        return len(checks) + sum(len(check.sales) for check in checks)
+
+    def warm_reports(db: IDatabase) -> int:
+        categories = category_query_controller(category_repository(db))
+        employees = employee_query_controller(employee_repository(db))
+        return (
+            len(categories.get_category_revenue_report())
+            + len(categories.get_categories_with_all_products_sold())
+            + len(employees.only_with_promotional_sales())
+        )
+
+    return CacheWarmer(
+        create_db,
+        [
+            WarmupStep("catalog", warm_catalog),
+            WarmupStep("store products", warm_store_products),
+            WarmupStep("permissions", warm_permissions),
+            WarmupStep("recent checks", warm_recent_checks),
+            WarmupStep("reports", warm_reports),
+        ],
+        watched_tables=("category", "product", "store_product"),
+        interval=(
+            timedelta(seconds=settings.CACHE_WARMUP_INTERVAL_SECONDS)
+            if settings.CACHE_WARMUP_INTERVAL_SECONDS
+            else None
+        ),
+    )
@@ -1,21 +1,35 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
 import click
 import structlog
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 
 from . import settings
+from .cli.commands.analyze_queries import Command as AnalyzeQueriesCommand
 from .cli.commands.assign_employee import Command as AssignEmployeeCommand
 from .cli.commands.clear_all_checks import ClearAllChecksCommand
+from .cli.commands.compact_inventory import CompactInventoryCommand
 from .cli.commands.create_permissions import CreatePermissionsCommand
 from .cli.commands.createuser import Command as CreateUserCommand
 from .cli.commands.deassign_employee import Command as DeassignEmployeeCommand
 from .cli.commands.migrate import Command as DatabaseMigrationCommand
+from .cli.commands.purge_idempotency_keys import PurgeIdempotencyKeysCommand
 from .cli.commands.update_user_permissions import (
     Command as UpdateUserPermissionsCommand,
 )
+from .cli.commands.warm_caches import WarmCachesCommand, echo_warmup_result
+from .controllers.single_flight import SingleFlightTimeoutError
 from .ioc_container import (
+    auth_version_table,
+    cache_warmer,
+    check_group_committer,
     check_repository,
     create_db,
     customer_card_repository,
@@ -23,12 +37,19 @@ from .ioc_container import (
     employee_repository,
     group_permission_repository,
     group_repository,
+    idempotency_controller,
+    idempotency_key_repository,
+    inventory_controller,
+    inventory_movement_repository,
     model_registry,
     password_hasher,
     permission_repository,
+    query_plan_analyzer,
     registration_controller,
     sale_repository,
+    stock_reservation_repository,
     store_product_repository,
+    upc_catalog_loader,
     user_cashier_permission_controller,
     user_employee_permission_controller,
     user_group_controller,
@@ -39,11 +60,14 @@ from .ioc_container import (
 )
 from .views import (
     auth,
+    cache,
+    cart,
     category,
     check,
     customer_card,
     employee,
     product,
+    scan,
     store_product,
 )
 
@@ -87,8 +111,83 @@ def migrate(number: int | None = None):
         dmc.execute(number=number)
 
 
+@cli.command(name="analyze-queries")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["table", "json"]),
+    default="table",
+    help="Output format; JSON can be diffed across schema changes.",
+)
+@click.option("-o", "--output", type=click.Path(dir_okay=False), help="Output file.")
+@click.option(
+    "--large-table-rows",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Flag sequential scans on tables with at least this many rows.",
+)
+@click.option(
+    "--nested-loop-rows",
+    type=int,
+    default=100_000,
+    show_default=True,
+    help="Flag nested loops whose outer x inner row estimate reaches this value.",
+)
+@click.option("--only-flagged", is_flag=True, help="Hide queries without findings.")
+def analyze_queries(
+    output_format: str,
+    output: str | None,
+    large_table_rows: int,
+    nested_loop_rows: int,
+    only_flagged: bool,
+):
+    """EXPLAIN every repository query shape and flag bad plans."""
+    with create_db() as db:
+        analyzer = query_plan_analyzer(
+            db,
+            large_table_rows=large_table_rows,
+            nested_loop_rows=nested_loop_rows,
+        )
+        command = AnalyzeQueriesCommand(analyzer)
+        command.execute(
+            output_format=output_format,  # type: ignore[arg-type]
+            output=output,
+            only_flagged=only_flagged,
+        )
+
+
 @cli.command(name="clear-all-checks")
-def clear_all_checks():
+@click.option(
+    "--mode",
+    type=click.Choice(["batched", "truncate"]),
+    default="batched",
+    show_default=True,
+    help="Delete in committed batches, or TRUNCATE checks and sales at once.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=10_000,
+    show_default=True,
+    help="Checks deleted per batch.",
+)
+@click.option(
+    "--date-from",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Only delete checks printed on or after this date.",
+)
+@click.option(
+    "--date-to",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Only delete checks printed on or before this date.",
+)
+def clear_all_checks(
+    mode: str,
+    batch_size: int,
+    date_from: datetime | None,
+    date_to: datetime | None,
+):
     """Clear all checks with confirmation."""
     with create_db() as db:
         from .controllers.check import CheckCleanupController
@@ -102,13 +201,92 @@ def clear_all_checks():
         )
 
         command = ClearAllChecksCommand(cleanup_controller)
-        command.execute()
+        command.execute(
+            mode=mode,  # type: ignore[arg-type]
+            batch_size=batch_size,
+            date_from=date_from.date() if date_from else None,
+            date_to=date_to.date() if date_to else None,
+        )
 
 
-@cli.command()
-def runserver():
-    """Run the application."""
-    app = FastAPI(title="Zlagoda API", version="0.1.0")
+@cli.command(name="compact-inventory")
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=500,
+    show_default=True,
+    help="Store products compacted per transaction.",
+)
+def compact_inventory(chunk_size: int):
+    """Fold inventory ledger movements into the stock snapshots; run periodically."""
+    with create_db() as db:
+        controller = inventory_controller(
+            store_product_repository(db),
+            inventory_movement_repository(db),
+            stock_reservation_repository(db),
+        )
+        CompactInventoryCommand(controller).execute(chunk_size=chunk_size)
+
+
+@cli.command(name="purge-idempotency-keys")
+def purge_idempotency_keys():
+    """Delete idempotency keys past IDEMPOTENCY_KEY_TTL_HOURS; run periodically."""
+    with create_db() as db:
+        controller = idempotency_controller(idempotency_key_repository(db))
+        PurgeIdempotencyKeysCommand(controller).execute()
+
+
+@cli.command(name="warm-caches")
+@click.option(
+    "--notify/--no-notify",
+    default=True,
+    show_default=True,
+    help="Also ask running servers to warm their own caches.",
+)
+def warm_caches(notify: bool):
+    """Warm the database's buffers and shared caches; run after bulk imports."""
+    if (warmer := cache_warmer()) is None:
+        raise click.UsageError("Cache warm-up is disabled by CACHE_WARMUP_ENABLED")
+    WarmCachesCommand(warmer).execute(notify=notify)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if (auth_versions := auth_version_table()) is not None:
+        auth_versions.start()
+
+    # * Uvicorn reports the application as started only after this warm-up
+    if (warmer := cache_warmer()) is not None:
+        click.echo("Warming caches...")
+        started = time.perf_counter()
+        await asyncio.to_thread(warmer.run, echo_warmup_result)
+        click.echo(
+            click.style(
+                f"Caches warmed in {time.perf_counter() - started:.2f}s", fg="green"
+            )
+        )
+        warmer.start()
+
+    yield
+
+    if warmer is not None:
+        warmer.close()
+    if auth_versions is not None:
+        auth_versions.close()
+
+
+async def single_flight_timeout_handler(
+    request: Request, exc: SingleFlightTimeoutError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The same request is still being processed, try again"},
+        headers={"Retry-After": "5"},
+    )
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="Zlagoda API", version="0.1.0", lifespan=lifespan)
 
     app.add_middleware(
         SessionMiddleware,
@@ -124,15 +302,42 @@ def runserver():
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag"],
     )
+    app.add_exception_handler(SingleFlightTimeoutError, single_flight_timeout_handler)  # type: ignore[arg-type]
 
     app.include_router(category.router)
     app.include_router(customer_card.router)
     app.include_router(product.router)
     app.include_router(store_product.router)
     app.include_router(check.router)
+    app.include_router(cart.router)
+    app.include_router(scan.router)
     app.include_router(employee.router)
     app.include_router(auth.router)
+    app.include_router(cache.router)
+
+    return app
+
+
+@cli.command()
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Worker processes; set UPC_CATALOG_SHARED_MEMORY_NAME to share one UPC "
+    "catalog between them, and CACHE_BACKEND=redis (or none) to share the cache.",
+)
+def runserver(workers: int):
+    """Run the application."""
+    if workers > 1 and settings.CACHE_BACKEND == "memory":
+        # * Every worker would keep its own cache, and writes through one worker
+        # * would leave the others serving stale values until they expire
+        raise click.UsageError(
+            "CACHE_BACKEND=memory cannot be shared by worker processes; "
+            "set CACHE_BACKEND to redis or none"
+        )
 
     click.echo(
         click.style(f"Starting server on {settings.API_HOST}:{settings.API_PORT}...")
@@ -140,11 +345,39 @@ def runserver():
 
     basic_checks()
 
-    uvicorn.run(
-        app,
-        host=settings.API_HOST,
-        port=settings.API_PORT,
-    )
+    if (catalog := upc_catalog_loader()) is not None:
+        if workers > 1 and catalog.snapshot is None:
+            click.echo(
+                click.style(
+                    "UPC catalog is not shared with worker processes, "
+                    "scans read the database.",
+                    fg="yellow",
+                )
+            )
+        elif not catalog.start(timeout=timedelta(seconds=30)):
+            click.echo(
+                click.style(
+                    "UPC catalog is not loaded yet, "
+                    "scans read the database until it is.",
+                    fg="yellow",
+                )
+            )
+
+    if workers == 1:
+        uvicorn.run(create_app(), host=settings.API_HOST, port=settings.API_PORT)
+    else:
+        uvicorn.run(
+            "app.main:create_app",
+            factory=True,
+            workers=workers,
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+        )
+
+    if (committer := check_group_committer()) is not None:
+        committer.close()
+    if catalog is not None:
+        catalog.close()
     click.echo(click.style("Server stopped."))
 
 
@@ -165,7 +398,7 @@ def create_permissions(to_stdout: bool = True):
         user_group_repo = user_group_repository(db)
         group_perm_repo = group_permission_repository(db)
         user_perm_controller = user_permission_controller(
-            perm_repo, user_group_repo, group_perm_repo
+            perm_repo, user_group_repo, group_perm_repo, user_repository(db)
         )
 
         command = CreatePermissionsCommand(user_perm_controller, model_registry())
@@ -192,7 +425,7 @@ def init_roles():
 
         # Create controllers
         user_perm_controller = user_permission_controller(
-            perm_repo, user_group_repo, group_perm_repo
+            perm_repo, user_group_repo, group_perm_repo, user_repository(db)
         )
         group_controller = user_group_controller(
             group_repo, user_group_repo, group_perm_repo
@@ -278,7 +511,7 @@ def assign_employee():
 
         # Create controllers
         user_perm_controller = user_permission_controller(
-            perm_repo, user_group_repo, group_perm_repo
+            perm_repo, user_group_repo, group_perm_repo, user_repository(db)
         )
         group_controller = user_group_controller(
             group_repo, user_group_repo, group_perm_repo
@@ -324,7 +557,7 @@ def deassign_employee():
 
         # Create controllers
         user_perm_controller = user_permission_controller(
-            perm_repo, user_group_repo, group_perm_repo
+            perm_repo, user_group_repo, group_perm_repo, user_repository(db)
         )
         group_controller = user_group_controller(
             group_repo, user_group_repo, group_perm_repo
@@ -368,7 +601,7 @@ def update_user_permissions():
 
         # Create controllers
         user_perm_controller = user_permission_controller(
-            perm_repo, user_group_repo, group_perm_repo
+            perm_repo, user_group_repo, group_perm_repo, user_repository(db)
         )
         group_controller = user_group_controller(
             group_repo, user_group_repo, group_perm_repo
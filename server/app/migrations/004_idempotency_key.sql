@@ -0,0 +1,12 @@
+CREATE TABLE idempotency_key (
+    user_id INT NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INT,
+    response JSONB,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, key),
+    FOREIGN KEY (user_id)
+        REFERENCES auth_user(id)
+        ON DELETE CASCADE
+);
@@ -0,0 +1 @@
+DROP SEQUENCE IF EXISTS check_number_seq;
@@ -0,0 +1,15 @@
+CREATE SEQUENCE check_number_seq
+    AS BIGINT
+    MINVALUE 1
+    MAXVALUE 9999999999
+    NO CYCLE;
+
+-- Continue after the numeric check numbers already handed out by the tills
+SELECT setval(
+    'check_number_seq',
+    COALESCE(
+        (SELECT MAX(check_number::BIGINT) FROM "check" WHERE check_number ~ '^[0-9]{10}$'),
+        0
+    ) + 1,
+    false
+);
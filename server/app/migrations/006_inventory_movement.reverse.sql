@@ -0,0 +1,8 @@
+UPDATE store_product sp
+SET products_number = s.products_number
+FROM store_product_stock s
+WHERE s.UPC = sp.UPC;
+
+DROP VIEW IF EXISTS store_product_stock;
+ALTER TABLE store_product DROP COLUMN IF EXISTS stock_movement_id;
+DROP TABLE IF EXISTS inventory_movement;
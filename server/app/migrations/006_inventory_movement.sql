@@ -0,0 +1,34 @@
+CREATE TABLE inventory_movement (
+    movement_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    UPC VARCHAR(12) NOT NULL,
+    kind VARCHAR(10) NOT NULL
+        CHECK (kind IN ('sale', 'conversion', 'restock', 'adjustment')),
+    quantity INT NOT NULL CHECK (quantity <> 0),
+    check_number VARCHAR(10),
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+
+    FOREIGN KEY (UPC)
+        REFERENCES store_product(UPC)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE
+);
+
+CREATE INDEX inventory_movement_upc_idx ON inventory_movement (UPC, movement_id);
+
+-- products_number is now the stock as of the last compacted movement
+ALTER TABLE store_product ADD COLUMN stock_movement_id BIGINT NOT NULL DEFAULT 0;
+
+CREATE VIEW store_product_stock AS
+SELECT
+    sp.UPC,
+    sp.UPC_prom,
+    sp.id_product,
+    sp.selling_price,
+    (sp.products_number + COALESCE(m.quantity, 0))::INT AS products_number,
+    sp.promotional_product
+FROM store_product sp
+LEFT JOIN LATERAL (
+    SELECT SUM(im.quantity) AS quantity
+    FROM inventory_movement im
+    WHERE im.UPC = sp.UPC AND im.movement_id > sp.stock_movement_id
+) m ON true;
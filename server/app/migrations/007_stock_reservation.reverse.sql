@@ -0,0 +1 @@
+DROP TABLE IF EXISTS stock_reservation;
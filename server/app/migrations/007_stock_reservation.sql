@@ -0,0 +1,14 @@
+-- Short-lived holds of open POS carts; losing them on a crash is harmless
+CREATE UNLOGGED TABLE stock_reservation (
+    cart_id UUID NOT NULL,
+    UPC VARCHAR(12) NOT NULL,
+    quantity INT NOT NULL CHECK (quantity > 0),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (cart_id, UPC),
+    FOREIGN KEY (UPC)
+        REFERENCES store_product(UPC)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE
+);
+
+CREATE INDEX stock_reservation_upc_idx ON stock_reservation (UPC, expires_at);
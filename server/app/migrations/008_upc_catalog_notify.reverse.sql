@@ -0,0 +1,8 @@
+DROP TRIGGER IF EXISTS product_upc_catalog ON product;
+DROP TRIGGER IF EXISTS inventory_movement_upc_catalog ON inventory_movement;
+DROP TRIGGER IF EXISTS store_product_upc_catalog ON store_product;
+DROP FUNCTION IF EXISTS product_notify_upc_catalog();
+DROP FUNCTION IF EXISTS inventory_movement_notify_upc_catalog();
+DROP FUNCTION IF EXISTS store_product_notify_upc_catalog();
+DROP FUNCTION IF EXISTS notify_upc_catalog(TEXT, TEXT);
+DROP SEQUENCE IF EXISTS upc_catalog_version_seq;
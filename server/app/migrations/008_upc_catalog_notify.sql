@@ -0,0 +1,54 @@
+-- Every change to what a till shows on a scan is announced on the upc_catalog
+-- channel as "<version>:upc:<UPC>" or "<version>:product:<id_product>". Versions
+-- let listeners detect notifications they missed; rolled back changes leave gaps.
+CREATE SEQUENCE upc_catalog_version_seq AS BIGINT;
+
+CREATE FUNCTION notify_upc_catalog(kind TEXT, key TEXT) RETURNS VOID AS $$
+BEGIN
+    PERFORM pg_notify(
+        'upc_catalog',
+        nextval('upc_catalog_version_seq') || ':' || kind || ':' || key
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION store_product_notify_upc_catalog() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM notify_upc_catalog('upc', OLD.UPC);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.UPC <> OLD.UPC) THEN
+        PERFORM notify_upc_catalog('upc', NEW.UPC);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Compaction only moves stock between the snapshot and the ledger, so it does
+-- not touch the columns listed here
+CREATE TRIGGER store_product_upc_catalog
+AFTER INSERT OR DELETE OR UPDATE OF UPC, UPC_prom, id_product, selling_price, promotional_product
+ON store_product
+FOR EACH ROW EXECUTE FUNCTION store_product_notify_upc_catalog();
+
+CREATE FUNCTION inventory_movement_notify_upc_catalog() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM notify_upc_catalog('upc', NEW.UPC);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER inventory_movement_upc_catalog
+AFTER INSERT ON inventory_movement
+FOR EACH ROW EXECUTE FUNCTION inventory_movement_notify_upc_catalog();
+
+CREATE FUNCTION product_notify_upc_catalog() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM notify_upc_catalog('product', NEW.id_product::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER product_upc_catalog
+AFTER UPDATE OF product_name ON product
+FOR EACH ROW EXECUTE FUNCTION product_notify_upc_catalog();
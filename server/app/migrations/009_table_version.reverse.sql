@@ -0,0 +1,6 @@
+DROP TRIGGER IF EXISTS inventory_movement_table_version ON inventory_movement;
+DROP TRIGGER IF EXISTS store_product_table_version ON store_product;
+DROP TRIGGER IF EXISTS product_table_version ON product;
+DROP TRIGGER IF EXISTS category_table_version ON category;
+DROP FUNCTION IF EXISTS bump_table_version();
+DROP TABLE IF EXISTS table_version;
@@ -0,0 +1,42 @@
+-- Change counters of the tables behind the cached list and detail endpoints.
+-- Every statement writing a table bumps one of its shards, picked by backend,
+-- so concurrent writers (checkouts recording inventory movements) rarely wait
+-- on the same row. The version of a table is the sum of its shards; it only
+-- grows, and only moves once the writing transaction commits.
+CREATE TABLE table_version (
+    table_name VARCHAR(63) NOT NULL,
+    shard SMALLINT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, shard)
+);
+
+INSERT INTO table_version (table_name, shard)
+SELECT t.table_name, s.shard
+FROM unnest(ARRAY['category', 'product', 'store_product', 'inventory_movement'])
+    AS t(table_name)
+CROSS JOIN generate_series(0, 15) AS s(shard);
+
+CREATE FUNCTION bump_table_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE table_version
+    SET version = version + 1
+    WHERE table_name = TG_TABLE_NAME AND shard = pg_backend_pid() % 16;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER category_table_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON category
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER product_table_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON product
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER store_product_table_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON store_product
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER inventory_movement_table_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON inventory_movement
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
@@ -0,0 +1,10 @@
+DROP TRIGGER IF EXISTS check_closed_days_version_truncate ON "check";
+DROP TRIGGER IF EXISTS check_closed_days_version_delete ON "check";
+DROP TRIGGER IF EXISTS check_closed_days_version_update ON "check";
+DROP TRIGGER IF EXISTS check_closed_days_version_insert ON "check";
+DROP FUNCTION IF EXISTS bump_check_closed_days_version();
+DROP TRIGGER IF EXISTS customer_card_table_version ON customer_card;
+DROP TRIGGER IF EXISTS employee_table_version ON employee;
+DROP TRIGGER IF EXISTS check_table_version ON "check";
+DELETE FROM table_version
+WHERE table_name IN ('check', 'check_closed_days', 'employee', 'customer_card');
@@ -0,0 +1,74 @@
+-- Versions of the data behind the sales reports. "check" counts every write of
+-- checks; "check_closed_days" only writes of checks printed before today, which
+-- is all that can change a report over a period that has ended.
+INSERT INTO table_version (table_name, shard)
+SELECT t.table_name, s.shard
+FROM unnest(ARRAY['check', 'check_closed_days', 'employee', 'customer_card'])
+    AS t(table_name)
+CROSS JOIN generate_series(0, 15) AS s(shard);
+
+CREATE TRIGGER check_table_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "check"
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER employee_table_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON employee
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER customer_card_table_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON customer_card
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- Bumps "check_closed_days" once per distinct closed day a statement wrote
+-- checks of, reading the statement's transition tables.
+CREATE FUNCTION bump_check_closed_days_version() RETURNS TRIGGER AS $$
+DECLARE
+    closed_days BIGINT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        closed_days := 1;
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT count(DISTINCT print_date::date) INTO closed_days
+        FROM new_checks
+        WHERE print_date < current_date;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT count(DISTINCT print_date::date) INTO closed_days
+        FROM old_checks
+        WHERE print_date < current_date;
+    ELSE
+        SELECT count(DISTINCT print_date::date) INTO closed_days
+        FROM (
+            SELECT print_date FROM old_checks
+            UNION ALL
+            SELECT print_date FROM new_checks
+        ) AS c
+        WHERE print_date < current_date;
+    END IF;
+
+    IF closed_days > 0 THEN
+        UPDATE table_version
+        SET version = version + closed_days
+        WHERE table_name = 'check_closed_days' AND shard = pg_backend_pid() % 16;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER check_closed_days_version_insert
+AFTER INSERT ON "check"
+REFERENCING NEW TABLE AS new_checks
+FOR EACH STATEMENT EXECUTE FUNCTION bump_check_closed_days_version();
+
+CREATE TRIGGER check_closed_days_version_update
+AFTER UPDATE ON "check"
+REFERENCING OLD TABLE AS old_checks NEW TABLE AS new_checks
+FOR EACH STATEMENT EXECUTE FUNCTION bump_check_closed_days_version();
+
+CREATE TRIGGER check_closed_days_version_delete
+AFTER DELETE ON "check"
+REFERENCING OLD TABLE AS old_checks
+FOR EACH STATEMENT EXECUTE FUNCTION bump_check_closed_days_version();
+
+CREATE TRIGGER check_closed_days_version_truncate
+AFTER TRUNCATE ON "check"
+FOR EACH STATEMENT EXECUTE FUNCTION bump_check_closed_days_version();
@@ -0,0 +1,10 @@
+DROP TRIGGER IF EXISTS auth_permission_auth_version ON auth_permission;
+DROP TRIGGER IF EXISTS auth_group_permissions_auth_version ON auth_group_permissions;
+DROP TRIGGER IF EXISTS auth_user_groups_auth_version ON auth_user_groups;
+DROP TRIGGER IF EXISTS auth_user_auth_version ON auth_user;
+DROP FUNCTION IF EXISTS auth_permission_bump_auth_version();
+DROP FUNCTION IF EXISTS auth_group_permissions_bump_auth_version();
+DROP FUNCTION IF EXISTS auth_user_groups_bump_auth_version();
+DROP FUNCTION IF EXISTS auth_user_bump_auth_version();
+DROP FUNCTION IF EXISTS bump_auth_version(INT[]);
+DROP TABLE IF EXISTS auth_user_version;
@@ -0,0 +1,90 @@
+-- Version of everything a token's claims say about its user: bumped when the
+-- user, their groups or the permissions of their groups change, and announced
+-- on the auth_version channel as "<user id>:<version>", or "<user id>:" once
+-- the user is deleted.
+CREATE TABLE auth_user_version (
+    user_id INT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES auth_user(id) ON DELETE CASCADE
+);
+
+INSERT INTO auth_user_version (user_id)
+SELECT id FROM auth_user;
+
+CREATE FUNCTION bump_auth_version(user_ids INT[]) RETURNS VOID AS $$
+DECLARE
+    bumped RECORD;
+BEGIN
+    FOR bumped IN
+        INSERT INTO auth_user_version AS v (user_id)
+        SELECT DISTINCT unnest(user_ids)
+        ON CONFLICT (user_id) DO UPDATE SET version = v.version + 1
+        RETURNING v.user_id, v.version
+    LOOP
+        PERFORM pg_notify('auth_version', bumped.user_id || ':' || bumped.version);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION auth_user_bump_auth_version() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('auth_version', OLD.id || ':');
+    ELSE
+        PERFORM bump_auth_version(ARRAY[NEW.id]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER auth_user_auth_version
+AFTER INSERT OR DELETE OR UPDATE OF username, password, is_superuser, id_employee
+ON auth_user
+FOR EACH ROW EXECUTE FUNCTION auth_user_bump_auth_version();
+
+CREATE FUNCTION auth_user_groups_bump_auth_version() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM bump_auth_version(ARRAY[OLD.user_id]);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM bump_auth_version(ARRAY[NEW.user_id]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER auth_user_groups_auth_version
+AFTER INSERT OR UPDATE OR DELETE ON auth_user_groups
+FOR EACH ROW EXECUTE FUNCTION auth_user_groups_bump_auth_version();
+
+CREATE FUNCTION auth_group_permissions_bump_auth_version() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_auth_version(ARRAY(
+        SELECT user_id
+        FROM auth_user_groups
+        WHERE group_id IN (OLD.group_id, NEW.group_id)
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER auth_group_permissions_auth_version
+AFTER INSERT OR UPDATE OR DELETE ON auth_group_permissions
+FOR EACH ROW EXECUTE FUNCTION auth_group_permissions_bump_auth_version();
+
+CREATE FUNCTION auth_permission_bump_auth_version() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_auth_version(ARRAY(
+        SELECT ug.user_id
+        FROM auth_user_groups ug
+        INNER JOIN auth_group_permissions gp ON gp.group_id = ug.group_id
+        WHERE gp.permission_id = NEW.id
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER auth_permission_auth_version
+AFTER UPDATE OF model_name, codename ON auth_permission
+FOR EACH ROW EXECUTE FUNCTION auth_permission_bump_auth_version();
@@ -0,0 +1 @@
+ALTER TABLE stock_reservation DROP COLUMN IF EXISTS id_employee;
@@ -0,0 +1,11 @@
+-- Holds belong to the employee whose till placed them, and only their carts'
+-- checkouts may use them. Holds are short-lived, so the ones placed before the
+-- owner was recorded are dropped.
+DELETE FROM stock_reservation;
+
+ALTER TABLE stock_reservation
+    ADD COLUMN id_employee VARCHAR(10) NOT NULL,
+    ADD FOREIGN KEY (id_employee)
+        REFERENCES employee(id_employee)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE;
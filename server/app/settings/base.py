@@ -2,7 +2,7 @@ import logging
 import logging.config
 from pathlib import Path
 
-from decouple import AutoConfig
+from decouple import AutoConfig, Choices
 
 from ._logging import *  # noqa: F401, F403
 
@@ -62,6 +62,101 @@ CORS_ALLOWED_ORIGINS = get_list(
 )
 
 
+# Checks settings
+
+# Checks committed per transaction by the batch ingestion endpoint
+CHECK_BATCH_CHUNK_SIZE = int(config("CHECK_BATCH_CHUNK_SIZE", default=100))
+# Largest body the batch ingestion endpoint reads; larger batches are answered with 413
+CHECK_BATCH_MAX_BODY_BYTES = int(
+    config("CHECK_BATCH_MAX_BODY_BYTES", default=10 * 1024 * 1024)
+)
+
+# Group commit of single checkouts: off by default, when on, checkouts arriving within
+# the delay of each other are created in one transaction of up to the batch size
+CHECK_GROUP_COMMIT_ENABLED = config(
+    "CHECK_GROUP_COMMIT_ENABLED", default=False, cast=bool
+)
+CHECK_GROUP_COMMIT_MAX_BATCH_SIZE = int(
+    config("CHECK_GROUP_COMMIT_MAX_BATCH_SIZE", default=50)
+)
+CHECK_GROUP_COMMIT_MAX_DELAY_MS = float(
+    config("CHECK_GROUP_COMMIT_MAX_DELAY_MS", default=5)
+)
+
+# In-memory UPC table serving scans and early checkout validation, kept current by
+# database notifications and checked for missed ones every interval
+UPC_CATALOG_ENABLED = config("UPC_CATALOG_ENABLED", default=True, cast=bool)
+UPC_CATALOG_CHECK_INTERVAL_SECONDS = int(
+    config("UPC_CATALOG_CHECK_INTERVAL_SECONDS", default=30)
+)
+# When set, runserver publishes the UPC table to this shared memory segment and all
+# worker processes read that one copy
+UPC_CATALOG_SHARED_MEMORY_NAME = config("UPC_CATALOG_SHARED_MEMORY_NAME", default="")
+
+# Read-through cache of reference data repositories: "memory" per process (so only
+# with a single worker), "redis" shared by all processes through the server at
+# CACHE_URL, or "none"
+CACHE_BACKEND = config("CACHE_BACKEND", default="memory")
+CACHE_URL = config("CACHE_URL", default="redis://127.0.0.1:6379/0")
+CACHE_MAX_ENTRIES = int(config("CACHE_MAX_ENTRIES", default=10_000))
+CACHE_DEFAULT_TTL_SECONDS = float(config("CACHE_DEFAULT_TTL_SECONDS", default=300))
+
+# Cache of sales reports, on the same kinds of backend; REPORT_CACHE_EVICTION ("lru"
+# or "fifo") applies to "memory". Reports still open are kept for
+# REPORT_CACHE_TTL_SECONDS, reports over ended periods until evicted; with "redis"
+# they never expire, so its maxmemory-policy has to be one of the allkeys-* ones
+REPORT_CACHE_BACKEND = config("REPORT_CACHE_BACKEND", default="memory")
+REPORT_CACHE_MAX_ENTRIES = int(config("REPORT_CACHE_MAX_ENTRIES", default=500))
+REPORT_CACHE_EVICTION = config(
+    "REPORT_CACHE_EVICTION", default="lru", cast=Choices(["lru", "fifo"])
+)
+REPORT_CACHE_TTL_SECONDS = float(config("REPORT_CACHE_TTL_SECONDS", default=600))
+
+# Let identical concurrent reports and check totals in one process share a single
+# query; at most SINGLE_FLIGHT_MAX_WAITERS wait on it, for up to
+# SINGLE_FLIGHT_TIMEOUT_SECONDS
+SINGLE_FLIGHT_ENABLED = config("SINGLE_FLIGHT_ENABLED", default=True, cast=bool)
+SINGLE_FLIGHT_MAX_WAITERS = int(config("SINGLE_FLIGHT_MAX_WAITERS", default=100))
+SINGLE_FLIGHT_TIMEOUT_SECONDS = float(
+    config("SINGLE_FLIGHT_TIMEOUT_SECONDS", default=30)
+)
+
+# How long a user's resolved permission set is kept in the repository cache; it is
+# keyed on the user's auth version, so changes to their groups show at once
+PERMISSION_CACHE_TTL_SECONDS = int(config("PERMISSION_CACHE_TTL_SECONDS", default=300))
+
+# Put the user's identity, permissions and auth version into access tokens, and
+# trust them while the process's copy of the auth versions says they are current
+AUTH_TOKEN_CLAIMS_ENABLED = config(
+    "AUTH_TOKEN_CLAIMS_ENABLED", default=False, cast=bool
+)
+AUTH_VERSION_CHECK_INTERVAL_SECONDS = int(
+    config("AUTH_VERSION_CHECK_INTERVAL_SECONDS", default=30)
+)
+
+# Warm the caches and the database's buffers at startup, reading the last
+# CACHE_WARMUP_RECENT_CHECKS checks among the rest; every
+# CACHE_WARMUP_INTERVAL_SECONDS (0 to never) warm again if the catalog changed
+CACHE_WARMUP_ENABLED = config("CACHE_WARMUP_ENABLED", default=True, cast=bool)
+CACHE_WARMUP_RECENT_CHECKS = int(config("CACHE_WARMUP_RECENT_CHECKS", default=500))
+CACHE_WARMUP_INTERVAL_SECONDS = int(
+    config("CACHE_WARMUP_INTERVAL_SECONDS", default=600)
+)
+
+# How long the stock holds of an open cart last after its last scan
+STOCK_RESERVATION_TTL_SECONDS = int(
+    config("STOCK_RESERVATION_TTL_SECONDS", default=300)
+)
+
+# How long a response is replayed for a retried request with the same Idempotency-Key
+IDEMPOTENCY_KEY_TTL_HOURS = int(config("IDEMPOTENCY_KEY_TTL_HOURS", default=24))
+# How long a request may hold its key before a retry takes it over; must exceed the
+# longest checkout
+IDEMPOTENCY_CLAIM_LEASE_SECONDS = int(
+    config("IDEMPOTENCY_CLAIM_LEASE_SECONDS", default=60)
+)
+
+
 # Logging settings
 
 LOG_LEVEL = config("LOG_LEVEL", default="DEBUG")
@@ -1,7 +1,12 @@
-from typing import Generic, Optional, TypeVar
+import hashlib
+from typing import Callable, Generic, Optional, TypeVar
 
+from fastapi import Depends, Header, HTTPException, Query, Response
 from pydantic import BaseModel
 
+from ..dal.repositories.table_version import TableVersionRepository
+from ..ioc_container import table_version_repository
+
 T = TypeVar("T")
 
 
@@ -42,3 +47,126 @@ class PaginationHelper:
             page_size=pagination["page_size"],
             total_pages=pagination["total_pages"],
         )
+
+
+def id_list_query(
+    name: str, item_type: Callable[[str], T], description: str
+) -> Callable[..., Optional[list[T]]]:
+    """Dependency parsing a comma separated query parameter, e.g. `?upc=a,b,c`."""
+
+    def dependency(
+        value: Optional[str] = Query(None, alias=name, description=description),
+    ) -> Optional[list[T]]:
+        if value is None:
+            return None
+
+        items = [item.strip() for item in value.split(",") if item.strip()]
+        if not items:
+            return None
+
+        try:
+            return [item_type(item) for item in items]
+        except ValueError:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid value for {name}: {value}"
+            )
+
+    return dependency
+
+
+def expand_query(*relations: str) -> Callable[..., frozenset[str]]:
+    """Dependency parsing `?expand=a,b` and rejecting relations not in `relations`."""
+
+    def dependency(
+        value: Optional[str] = Query(
+            None,
+            alias="expand",
+            description=f"Comma separated relations to expand: {', '.join(relations)}",
+        ),
+    ) -> frozenset[str]:
+        if value is None:
+            return frozenset()
+
+        expand = frozenset(item.strip() for item in value.split(",") if item.strip())
+        unknown = expand - set(relations)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot expand {', '.join(sorted(unknown))}. "
+                f"Allowed: {', '.join(relations)}",
+            )
+        return expand
+
+    return dependency
+
+
+def fields_query(model: type[BaseModel]) -> Callable[..., Optional[frozenset[str]]]:
+    """Dependency parsing `?fields=a,b` and rejecting fields `model` does not have."""
+    allowed = list(model.model_fields)
+
+    def dependency(
+        value: Optional[str] = Query(
+            None,
+            alias="fields",
+            description=f"Comma separated fields to return: {', '.join(allowed)}",
+        ),
+    ) -> Optional[frozenset[str]]:
+        if value is None:
+            return None
+
+        fields = frozenset(item.strip() for item in value.split(",") if item.strip())
+        if not fields:
+            return None
+
+        unknown = fields - set(allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields {', '.join(sorted(unknown))}. "
+                f"Allowed: {', '.join(allowed)}",
+            )
+        return fields
+
+    return dependency
+
+
+def conditional_get(*tables: str) -> Callable[..., None]:
+    """
+    Dependency answering `If-None-Match` for endpoints whose responses only
+    change with the rows of `tables`, by their change counters: 304 when the
+    client's ETag still matches, otherwise the ETag is set on the response.
+
+    Declare it after the permission check, so that users without access cannot
+    learn whether the data changed.
+    """
+
+    def dependency(
+        response: Response,
+        if_none_match: Optional[str] = Header(None, include_in_schema=False),
+        repo: TableVersionRepository = Depends(table_version_repository),
+    ) -> None:
+        versions = repo.get_versions(tables)
+        if len(versions) < len(tables):
+            # * Counters not migrated yet
+            return
+
+        digest = hashlib.sha1(
+            ",".join(f"{table}={versions[table]}" for table in tables).encode()
+        ).hexdigest()[:16]
+        headers = {
+            "ETag": f'W/"{digest}"',
+            # * Responses depend on the caller's permissions
+            "Cache-Control": "private, no-cache",
+            "Vary": "Authorization",
+        }
+
+        if if_none_match is not None:
+            candidates = {
+                tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+            }
+            if "*" in candidates or f'"{digest}"' in candidates:
+                raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+
+    return dependency
@@ -0,0 +1,42 @@
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi_utils.cbv import cbv
+
+from ..cache import ReportCache, RepositoryCache
+from ..dal.schemas.auth import User
+from ..ioc_container import report_cache, repository_cache
+from .auth import require_user
+
+router = APIRouter(
+    prefix="/cache",
+    tags=["cache"],
+    dependencies=[Depends(require_user)],
+)
+
+
+@cbv(router)
+class CacheViewSet:
+    cache: Optional[RepositoryCache] = Depends(repository_cache)
+    report_cache: Optional[ReportCache] = Depends(report_cache)
+
+    @router.get("/stats", operation_id="getCacheStats")
+    async def get_cache_stats(
+        self, current_user: User = Depends(require_user)
+    ) -> dict[str, Any]:
+        """
+        Hits, misses and invalidations per cached method and report, and backend
+        usage.
+        """
+        if not current_user.is_superuser:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not authorized to perform this action",
+            )
+        empty: dict[str, Any] = {"names": {}, "backend": {}}
+        return {
+            **(self.cache.stats() if self.cache is not None else empty),
+            "reports": (
+                self.report_cache.stats() if self.report_cache is not None else empty
+            ),
+        }
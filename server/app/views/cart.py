@@ -0,0 +1,100 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi_utils.cbv import cbv
+
+from ..controllers.check import InsufficientStockError
+from ..controllers.stock_reservation import StockReservationController
+from ..dal.schemas.auth import User
+from ..dal.schemas.check import RelationalCheck
+from ..dal.schemas.stock_reservation import ReserveStock, StockReservation
+from ..ioc_container import stock_reservation_controller
+from .auth import BasicPermission, require_permission, require_user
+
+router = APIRouter(
+    prefix="/carts",
+    tags=["carts"],
+    dependencies=[Depends(require_user)],
+)
+
+
+def _employee_of(user: User) -> str:
+    """Carts belong to the employee whose till placed their holds."""
+    if not user.id_employee:
+        raise HTTPException(
+            status_code=400,
+            detail="Current user is not associated with an employee",
+        )
+    return user.id_employee
+
+
+@cbv(router)
+class CartViewSet:
+    """
+    Stock holds of an open POS cart. The till picks the cart ID, places a hold
+    per scanned UPC and sends the ID with `POST /checks/`, which consumes them.
+    """
+
+    controller: StockReservationController = Depends(stock_reservation_controller)
+
+    @router.get(
+        "/{cart_id}", response_model=list[StockReservation], operation_id="getCart"
+    )
+    async def get_cart(
+        self,
+        cart_id: UUID,
+        current_user: User = Security(
+            require_permission((RelationalCheck, BasicPermission.CREATE))
+        ),
+    ) -> list[StockReservation]:
+        return self.controller.get_cart(cart_id, _employee_of(current_user))
+
+    @router.put(
+        "/{cart_id}/items/{upc}",
+        response_model=StockReservation,
+        operation_id="reserveCartItem",
+    )
+    async def reserve_cart_item(
+        self,
+        cart_id: UUID,
+        upc: str,
+        request: ReserveStock,
+        current_user: User = Security(
+            require_permission((RelationalCheck, BasicPermission.CREATE))
+        ),
+    ) -> StockReservation:
+        try:
+            return self.controller.reserve(
+                cart_id, _employee_of(current_user), upc, request.quantity
+            )
+        except InsufficientStockError as e:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "msg": str(e),
+                    "shortages": [shortage.model_dump() for shortage in e.shortages],
+                },
+            ) from e
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+
+    @router.delete("/{cart_id}/items/{upc}", operation_id="releaseCartItem")
+    async def release_cart_item(
+        self,
+        cart_id: UUID,
+        upc: str,
+        current_user: User = Security(
+            require_permission((RelationalCheck, BasicPermission.CREATE))
+        ),
+    ) -> None:
+        self.controller.release(cart_id, _employee_of(current_user), upc)
+
+    @router.delete("/{cart_id}", operation_id="releaseCart")
+    async def release_cart(
+        self,
+        cart_id: UUID,
+        current_user: User = Security(
+            require_permission((RelationalCheck, BasicPermission.CREATE))
+        ),
+    ) -> None:
+        self.controller.release_cart(cart_id, _employee_of(current_user))
@@ -13,13 +13,22 @@ from ..dal.schemas.auth import User
 from ..dal.schemas.category import Category
 from ..db.connection.exceptions import IntegrityError
 from ..ioc_container import category_modification_controller, category_query_controller
-from ._base import BulkDelete, PaginatedResponse, PaginationHelper
+from ._base import (
+    BulkDelete,
+    PaginatedResponse,
+    PaginationHelper,
+    conditional_get,
+    id_list_query,
+)
 from .auth import BasicPermission, require_permission, require_user
 
 router = APIRouter(
     prefix="/categories", tags=["categories"], dependencies=[Depends(require_user)]
 )
 
+# * Categories read here only change with their own table
+conditional_read = conditional_get("category")
+
 
 class CreateCategoryRequest(BaseModel):
     category_name: str
@@ -68,7 +77,13 @@ class CategoryViewSet:
             "category_number", description="Field to sort by"
         ),
         sort_order: Literal["asc", "desc"] = Query("asc", description="Sort order"),
+        category_numbers: Optional[list[int]] = Depends(
+            id_list_query(
+                "category_number", int, "Filter by comma separated category numbers"
+            )
+        ),
         _: User = Security(require_permission((Category, BasicPermission.VIEW))),
+        _etag: None = Depends(conditional_read),
     ):
         categories, total = self.category_query_controller.get_all(
             skip=skip,
@@ -76,6 +91,7 @@ class CategoryViewSet:
             search=search,
             sort_by=sort_by,
             sort_order=sort_order,
+            category_numbers=category_numbers,
         )
 
         return PaginationHelper.create_paginated_response(
@@ -89,6 +105,7 @@ class CategoryViewSet:
         self,
         category_number: int,
         _: User = Security(require_permission((Category, BasicPermission.VIEW))),
+        _etag: None = Depends(conditional_read),
     ):
         return self.category_query_controller.get_category(category_number)
 
@@ -146,7 +163,7 @@ class CategoryViewSet:
         response_model=list[CategoryRevenueReport],
         operation_id="getCategoryRevenueReport",
     )
-    async def get_category_revenue_report(
+    def get_category_revenue_report(
         self,
         date_from: date = Query(
             None, description="Start date for revenue report (YYYY-MM-DD format)"
@@ -166,7 +183,7 @@ class CategoryViewSet:
         response_model=list[CategoryWithAllProductsSold],
         operation_id="getCategoriesWithAllProductsSold",
     )
-    async def get_categories_with_all_products_sold(
+    def get_categories_with_all_products_sold(
         self,
         _: User = Security(require_permission((Category, BasicPermission.VIEW))),
     ):
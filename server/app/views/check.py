@@ -1,18 +1,47 @@
+import asyncio
+import hashlib
+import json
 from datetime import date
-from typing import Literal, Optional
+from typing import Any, Callable, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Security
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Security
+from fastapi.responses import JSONResponse
 from fastapi_utils.cbv import cbv
 from pydantic import BaseModel
 
+from .. import settings
 from ..controllers.check import (
     CheckModificationController,
+    CheckNumberTakenError,
     CheckQueryController,
     ChecksMetadata,
+    InsufficientStockError,
 )
+from ..controllers.group_commit import CheckGroupCommitter
+from ..controllers.idempotency import (
+    IdempotencyController,
+    IdempotencyKeyInUseError,
+    IdempotencyKeyMismatchError,
+)
+from ..controllers.upc_catalog import BaseUpcCatalog
 from ..dal.schemas.auth import User
-from ..dal.schemas.check import Check, CreateCheck, RelationalCheck
-from ..ioc_container import check_modification_controller, check_query_controller
+from ..dal.schemas.check import (
+    Check,
+    CheckBatchResult,
+    CheckExpand,
+    CheckNumberBlock,
+    CreateCheck,
+    ExpandedCheck,
+    RelationalCheck,
+)
+from ..ioc_container import (
+    check_group_committer,
+    check_modification_controller,
+    check_query_controller,
+    idempotency_controller,
+    upc_catalog,
+)
+from ._base import expand_query
 from .auth import BasicPermission, require_permission, require_user
 
 router = APIRouter(
@@ -23,48 +52,235 @@ router = APIRouter(
 
 
 class PaginatedChecks(BaseModel):
-    data: list[Check]
+    data: list[Check | ExpandedCheck]
     total: int
     page: int
     page_size: int
     metadata: ChecksMetadata
 
 
+async def _read_check_batch(request: Request, limit: int) -> bytes:
+    """Reads the body of a batch, refusing one over `limit` bytes early."""
+    too_large = HTTPException(
+        status_code=413, detail=f"Batch body exceeds {limit} bytes; split the batch"
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+
+def _parse_check_batch(body: bytes, content_type: str) -> list[Any]:
+    """Reads a JSON array, or one check per line for `application/x-ndjson`."""
+    try:
+        if content_type.startswith("application/x-ndjson"):
+            return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+        items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}") from e
+
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Batch body must be an array")
+    return items
+
+
 @cbv(router)
 class CheckViewSet:
     query_controller: CheckQueryController = Depends(check_query_controller)
     modification_controller: CheckModificationController = Depends(
         check_modification_controller
     )
+    idempotency_controller: IdempotencyController = Depends(idempotency_controller)
+    group_committer: Optional[CheckGroupCommitter] = Depends(check_group_committer)
+    upc_catalog: Optional[BaseUpcCatalog] = Depends(upc_catalog)
 
-    @router.post("/", response_model=Check, summary="Create new check with sales")
+    @router.post(
+        "/",
+        response_model=Check,
+        summary="Create new check with sales",
+        responses={
+            200: {
+                "headers": {
+                    "Idempotent-Replayed": {
+                        "description": "Set when the response is a stored replay",
+                        "schema": {"type": "string"},
+                    }
+                }
+            }
+        },
+    )
     async def create_check(
         self,
         check_data: CreateCheck,
+        idempotency_key: Optional[str] = Header(
+            None,
+            alias="Idempotency-Key",
+            max_length=255,
+            description="Retries with the same key replay the first response",
+        ),
         current_user: User = Security(
             require_permission((RelationalCheck, BasicPermission.CREATE))
         ),
+    ) -> Check | JSONResponse:
+        if not current_user.id_employee:
+            raise HTTPException(
+                status_code=400,
+                detail="Current user is not associated with an employee",
+            )
+
+        if idempotency_key is None:
+            return await self._create_check(check_data, current_user.id_employee)
+
+        request_hash = hashlib.sha256(check_data.model_dump_json().encode()).hexdigest()
+        try:
+            record = self.idempotency_controller.begin(
+                current_user.id, idempotency_key, request_hash
+            )
+        except IdempotencyKeyMismatchError as e:
+            raise HTTPException(status_code=422, detail=str(e)) from e
+        except IdempotencyKeyInUseError as e:
+            raise HTTPException(status_code=409, detail=str(e)) from e
+
+        if record.status_code is not None:
+            return JSONResponse(
+                content=record.response,
+                status_code=record.status_code,
+                headers={"Idempotent-Replayed": "true"},
+            )
+
+        def complete(check: Check) -> None:
+            self.idempotency_controller.complete(
+                record, 200, check.model_dump(mode="json")
+            )
+
+        try:
+            return await self._create_check(
+                check_data, current_user.id_employee, on_created=complete
+            )
+        except IdempotencyKeyInUseError as e:
+            raise HTTPException(status_code=409, detail=str(e)) from e
+        except:
+            self.idempotency_controller.release(record)
+            raise
+
+    async def _create_check(
+        self,
+        check_data: CreateCheck,
+        employee_id: str,
+        on_created: Optional[Callable[[Check], None]] = None,
     ) -> Check:
+        try:
+            # * Holds of a cart are consumed by the checkout statement itself, and
+            # * the response to an idempotency key is stored in the checkout's
+            # * transaction on this request's connection. A checkout the UPC
+            # * catalog doubts runs alone, and gets its answer from the locked read
+            if (
+                self.group_committer is not None
+                and check_data.cart_id is None
+                and on_created is None
+                and not (
+                    self.upc_catalog is not None
+                    and self.upc_catalog.doubts_checkout(check_data)
+                )
+            ):
+                return await asyncio.wrap_future(
+                    self.group_committer.submit(check_data, employee_id)
+                )
+            return self.modification_controller.create(
+                check_data, employee_id, on_created
+            )
+        except InsufficientStockError as e:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "msg": str(e),
+                    "shortages": [shortage.model_dump() for shortage in e.shortages],
+                },
+            ) from e
+        except CheckNumberTakenError as e:
+            raise HTTPException(
+                status_code=409,
+                detail="A check with this number already exists",
+            ) from e
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    @router.post(
+        "/numbers",
+        response_model=CheckNumberBlock,
+        summary="Reserve a block of check numbers for a till to use offline",
+    )
+    async def reserve_check_numbers(
+        self,
+        count: int = Query(
+            100, ge=1, le=1000, description="How many check numbers to reserve"
+        ),
+        _: User = Security(
+            require_permission((RelationalCheck, BasicPermission.CREATE))
+        ),
+    ) -> CheckNumberBlock:
+        return self.modification_controller.reserve_check_numbers(count)
+
+    @router.post(
+        "/batch",
+        response_model=CheckBatchResult,
+        summary="Create many checks, e.g. when a till catches up after going offline",
+        openapi_extra={
+            "requestBody": {
+                "required": True,
+                "content": {
+                    "application/json": {
+                        "schema": {
+                            "type": "array",
+                            "items": {"$ref": "#/components/schemas/CreateCheck"},
+                        }
+                    },
+                    "application/x-ndjson": {
+                        "schema": {"$ref": "#/components/schemas/CreateCheck"}
+                    },
+                },
+            }
+        },
+    )
+    async def create_checks_batch(
+        self,
+        request: Request,
+        current_user: User = Security(
+            require_permission((RelationalCheck, BasicPermission.CREATE))
+        ),
+    ) -> CheckBatchResult:
         if not current_user.id_employee:
             raise HTTPException(
                 status_code=400,
                 detail="Current user is not associated with an employee",
             )
 
-        return self.modification_controller.create(check_data, current_user.id_employee)
+        body = await _read_check_batch(request, settings.CHECK_BATCH_MAX_BODY_BYTES)
+        items = _parse_check_batch(body, request.headers.get("content-type", ""))
+        return self.modification_controller.create_batch(
+            items, current_user.id_employee
+        )
 
-    @router.get("/{check_number}", response_model=Check)
+    @router.get("/{check_number}", response_model=ExpandedCheck)
     async def get_check(
         self,
         check_number: str,
+        expand: frozenset[CheckExpand] = Depends(expand_query("sales.product")),
         _: User = Security(require_permission((RelationalCheck, BasicPermission.VIEW))),
-    ) -> Check:
-        return self.query_controller.get_check(check_number)
+    ) -> Check | ExpandedCheck:
+        return self.query_controller.get_check(check_number, expand)
 
     @router.get(
         "/", response_model=PaginatedChecks, summary="Get all checks with filters"
     )
-    async def get_checks(
+    def get_checks(
         self,
         skip: int = Query(0, ge=0, description="Number of records to skip"),
         limit: Optional[int] = Query(
@@ -80,6 +296,7 @@ class CheckViewSet:
         sort_order: Optional[Literal["asc", "desc"]] = Query(
             None, description="Sort order"
         ),
+        expand: frozenset[CheckExpand] = Depends(expand_query("sales.product")),
         _: User = Security(require_permission((RelationalCheck, BasicPermission.VIEW))),
     ) -> PaginatedChecks:
         checks, metadata = self.query_controller.get_all(
@@ -91,6 +308,7 @@ class CheckViewSet:
             product_upc=product_upc,
             sort_by=sort_by,
             sort_order=sort_order,
+            expand=expand,
         )
 
         actual_limit = limit or 10
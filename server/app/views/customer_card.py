@@ -10,6 +10,7 @@ from ..controllers.customer_card import (
     CustomerCardQueryController,
 )
 from ..dal.repositories.customer_card import CustomerCardRepository
+from ..dal.schemas._base import partial_model
 from ..dal.schemas.auth import User
 from ..dal.schemas.customer_card import (
     CustomerCard,
@@ -22,7 +23,7 @@ from ..ioc_container import (
     customer_card_query_controller,
     customer_card_repository,
 )
-from ._base import BulkDelete, PaginatedResponse, PaginationHelper
+from ._base import BulkDelete, PaginatedResponse, PaginationHelper, fields_query
 from .auth import BasicPermission, require_permission, require_user
 
 router = APIRouter(
@@ -56,7 +57,8 @@ class CustomerCardViewSet:
 
     @router.get(
         "/",
-        response_model=PaginatedResponse[CustomerCard],
+        response_model=PaginatedResponse[CustomerCard | partial_model(CustomerCard)],
+        response_model_exclude_unset=True,
         operation_id="getCustomerCards",
     )
     async def get_customer_cards(
@@ -65,11 +67,13 @@ class CustomerCardViewSet:
         limit: Optional[int] = Query(
             10, ge=1, le=1000, description="Maximum number of records to return"
         ),
+        fields: Optional[frozenset[str]] = Depends(fields_query(CustomerCard)),
         _: User = Security(require_permission((CustomerCard, BasicPermission.VIEW))),
     ):
         customer_cards, total = self.query_controller.get_all(
             limit=limit,
             offset=skip,
+            fields=fields,
         )
 
         return PaginationHelper.create_paginated_response(
@@ -78,7 +82,8 @@ class CustomerCardViewSet:
 
     @router.get(
         "/search",
-        response_model=PaginatedResponse[CustomerCard],
+        response_model=PaginatedResponse[CustomerCard | partial_model(CustomerCard)],
+        response_model_exclude_unset=True,
         operation_id="searchCustomerCards",
     )
     async def search_customer_cards(
@@ -105,6 +110,7 @@ class CustomerCardViewSet:
         sort_order: Optional[Literal["asc", "desc"]] = Query(
             "asc", description="Sort order"
         ),
+        fields: Optional[frozenset[str]] = Depends(fields_query(CustomerCard)),
         _: User = Security(require_permission((CustomerCard, BasicPermission.VIEW))),
     ):
         customer_cards, total = self.query_controller.search(
@@ -114,6 +120,7 @@ class CustomerCardViewSet:
             sort_order=sort_order,
             limit=limit,
             offset=skip,
+            fields=fields,
         )
         return PaginationHelper.create_paginated_response(
             data=customer_cards,
@@ -127,7 +134,7 @@ class CustomerCardViewSet:
         response_model=list[CardSoldCategoriesReport],
         operation_id="getCardSoldCategoriesReport",
     )
-    async def get_card_sold_categories_report(
+    def get_card_sold_categories_report(
         self,
         card_number: str = Query(default=None, description="Card number"),
         category_name: str = Query(default=None, description="Category name"),
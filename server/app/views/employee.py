@@ -8,6 +8,7 @@ from ..controllers.employee import (
     EmployeeQueryController,
 )
 from ..dal.repositories.employee import EmployeeRepository
+from ..dal.schemas._base import partial_model
 from ..dal.schemas.auth import User
 from ..dal.schemas.employee import (
     CreateEmployee,
@@ -21,7 +22,7 @@ from ..ioc_container import (
     employee_query_controller,
     employee_repository,
 )
-from ._base import BulkDelete, PaginatedResponse, PaginationHelper
+from ._base import BulkDelete, PaginatedResponse, PaginationHelper, fields_query
 from .auth import BasicPermission, require_permission, require_user
 
 router = APIRouter(
@@ -44,7 +45,7 @@ class EmployeeViewSet:
     )
 
     @router.get("/me", response_model=EmployeeSelfInfo, operation_id="getMyEmployee")
-    async def get_my_employee(
+    def get_my_employee(
         self,
         current_user: User = Security(require_permission((Employee, "view_self"))),
     ):
@@ -62,7 +63,10 @@ class EmployeeViewSet:
             raise HTTPException(status_code=404, detail=str(e))
 
     @router.get(
-        "/", response_model=PaginatedResponse[Employee], operation_id="getEmployees"
+        "/",
+        response_model=PaginatedResponse[Employee | partial_model(Employee)],
+        response_model_exclude_unset=True,
+        operation_id="getEmployees",
     )
     async def get_employees(
         self,
@@ -79,6 +83,7 @@ class EmployeeViewSet:
             "date_of_start",
         ] = Query("empl_surname"),
         sort_order: Literal["asc", "desc"] = Query("asc"),
+        fields: Optional[frozenset[str]] = Depends(fields_query(Employee)),
         _: User = Security(require_permission((Employee, BasicPermission.VIEW))),
     ):
         employees = self.repo.get_all(
@@ -88,6 +93,7 @@ class EmployeeViewSet:
             role_filter=role_filter,
             sort_by=sort_by,
             sort_order=sort_order,
+            fields=fields,
         )
         total = len(employees)
 
@@ -100,7 +106,7 @@ class EmployeeViewSet:
         response_model=list[Employee],
         operation_id="getEmployeesOnlyWithPromotionalSales",
     )
-    async def get_employees_only_with_promotional_sales(
+    def get_employees_only_with_promotional_sales(
         self,
         _: User = Security(require_permission((Employee, BasicPermission.VIEW))),
     ):
@@ -5,11 +5,25 @@ from fastapi_utils.cbv import cbv
 from pydantic import BaseModel
 
 from ..dal.repositories.product import ProductRepository
+from ..dal.schemas._base import partial_model
 from ..dal.schemas.auth import User
-from ..dal.schemas.product import CreateProduct, Product, UpdateProduct
+from ..dal.schemas.product import (
+    CreateProduct,
+    ExpandedProduct,
+    Product,
+    ProductExpand,
+    UpdateProduct,
+)
 from ..db.connection.exceptions import IntegrityError
 from ..ioc_container import product_repository
-from ._base import PaginatedResponse, PaginationHelper
+from ._base import (
+    PaginatedResponse,
+    PaginationHelper,
+    conditional_get,
+    expand_query,
+    fields_query,
+    id_list_query,
+)
 from .auth import BasicPermission, require_permission, require_user
 
 router = APIRouter(
@@ -18,6 +32,9 @@ router = APIRouter(
     dependencies=[Depends(require_user)],
 )
 
+# * Products are read with their categories expanded
+conditional_read = conditional_get("product", "category")
+
 
 class BulkDeleteProduct(BaseModel):
     ids: list[int]
@@ -26,7 +43,12 @@ class BulkDeleteProduct(BaseModel):
 @cbv(router)
 class ProductViewSet:
     @router.get(
-        "/", response_model=PaginatedResponse[Product], operation_id="getProducts"
+        "/",
+        response_model=PaginatedResponse[
+            ExpandedProduct | partial_model(ExpandedProduct)
+        ],
+        response_model_exclude_unset=True,
+        operation_id="getProducts",
     )
     async def get_products(
         self,
@@ -40,8 +62,14 @@ class ProductViewSet:
         ),
         sort_order: Literal["asc", "desc"] = Query("asc", description="Sort order"),
         category_number: Optional[int] = Query(None, description="Filter by category"),
+        product_ids: Optional[list[int]] = Depends(
+            id_list_query("id_product", int, "Filter by comma separated product IDs")
+        ),
+        expand: frozenset[ProductExpand] = Depends(expand_query("category")),
+        fields: Optional[frozenset[str]] = Depends(fields_query(Product)),
         repo: ProductRepository = Depends(product_repository),
         _: User = Security(require_permission((Product, BasicPermission.VIEW))),
+        _etag: None = Depends(conditional_read),
     ):
         products = repo.get_all(
             skip=skip,
@@ -50,21 +78,34 @@ class ProductViewSet:
             sort_by=sort_by,
             sort_order=sort_order,
             category_number=category_number,
+            product_ids=product_ids,
+            expand=expand,
+            fields=fields,
+        )
+        total = repo.get_total_count(
+            search=search, category_number=category_number, product_ids=product_ids
         )
-        total = repo.get_total_count(search=search, category_number=category_number)
 
         return PaginationHelper.create_paginated_response(
             data=products, total=total, skip=skip, limit=limit
         )
 
-    @router.get("/{id_product}", response_model=Product, operation_id="getProduct")
+    @router.get(
+        "/{id_product}", response_model=ExpandedProduct, operation_id="getProduct"
+    )
     async def get_product(
         self,
         id_product: int,
+        expand: frozenset[ProductExpand] = Depends(expand_query("category")),
         repo: ProductRepository = Depends(product_repository),
         _: User = Security(require_permission((Product, BasicPermission.VIEW))),
+        _etag: None = Depends(conditional_read),
     ):
-        return repo.get_by_id(id_product)
+        if not expand:
+            return repo.get_by_id(id_product)
+
+        products = repo.get_all(limit=None, product_ids=[id_product], expand=expand)
+        return products[0] if products else None
 
     @router.post("/", response_model=Product, operation_id="createProduct")
     async def create_product(
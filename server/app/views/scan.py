@@ -0,0 +1,42 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi_utils.cbv import cbv
+
+from ..controllers.upc_catalog import BaseUpcCatalog
+from ..dal.repositories.store_product import StoreProductRepository
+from ..dal.schemas.auth import User
+from ..dal.schemas.store_product import ScannedProduct, StoreProduct
+from ..ioc_container import store_product_repository, upc_catalog
+from .auth import BasicPermission, require_permission, require_user
+
+router = APIRouter(
+    prefix="/scan",
+    tags=["scan"],
+    dependencies=[Depends(require_user)],
+)
+
+
+@cbv(router)
+class ScanViewSet:
+    catalog: Optional[BaseUpcCatalog] = Depends(upc_catalog)
+
+    @router.get("/{upc}", response_model=ScannedProduct, operation_id="scanUpc")
+    async def scan(
+        self,
+        upc: str,
+        repo: StoreProductRepository = Depends(store_product_repository),
+        _: User = Security(require_permission((StoreProduct, BasicPermission.VIEW))),
+    ) -> ScannedProduct:
+        scanned = None
+        if self.catalog is not None and self.catalog.is_ready:
+            scanned = self.catalog.get(upc)
+        # * Also when the catalog stopped being ready during the lookup
+        if self.catalog is None or not self.catalog.is_ready:
+            scanned = next(iter(repo.get_scanned([upc], [])), None)
+
+        if scanned is None:
+            raise HTTPException(
+                status_code=404, detail=f"Product with UPC {upc} not found"
+            )
+        return scanned
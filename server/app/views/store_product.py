@@ -3,17 +3,36 @@ from typing import Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Security
 from fastapi_utils.cbv import cbv
 
+from ..controllers.inventory import InventoryController
 from ..dal.repositories.store_product import StoreProductRepository
+from ..dal.schemas._base import partial_model
 from ..dal.schemas.auth import User
+from ..dal.schemas.inventory_movement import (
+    InventoryMovement,
+    InventoryMovementKind,
+    RecordInventoryMovement,
+    StockLevel,
+)
 from ..dal.schemas.store_product import (
     CreatePromotionalProduct,
     CreateStoreProduct,
+    ExpandedStoreProduct,
     StoreProduct,
+    StoreProductExpand,
     UpdateStoreProduct,
 )
-from ..db.connection import IntegrityError, transaction
-from ..ioc_container import store_product_repository
-from ._base import BulkDelete, PaginatedResponse, PaginationHelper
+from ..dal.unit_of_work import unit_of_work
+from ..db.connection import IntegrityError
+from ..ioc_container import inventory_controller, store_product_repository
+from ._base import (
+    BulkDelete,
+    PaginatedResponse,
+    PaginationHelper,
+    conditional_get,
+    expand_query,
+    fields_query,
+    id_list_query,
+)
 from .auth import BasicPermission, require_permission, require_user
 
 router = APIRouter(
@@ -22,6 +41,11 @@ router = APIRouter(
     dependencies=[Depends(require_user)],
 )
 
+# * Stock is the snapshot plus the inventory ledger, see `StoreProductRepository`
+conditional_read = conditional_get(
+    "store_product", "inventory_movement", "product", "category"
+)
+
 
 class BulkDeleteStoreProduct(BulkDelete[str]):
     pass
@@ -31,7 +55,10 @@ class BulkDeleteStoreProduct(BulkDelete[str]):
 class StoreProductViewSet:
     @router.get(
         "/",
-        response_model=PaginatedResponse[StoreProduct],
+        response_model=PaginatedResponse[
+            ExpandedStoreProduct | partial_model(ExpandedStoreProduct)
+        ],
+        response_model_exclude_unset=True,
         operation_id="getStoreProducts",
     )
     async def get_store_products(
@@ -51,8 +78,16 @@ class StoreProductViewSet:
             None, description="Filter by promotional products"
         ),
         id_product: Optional[int] = Query(None, description="Filter by product ID"),
+        upcs: Optional[list[str]] = Depends(
+            id_list_query("upc", str, "Filter by comma separated UPCs")
+        ),
+        expand: frozenset[StoreProductExpand] = Depends(
+            expand_query("product", "category")
+        ),
+        fields: Optional[frozenset[str]] = Depends(fields_query(StoreProduct)),
         repo: StoreProductRepository = Depends(store_product_repository),
         _: User = Security(require_permission((StoreProduct, BasicPermission.VIEW))),
+        _etag: None = Depends(conditional_read),
     ):
         store_products = repo.get_all(
             skip=skip,
@@ -62,23 +97,39 @@ class StoreProductViewSet:
             sort_order=sort_order,
             promotional_only=promotional_only,
             id_product=id_product,
+            upcs=upcs,
+            expand=expand,
+            fields=fields,
         )
         total = repo.get_total_count(
-            search=search, promotional_only=promotional_only, id_product=id_product
+            search=search,
+            promotional_only=promotional_only,
+            id_product=id_product,
+            upcs=upcs,
         )
 
         return PaginationHelper.create_paginated_response(
             data=store_products, total=total, skip=skip, limit=limit
         )
 
-    @router.get("/{upc}", response_model=StoreProduct, operation_id="getStoreProduct")
+    @router.get(
+        "/{upc}", response_model=ExpandedStoreProduct, operation_id="getStoreProduct"
+    )
     async def get_store_product(
         self,
         upc: str,
+        expand: frozenset[StoreProductExpand] = Depends(
+            expand_query("product", "category")
+        ),
         repo: StoreProductRepository = Depends(store_product_repository),
         _: User = Security(require_permission((StoreProduct, BasicPermission.VIEW))),
+        _etag: None = Depends(conditional_read),
     ):
-        return repo.get_by_upc(upc)
+        if not expand:
+            return repo.get_by_upc(upc)
+
+        store_products = repo.get_all(limit=None, upcs=[upc], expand=expand)
+        return store_products[0] if store_products else None
 
     @router.post("/", response_model=StoreProduct, operation_id="createStoreProduct")
     async def create_store_product(
@@ -118,6 +169,7 @@ class StoreProductViewSet:
         source_upc: str,
         request: CreatePromotionalProduct,
         repo: StoreProductRepository = Depends(store_product_repository),
+        inventory: InventoryController = Depends(inventory_controller),
         _: User = Security(require_permission((StoreProduct, BasicPermission.CREATE))),
     ):
         # Get the source store product
@@ -163,44 +215,38 @@ class StoreProductViewSet:
                 detail="Promotional UPC must be different from source UPC",
             )
 
-        # Create the promotional product
+        # Create the promotional product; converted units are moved to it through
+        # the inventory ledger, added units are its initial stock
         promotional_product_data = CreateStoreProduct(
             UPC=request.promotional_UPC,
             UPC_prom=None,
             id_product=source_product.id_product,
             selling_price=source_product.selling_price * 0.8,  # 20% discount
-            products_number=request.units,
+            products_number=0 if request.operation_type == "convert" else request.units,
             promotional_product=True,
         )
+        updated_source_data = UpdateStoreProduct(
+            UPC_prom=request.promotional_UPC,
+            id_product=source_product.id_product,
+            selling_price=source_product.selling_price,
+            products_number=source_product.products_number,
+            promotional_product=False,
+        )
 
-        if request.operation_type == "convert":
-            # Convert units: reduce source product stock and update UPC_prom reference
-            updated_source_data = UpdateStoreProduct(
-                UPC_prom=request.promotional_UPC,
-                id_product=source_product.id_product,
-                selling_price=source_product.selling_price,
-                products_number=source_product.products_number - request.units,
-                promotional_product=False,
-            )
-
-            with transaction(repo._db):
-                promotional_product = repo.create(promotional_product_data)
-                repo.update(source_upc, updated_source_data)
-        else:
-            # Add units: create promotional product without reducing source stock
-            updated_source_data = UpdateStoreProduct(
-                UPC_prom=request.promotional_UPC,
-                id_product=source_product.id_product,
-                selling_price=source_product.selling_price,
-                products_number=source_product.products_number,  # Keep original stock
-                promotional_product=False,
-            )
-
-            with transaction(repo._db):
-                promotional_product = repo.create(promotional_product_data)
+        try:
+            with unit_of_work(repo._db):
+                repo.create(promotional_product_data)
+                if request.operation_type == "convert":
+                    # Convert units: take them off the source product's stock
+                    inventory.convert(
+                        source_upc, request.promotional_UPC, request.units
+                    )
+                    updated_source_data.products_number -= request.units
                 repo.update(source_upc, updated_source_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
 
-        return promotional_product
+        return repo.get_by_upc(request.promotional_UPC)
 
     @router.put(
         "/{upc}", response_model=StoreProduct, operation_id="updateStoreProduct"
@@ -210,6 +256,7 @@ class StoreProductViewSet:
         upc: str,
         request: UpdateStoreProduct,
         repo: StoreProductRepository = Depends(store_product_repository),
+        inventory: InventoryController = Depends(inventory_controller),
         _: User = Security(require_permission((StoreProduct, BasicPermission.UPDATE))),
     ):
         # Get the current store product
@@ -232,29 +279,93 @@ class StoreProductViewSet:
         )
         await self._validate_upc_prom_not_self_reference(request.UPC_prom, upc)
 
-        # Update the product
-        updated_product = repo.update(upc, request)
-
-        # If this is a regular product and price changed, update promotional product price if it exists
-        if (
-            not current_product.promotional_product
-            and request.selling_price != current_product.selling_price
-        ):
-            promotional_product = repo.get_promotional_product_for_product_id(
-                request.id_product
-            )
-            if promotional_product:
-                promotional_update = UpdateStoreProduct(
-                    UPC_prom=promotional_product.UPC_prom,
-                    id_product=promotional_product.id_product,
-                    selling_price=request.selling_price * 0.8,
-                    products_number=promotional_product.products_number,
-                    promotional_product=promotional_product.promotional_product,
+        with unit_of_work(repo._db):
+            # A changed stock is recorded as an adjustment in the inventory ledger
+            if request.products_number != current_product.products_number:
+                try:
+                    inventory.set_stock(upc, request.products_number)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e)) from e
+
+            # Update the product
+            updated_product = repo.update(upc, request)
+
+            # If this is a regular product and price changed, update promotional product price if it exists
+            if (
+                not current_product.promotional_product
+                and request.selling_price != current_product.selling_price
+            ):
+                promotional_product = repo.get_promotional_product_for_product_id(
+                    request.id_product
                 )
-                repo.update(promotional_product.UPC, promotional_update)
+                if promotional_product:
+                    promotional_update = UpdateStoreProduct(
+                        UPC_prom=promotional_product.UPC_prom,
+                        id_product=promotional_product.id_product,
+                        selling_price=request.selling_price * 0.8,
+                        products_number=promotional_product.products_number,
+                        promotional_product=promotional_product.promotional_product,
+                    )
+                    repo.update(promotional_product.UPC, promotional_update)
 
         return updated_product
 
+    @router.get(
+        "/{upc}/stock", response_model=StockLevel, operation_id="getStoreProductStock"
+    )
+    async def get_store_product_stock(
+        self,
+        upc: str,
+        inventory: InventoryController = Depends(inventory_controller),
+        _: User = Security(require_permission((StoreProduct, BasicPermission.VIEW))),
+    ):
+        try:
+            return inventory.get_stock(upc)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+
+    @router.get(
+        "/{upc}/movements",
+        response_model=PaginatedResponse[InventoryMovement],
+        operation_id="getStoreProductMovements",
+    )
+    async def get_store_product_movements(
+        self,
+        upc: str,
+        skip: int = Query(0, ge=0, description="Number of records to skip"),
+        limit: Optional[int] = Query(
+            10, ge=1, le=1000, description="Maximum number of records to return"
+        ),
+        kind: Optional[InventoryMovementKind] = Query(
+            None, description="Filter by movement kind"
+        ),
+        inventory: InventoryController = Depends(inventory_controller),
+        _: User = Security(require_permission((StoreProduct, BasicPermission.VIEW))),
+    ):
+        movements, total = inventory.get_movements(
+            upc, skip=skip, limit=limit, kind=kind
+        )
+        return PaginationHelper.create_paginated_response(
+            data=movements, total=total, skip=skip, limit=limit
+        )
+
+    @router.post(
+        "/{upc}/movements",
+        response_model=InventoryMovement,
+        operation_id="recordStoreProductMovement",
+    )
+    async def record_store_product_movement(
+        self,
+        upc: str,
+        request: RecordInventoryMovement,
+        inventory: InventoryController = Depends(inventory_controller),
+        _: User = Security(require_permission((StoreProduct, BasicPermission.UPDATE))),
+    ):
+        try:
+            return inventory.record(upc, request.kind, request.quantity)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
     @router.delete("/{upc}", operation_id="deleteStoreProduct")
     async def delete_store_product(
         self,
@@ -293,13 +404,18 @@ class StoreProductViewSet:
         repo: StoreProductRepository = Depends(store_product_repository),
         _: User = Security(require_permission((StoreProduct, BasicPermission.DELETE))),
     ):
+        current_products = repo.get_many_by_upc(request.ids)
+        promotional_products = repo.get_promotional_products_for_product_ids(
+            [
+                product.id_product
+                for product in current_products.values()
+                if not product.promotional_product
+            ]
+        )
         for upc in request.ids:
-            current_product = repo.get_by_upc(upc)
+            current_product = current_products.get(upc)
             if current_product and not current_product.promotional_product:
-                promotional_product = repo.get_promotional_product_for_product_id(
-                    current_product.id_product
-                )
-                if promotional_product:
+                if current_product.id_product in promotional_products:
                     raise HTTPException(
                         status_code=400,
                         detail=f"Cannot delete regular product {upc} that has a promotional version. Please delete the promotional product first.",